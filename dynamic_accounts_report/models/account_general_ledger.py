@@ -32,10 +32,11 @@ from odoo.tools import date_utils
 class AccountGeneralLedger(models.TransientModel):
     """For creating General Ledger report"""
     _name = 'account.general.ledger'
+    _inherit = 'dynamic.ledger.mixin'
     _description = 'General Ledger Report'
 
     @api.model
-    def view_report(self, option, tag):
+    def view_report(self, option, tag, lazy=False):
         """
         Retrieve partner ledger report data based on options and tags.
 
@@ -45,42 +46,19 @@ class AccountGeneralLedger(models.TransientModel):
         :param tag: The tag to filter the report data.
         :type tag: str
 
+        :param lazy: Whether to return the totals of the accounts only, their
+        lines being loaded with get_account_lines.
+        :type lazy: bool
+
         :return: A dictionary containing the partner ledger report data.
         :rtype: dict
         """
-        account_dict = {}
-        account_totals = {}
-        move_line_ids = self.env['account.move.line'].search(
-            [('parent_state', '=', 'posted')])
-        account_ids = move_line_ids.mapped('account_id')
-        account_dict['journal_ids'] = self.env['account.journal'].search_read(
-            [], ['name'])
-        account_dict['analytic_ids'] = self.env[
-            'account.analytic.account'].search_read(
-            [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'account_id': account.id}
-            account_dict['account_totals'] = account_totals
-        return account_dict
+        return self._get_general_ledger_data(
+            [('parent_state', '=', 'posted')], lazy=lazy)
 
     @api.model
     def get_filter_values(self, journal_id, date_range, options, analytic,
-                          method):
+                          method, lazy=False):
         """
         Retrieve filtered values for the partner ledger report.
 
@@ -99,12 +77,71 @@ class AccountGeneralLedger(models.TransientModel):
         :param analytic: The analytic IDs to filter the report data.
         :type analytic: list
 
+        :param lazy: Whether to return the totals of the accounts only, their
+        lines being loaded with get_account_lines.
+        :type lazy: bool
+
         :return: A dictionary containing the filtered values for the partner
         ledger report.
         :rtype: dict
         """
-        account_dict = {}
-        account_totals = {}
+        return self._get_general_ledger_data(
+            self._get_filter_domain(journal_id, date_range, options, analytic,
+                                    method), lazy=lazy)
+
+    @api.model
+    def get_account_lines(self, account_id, journal_id, date_range, options,
+                          analytic, method, after=None):
+        """
+        Retrieve a page of the lines of an account of the report, for the
+        filters of get_filter_values.
+
+        :param account_id: The ID of the account expanded.
+        :type account_id: int
+
+        :param after: The key of the last line of the previous page, None for
+        the first page.
+        :type after: list
+
+        :return: A dictionary with the 'lines' of the page, in the format of
+        the lines of get_filter_values, its 'opening_balance' and the key of
+        the 'next' page, False for the last page.
+        :rtype: dict
+        """
+        domain = self._get_filter_domain(
+            journal_id, date_range, options, analytic, method)
+        page = self._get_ledger_page(
+            domain + [('account_id', '=', account_id)],
+            ['date', 'name', 'move_name', 'debit', 'credit', 'partner_id',
+             'account_id', 'journal_id', 'move_id', 'analytic_line_ids'],
+            after=after)
+        page['lines'] = [[line] for line in page['lines']]
+        return page
+
+    @api.model
+    def _get_filter_domain(self, journal_id, date_range, options, analytic,
+                           method):
+        """
+        Build the domain of the move lines of the report for the filters.
+
+        :param journal_id: The journal IDs to filter the report data.
+        :type journal_id: list
+
+        :param date_range: The date range option to filter the report data.
+        :type date_range: str or dict
+
+        :param options: The additional options to filter the report data.
+        :type options: dict
+
+        :param method: Find the method
+        :type options: dict
+
+        :param analytic: The analytic IDs to filter the report data.
+        :type analytic: list
+
+        :return: The domain of the move lines.
+        :rtype: list
+        """
         today = fields.Date.today()
         quarter_start, quarter_end = date_utils.get_quarter(today)
         previous_quarter_start = quarter_start - relativedelta(months=3)
@@ -170,31 +207,74 @@ class AccountGeneralLedger(models.TransientModel):
                 end_date = datetime.strptime(date_range['end_date'],
                                              '%Y-%m-%d').date()
                 domain += [('date', '<=', end_date)]
-        move_line_ids = self.env['account.move.line'].search(domain)
-        account_ids = move_line_ids.mapped('account_id')
+        return domain
+
+    @api.model
+    def _get_general_ledger_data(self, domain, lazy=False):
+        """
+        Build the general ledger data of the move lines matching the domain:
+        the totals of the accounts are read with one grouped query and the
+        lines with one ordered query, then grouped by account in one pass.
+
+        :param domain: The domain of the move lines of the report.
+        :type domain: list
+
+        :param lazy: Whether to leave the lines of the accounts empty.
+        :type lazy: bool
+
+        :return: A dictionary mapping the display names of the accounts to
+        their lines, each one in the format of read(), with the journals,
+        the analytic accounts and the totals of the accounts.
+        :rtype: dict
+        """
+        move_line = self.env['account.move.line']
+        account_dict = {}
         account_dict['journal_ids'] = self.env['account.journal'].search_read(
             [], ['name'])
         account_dict['analytic_ids'] = self.env[
             'account.analytic.account'].search_read(
             [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
+        if lazy:
+            account_totals = {}
+            currency_id = self.env.company.currency_id.symbol
+            for account, debit, credit, count in self._get_ledger_summary(
+                    domain):
+                account_dict[account.display_name] = []
+                account_totals[account.display_name] = {
+                    'total_debit': round(debit, 2),
+                    'total_credit': round(credit, 2),
+                    'currency_id': currency_id,
+                    'account_id': account.id,
+                    'line_count': count}
+            if account_totals:
+                account_dict['account_totals'] = account_totals
+            return account_dict
+        totals = {
+            account.id: (debit, credit)
+            for account, debit, credit in move_line._read_group(
+                domain, ['account_id'], ['debit:sum', 'credit:sum'])
+        }
+        move_lines = self._get_ledger_lines(domain)
+        account_ids = {}
+        for move_line_data in move_lines.read(
+                ['date', 'name', 'move_name', 'debit', 'credit',
+                 'partner_id', 'account_id', 'journal_id', 'move_id',
+                 'analytic_line_ids']):
+            account_id, account_name = move_line_data['account_id']
+            if account_name not in account_ids:
+                account_ids[account_name] = account_id
+                account_dict[account_name] = []
+            account_dict[account_name].append([move_line_data])
+        if account_ids:
             currency_id = self.env.company.currency_id.symbol
-            account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'account_id': account.id}
-            account_dict['account_totals'] = account_totals
+            account_dict['account_totals'] = {
+                account_name: {
+                    'total_debit': round(totals[account_id][0], 2),
+                    'total_credit': round(totals[account_id][1], 2),
+                    'currency_id': currency_id,
+                    'account_id': account_id}
+                for account_name, account_id in account_ids.items()
+            }
         return account_dict
 
     @api.model
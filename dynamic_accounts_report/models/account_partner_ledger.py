@@ -24,8 +24,7 @@ import json
 from dateutil.relativedelta import relativedelta
 import xlsxwriter
 from odoo import api, fields, models
-from datetime import datetime
-from odoo.tools import date_utils
+from odoo.tools import SQL, date_utils
 
 
 class AccountPartnerLedger(models.TransientModel):
@@ -47,55 +46,12 @@ class AccountPartnerLedger(models.TransientModel):
         :return: A dictionary containing the partner data for the report.
         :rtype: dict
         """
-        fiscal_year = self.env['res.company'].search([]).mapped('account_opening_date')[0].strftime('%Y-%m-%d')
-        fiscal_year_start = datetime.strptime(fiscal_year,
-                                              '%Y-%m-%d').date()
-        partner_dict = {}
-        partner_totals = {}
-        move_line_ids = self.env['account.move.line'].search(
-            [('account_type', 'in',
-              ['liability_payable', 'asset_receivable']),
-             ('parent_state', '=', 'posted')])
-        partner_ids = move_line_ids.mapped('partner_id')
-        for partner in partner_ids:
-            total_debit_balance = 0
-            total_credit_balance = 0
-            balance = 0
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.partner_id == partner)
-            move_line_list = []
-            for move_line in move_line_id:
-                if move_line.invoice_date:
-                    if move_line.invoice_date < fiscal_year_start:
-                        total_debit_balance += move_line.debit
-                        total_credit_balance += move_line.credit
-                        balance = total_debit_balance - total_credit_balance
-                move_line_data = move_line.read(
-                    ['date', 'move_name', 'account_type', 'debit', 'credit',
-                     'date_maturity', 'account_id', 'journal_id', 'move_id',
-                     'matching_number', 'amount_currency'])
-                account_code = self.env['account.account'].browse(
-                    move_line.account_id.id).code
-                journal_code = self.env['account.journal'].browse(
-                    move_line.journal_id.id).code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-                move_line_list.append(move_line_data)
-            partner_dict[partner.name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            partner_totals[partner.name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'initial_balance': balance,
-                'partner_id': partner.id,
-                'move_name': 'Initial Balance',
-                'initial_debit': total_debit_balance,
-                'initial_credit': total_credit_balance,
-            }
-            partner_dict['partner_totals'] = partner_totals
-        return partner_dict
+        domain = [('account_type', 'in',
+                   ['liability_payable', 'asset_receivable']),
+                  ('parent_state', '=', 'posted'),
+                  ('partner_id', '!=', False)]
+        return self._get_partner_ledger_data(
+            domain, self.env.company.account_opening_date)
 
     @api.model
     def get_filter_values(self, partner_id, data_range, account, options):
@@ -122,10 +78,8 @@ class AccountPartnerLedger(models.TransientModel):
         if account == {}:
             account = None
         account_type_domain = []
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
+        option_domain = ['posted', 'draft'] if options and 'draft' in options \
+            else ['posted']
         if account is None or (
                 'Receivable' in account and 'Payable' in account):
             account_type_domain.append('liability_payable')
@@ -134,211 +88,159 @@ class AccountPartnerLedger(models.TransientModel):
             account_type_domain.append('asset_receivable')
         elif 'Payable' in account:
             account_type_domain.append('liability_payable')
+        domain = [('account_type', 'in', account_type_domain),
+                  ('parent_state', 'in', option_domain)]
+        if partner_id:
+            domain.append(('partner_id', 'in', partner_id))
+        else:
+            domain.append(('partner_id', '!=', False))
+        if options and 'unreconciled' in options:
+            domain.append(('reconciled', '=', False))
+        date_start, date_end = self._get_date_range(data_range)
+        if date_end:
+            domain.append(('date', '<=', date_end))
+        return self._get_partner_ledger_data(
+            domain, date_start or self.env.company.account_opening_date)
+
+    @api.model
+    def _get_date_range(self, data_range):
+        """
+        Find the first and last dates of the period of the date range option.
+
+        :param data_range: The date range option for filtering the data.
+        :type data_range: str or dict
+
+        :return: The start and end dates of the period, False when the option
+        leaves them open.
+        :rtype: tuple
+        """
+        today = fields.Date.today()
+        if not data_range:
+            return False, False
+        if data_range == 'month':
+            return date_utils.start_of(today, 'month'), date_utils.end_of(
+                today, 'month')
+        if data_range == 'year':
+            return date_utils.start_of(today, 'year'), date_utils.end_of(
+                today, 'year')
+        if data_range == 'quarter':
+            return date_utils.get_quarter(today)
+        if data_range == 'last-month':
+            last_month = today - relativedelta(months=1)
+            return date_utils.start_of(last_month, 'month'), \
+                date_utils.end_of(last_month, 'month')
+        if data_range == 'last-year':
+            last_year = today - relativedelta(years=1)
+            return date_utils.start_of(last_year, 'year'), date_utils.end_of(
+                last_year, 'year')
+        if data_range == 'last-quarter':
+            return date_utils.get_quarter(today - relativedelta(months=3))
+        return (fields.Date.to_date(data_range.get('start_date')) or False,
+                fields.Date.to_date(data_range.get('end_date')) or False)
+
+    @api.model
+    def _get_partner_ledger_data(self, domain, date_start):
+        """
+        Read the ledger of the partners of the move lines matching the domain
+        with one query: the move lines dated before the start of the period
+        are summed into the initial balance of their partner, and each line of
+        the period gets the balance of its partner up to it, initial balance
+        included.
+
+        :param domain: The domain of the move lines, up to the end of the
+        period.
+        :type domain: list
+
+        :param date_start: The first date of the period, False to show all
+        the lines.
+        :type date_start: date
+
+        :return: A dictionary containing the lines of each partner, by name,
+        and their totals as 'partner_totals'.
+        :rtype: dict
+        """
+        move_line = self.env['account.move.line']
+        query = move_line._search(domain)
+
+        def column(name):
+            return SQL.identifier(query.table, name)
+
+        in_period = SQL("%s >= %s", column('date'), date_start) \
+            if date_start else SQL("TRUE")
+        partner_window = SQL("PARTITION BY %s", column('partner_id'))
+        line_window = SQL(
+            "%s ORDER BY %s, COALESCE(%s, ''), %s", partner_window,
+            column('date'), column('move_name'), column('id'))
+        # a partner without line in the period keeps one row before it, to
+        # carry its initial balance
+        rows = self.env.execute_query(SQL(
+            """
+            SELECT partner_id, id, in_period, initial_debit, initial_credit,
+                   total_debit, total_credit, running_balance
+              FROM (%s) AS ledger
+             WHERE in_period OR (period_count = 0 AND line_number = 1)
+          ORDER BY partner_id, line_number
+            """,
+            query.select(
+                SQL("%s AS partner_id", column('partner_id')),
+                SQL("%s AS id", column('id')),
+                SQL("%s AS in_period", in_period),
+                SQL("ROW_NUMBER() OVER (%s) AS line_number", line_window),
+                SQL("COUNT(*) FILTER (WHERE %s) OVER (%s) AS period_count",
+                    in_period, partner_window),
+                SQL("COALESCE(SUM(%s) FILTER (WHERE NOT %s) OVER (%s), 0)"
+                    " AS initial_debit",
+                    column('debit'), in_period, partner_window),
+                SQL("COALESCE(SUM(%s) FILTER (WHERE NOT %s) OVER (%s), 0)"
+                    " AS initial_credit",
+                    column('credit'), in_period, partner_window),
+                SQL("COALESCE(SUM(%s) FILTER (WHERE %s) OVER (%s), 0)"
+                    " AS total_debit",
+                    column('debit'), in_period, partner_window),
+                SQL("COALESCE(SUM(%s) FILTER (WHERE %s) OVER (%s), 0)"
+                    " AS total_credit",
+                    column('credit'), in_period, partner_window),
+                SQL("SUM(%s - %s) OVER (%s ROWS UNBOUNDED PRECEDING)"
+                    " AS running_balance",
+                    column('debit'), column('credit'), line_window),
+            )))
+        move_lines = move_line.browse(
+            [row[1] for row in rows if row[2]])
+        line_values = {}
+        for line, values in zip(move_lines, move_lines.read(
+                ['date', 'move_name', 'account_type', 'debit', 'credit',
+                 'date_maturity', 'account_id', 'journal_id', 'move_id',
+                 'matching_number', 'amount_currency'])):
+            values['jrnl'] = line.journal_id.code
+            values['code'] = line.account_id.code
+            line_values[line.id] = values
+        partner_names = {
+            partner.id: partner.name for partner in self.env[
+                'res.partner'].browse(dict.fromkeys(row[0] for row in rows))}
+        currency_id = self.env.company.currency_id.symbol
         partner_dict = {}
         partner_totals = {}
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
-        if not partner_id:
-            partner_id = self.env['account.move.line'].search([(
-                'account_type', 'in', account_type_domain),
-                ('parent_state', 'in', option_domain)]).mapped(
-                'partner_id').ids
-        balance_move_line_ids = []
-        for partners in partner_id:
-            partner = self.env['res.partner'].browse(partners).name
-            if data_range:
-                if data_range == 'month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.month == fields.Date.today().month)
-                    date_start = fields.Date.today().replace(day=1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.year == fields.Date.today().year)
-                    date_start = fields.Date.today().replace(month=1, day=1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', quarter_start),
-                         ('date', '<=', quarter_end),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = quarter_start
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.month == fields.Date.today().month - 1)
-                    date_start = fields.Date.today().replace(day=1,month=fields.Date.today().month - 1)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain)]).filtered(
-                        lambda x: x.date.year == fields.Date.today().year - 1)
-                    date_start = fields.Date.today().replace(day=1,month=1,)
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif data_range == 'last-quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', previous_quarter_start),
-                         ('date', '<=', previous_quarter_end),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = previous_quarter_start
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'start_date' in data_range and 'end_date' in data_range:
-                    start_date = datetime.strptime(data_range['start_date'],
-                                                   '%Y-%m-%d').date()
-                    end_date = datetime.strptime(data_range['end_date'],
-                                                 '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', start_date),
-                         ('date', '<=', end_date),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = start_date
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'start_date' in data_range:
-                    start_date = datetime.strptime(data_range['start_date'],
-                                                   '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '>=', start_date),
-                         ('parent_state', 'in', option_domain)])
-                    date_start = start_date
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-                elif 'end_date' in data_range:
-                    end_date = datetime.strptime(data_range['end_date'],
-                                                 '%Y-%m-%d').date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('date', '<=', end_date),
-                         ('parent_state', 'in', option_domain)])
-                    fiscal_year = self.env['res.company'].search([]).mapped(
-                        'account_opening_date')[0].strftime('%Y-%m-%d')
-                    date_start = datetime.strptime(fiscal_year,
-                                                          '%Y-%m-%d').date()
-                    balance_move_line_ids = self.env[
-                        'account.move.line'].search(
-                        [('partner_id', '=', partners), (
-                            'account_type', 'in',
-                            account_type_domain),
-                         ('parent_state', 'in', option_domain),
-                         ('invoice_date', '<', date_start)])
-            else:
-                move_line_ids = self.env['account.move.line'].search(
-                    [('partner_id', '=', partners), (
-                        'account_type', 'in',
-                        account_type_domain),
-                     ('parent_state', 'in', option_domain)])
-            total_debit_balance = 0
-            total_credit_balance = 0
-            balance = 0
-            move_line_list = []
-            for move_line in move_line_ids:
-                move_line_data = move_line.read(
-                    ['date', 'move_name', 'account_type', 'debit', 'credit',
-                     'date_maturity', 'account_id', 'journal_id', 'move_id',
-                     'matching_number', 'amount_currency'])
-                account_code = self.env['account.account'].browse(
-                    move_line.account_id.id).code
-                journal_code = self.env['account.journal'].browse(
-                    move_line.journal_id.id).code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-                move_line_list.append(move_line_data)
-            for remaining_move in balance_move_line_ids:
-                if remaining_move.invoice_date:
-                    if remaining_move.invoice_date < date_start:
-                        total_debit_balance += remaining_move.debit
-                        total_credit_balance += remaining_move.credit
-                        balance = total_debit_balance - total_credit_balance
-            partner_dict[partner] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            partner_totals[partner] = {
-                'total_debit': round(sum(move_line_ids.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_ids.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'partner_id': partners,
-                'initial_balance': balance,
-                'move_name': 'Initial Balance',
-                'initial_debit': total_debit_balance,
-                'initial_credit': total_credit_balance,
-            }
+        for (partner_id, line_id, line_in_period, initial_debit,
+             initial_credit, total_debit, total_credit,
+             running_balance) in rows:
+            partner = partner_names[partner_id]
+            if partner not in partner_totals:
+                partner_dict[partner] = []
+                partner_totals[partner] = {
+                    'total_debit': round(float(total_debit), 2),
+                    'total_credit': round(float(total_credit), 2),
+                    'currency_id': currency_id,
+                    'partner_id': partner_id,
+                    'initial_balance': float(initial_debit - initial_credit),
+                    'move_name': 'Initial Balance',
+                    'initial_debit': float(initial_debit),
+                    'initial_credit': float(initial_credit),
+                }
+            if line_in_period:
+                line_values[line_id]['running_balance'] = float(
+                    running_balance)
+                partner_dict[partner].append([line_values[line_id]])
+        if partner_totals:
             partner_dict['partner_totals'] = partner_totals
         return partner_dict
 
@@ -479,7 +381,7 @@ class AccountPartnerLedger(models.TransientModel):
                     sheet.merge_range(row, col + 5, row, col + 6, rec[0]['date_maturity'] or '', txt_name)
                     sheet.merge_range(row, col + 7, row, col + 8, format_number(rec[0]['debit']), txt_name)
                     sheet.merge_range(row, col + 9, row, col + 10, format_number(rec[0]['credit']), txt_name)
-                    sheet.merge_range(row, col + 11, row, col + 12, ' ', txt_name)
+                    sheet.merge_range(row, col + 11, row, col + 12, format_number(rec[0].get('running_balance')), txt_name)
 
             # Grand totals
             row += 1
@@ -22,9 +22,9 @@
 import calendar
 import io
 import json
-from datetime import datetime
 import xlsxwriter
 from odoo import api, fields, models
+from odoo.tools import SQL
 from odoo.tools.date_utils import get_month, get_fiscal_year, \
     get_quarter_number, subtract
 
@@ -45,47 +45,25 @@ class AccountTrialBalance(models.TransientModel):
         :return: List of dictionaries representing the trial balance report.
         :rtype: list
         """
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
-        today = fields.Date.today()
+        month_start, month_end = get_month(fields.Date.today())
         move_line_list = []
-        for account_id in account_ids:
-            initial_move_line_ids = self.env['account.move.line'].search(
-                [('date', '<', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('parent_state', '=', 'posted')])
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            move_line_ids = self.env['account.move.line'].search(
-                [('date', '>=', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('date', '<=', get_month(today)[1]),
-                 ('parent_state', '=', 'posted')])
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + total_debit
-            sum_credit = initial_total_credit + total_credit
-            diff_credit_debit = sum_debit - sum_credit
-            if diff_credit_debit > 0:
-                end_total_debit = diff_credit_debit
-                end_total_credit = 0.0
-            else:
-                end_total_debit = 0.0
-                end_total_credit = abs(diff_credit_debit)
-            data = {
+        for account_id, totals in self._get_trial_balance_totals(
+                [('parent_state', '=', 'posted')],
+                [(False, subtract(month_start, days=1)),
+                 (month_start, month_end)]):
+            (initial_total_debit, initial_total_credit), (
+                total_debit, total_credit) = totals
+            end_total_debit, end_total_credit = self._get_end_balance(totals)
+            move_line_list.append({
                 'account': account_id.display_name,
                 'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], ['name']),
                 'initial_total_debit': "{:,.2f}".format(initial_total_debit),
                 'initial_total_credit': "{:,.2f}".format(initial_total_credit),
                 'total_debit': total_debit,
                 'total_credit': total_credit,
                 'end_total_debit': "{:,.2f}".format(end_total_debit),
                 'end_total_credit': "{:,.2f}".format(end_total_credit)
-            }
-            move_line_list.append(data)
+            })
         journal = {
             'journal_ids': self.env['account.journal'].search_read([], [
                 'name'])
@@ -115,185 +93,61 @@ class AccountTrialBalance(models.TransientModel):
         :return: List of dictionaries representing the financial report.
         :rtype: list
         """
+        option_domain = ['posted', 'draft'] if options and 'draft' in options \
+            else ['posted']
+        domain = [('parent_state', 'in', option_domain)]
+        if journal_list:
+            domain.append(('journal_id', 'in', journal_list))
+        if analytic:
+            domain.append(('analytic_line_ids', 'in', analytic))
+        if method and 'cash' in method:
+            domain.append(('journal_id', 'in',
+                           self.env.company.tax_cash_basis_journal_id.ids))
+        start_date = fields.Date.to_date(start_date)
+        end_date = fields.Date.to_date(end_date)
+        if comparison_type == 'year':
+            start_date = get_fiscal_year(start_date)[0]
+            end_date = get_fiscal_year(end_date)[1]
+        comparison_number = int(comparison_number or 0)
 
-        if options == {}:
-            options = None
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
-        if method == {}:
-            method = None
-        dynamic_total_debit = {}
+        def shift(date, number):
+            if comparison_type == 'month':
+                return subtract(date, months=number)
+            if comparison_type == 'year':
+                return subtract(date, years=number)
+            return subtract(date, months=number * 3)
+
+        def period_name(date):
+            if comparison_type == 'month':
+                return self.get_month_name(date) + ' ' + str(date.year)
+            return 'Q' + ' ' + str(get_quarter_number(date)) + ' ' + str(
+                date.year)
+
+        # the oldest comparison period comes first, as in the columns
+        comparison_starts = [shift(start_date, number) for number in
+                             range(comparison_number, 0, -1)]
+        periods = [(False, subtract(
+            comparison_starts[0] if comparison_starts else start_date,
+            days=1))]
+        periods += [(comparison_start, shift(end_date, number))
+                    for number, comparison_start in zip(
+                range(comparison_number, 0, -1), comparison_starts)]
+        periods.append((start_date, end_date))
         dynamic_date_num = {}
-        dynamic_total_credit = {}
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
+        if comparison_number and comparison_type in ('month', 'quarter'):
+            dynamic_date_num['dynamic_date_num0'] = period_name(start_date)
+            for number in range(1, comparison_number + 1):
+                dynamic_date_num[f'dynamic_date_num{number}'] = period_name(
+                    shift(start_date, number))
         move_line_list = []
-        start_date_first = \
-            get_fiscal_year(datetime.strptime(start_date, "%Y-%m-%d").date())[
-                0] if comparison_type == 'year' else datetime.strptime(
-                start_date, "%Y-%m-%d").date()
-        end_date_first = \
-            get_fiscal_year(datetime.strptime(end_date, "%Y-%m-%d").date())[
-                1] if comparison_type == 'year' else datetime.strptime(end_date,
-                                                                       "%Y-%m-%d").date()
-        for account_id in account_ids:
-            start_date = start_date_first
-            end_date = end_date_first
-            if comparison_number:
-                if comparison_type == 'month':
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number))
-                elif comparison_type == 'year':
-                    initial_start_date = subtract(start_date, years=eval(
-                        comparison_number))
-                else:
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number) * 3)
-            else:
-                initial_start_date = start_date
-            domain = [('date', '<', initial_start_date),
-                      ('account_id', '=', account_id.id),
-                      ('parent_state', 'in', option_domain), ]
-            if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            initial_move_line_ids = self.env['account.move.line'].search(
-                domain)
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            if comparison_number:
-                if comparison_type == 'year':
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, years=i)
-                        com_end_date = subtract(end_date, years=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-                if comparison_type == 'month':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = self.get_month_name(
-                        start_date) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i)
-                        com_end_date = subtract(end_date, months=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain)]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids), )
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = self.get_month_name(
-                            com_start_date) + ' ' + str(
-                            com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-                if comparison_type == 'quarter':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                        get_quarter_number(start_date)) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i * 3)
-                        com_end_date = subtract(end_date, months=i * 3)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list))
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                            get_quarter_number(com_start_date)) + ' ' + str(
-                            com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-            domain = [('date', '>=', start_date),
-                      ('account_id', '=', account_id.id),
-                      ('date', '<=', end_date),
-                      ('parent_state', 'in', option_domain)]
-            if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            move_line_ids = self.env['account.move.line'].search(domain)
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + sum(
-                dynamic_total_debit.values()) + total_debit
-            sum_credit = initial_total_credit + sum(
-                dynamic_total_credit.values()) + total_credit
-            diff_credit_debit = sum_debit - sum_credit
-            if diff_credit_debit > 0:
-                end_total_debit = diff_credit_debit
-                end_total_credit = 0.0
-            else:
-                end_total_debit = 0.0
-                end_total_credit = abs(diff_credit_debit)
+        for account_id, totals in self._get_trial_balance_totals(domain,
+                                                                 periods):
+            initial_total_debit, initial_total_credit = totals[0]
+            total_debit, total_credit = totals[-1]
+            end_total_debit, end_total_credit = self._get_end_balance(totals)
             data = {
                 'account': account_id.display_name,
                 'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], [
-                    'name']),
                 'initial_total_debit': initial_total_debit,
                 'initial_total_credit': initial_total_credit,
                 'total_debit': total_debit,
@@ -304,17 +158,98 @@ class AccountTrialBalance(models.TransientModel):
             if comparison_number:
                 if dynamic_date_num:
                     data['dynamic_date_num'] = dynamic_date_num
-                for i in range(1, eval(comparison_number) + 1):
-                    data[f'dynamic_total_debit_{i}'] = dynamic_total_debit.get(
-                        f"dynamic_total_debit_{eval(comparison_number) + 1 - i}",
-                        0.0)
-                    data[
-                        f'dynamic_total_credit_{i}'] = dynamic_total_credit.get(
-                        f"dynamic_total_credit_{eval(comparison_number) + 1 - i}",
-                        0.0)
+                for i, (debit, credit) in enumerate(totals[1:-1], 1):
+                    data[f'dynamic_total_debit_{i}'] = debit
+                    data[f'dynamic_total_credit_{i}'] = credit
             move_line_list.append(data)
         return move_line_list
 
+    @api.model
+    def _get_trial_balance_totals(self, domain, periods):
+        """
+        Sum the debit and credit of every account for each period with one
+        grouped query, one conditional aggregate per period and amount. The
+        move lines matching the domain are joined once to all the lines, so
+        every account with move lines gets its totals, even when no line of
+        it matches the domain.
+
+        :param domain: The domain of the move lines to sum, for the journal,
+        analytic and state filters.
+        :type domain: list
+
+        :param periods: The (first date, last date) of each period, both
+        included, False for a period open on that side.
+        :type periods: list
+
+        :return: A list of (account, [(debit, credit) of each period])
+        tuples, in the order of the accounts.
+        :rtype: list
+        """
+        move_line = self.env['account.move.line']
+        query = move_line._search([])
+        # the filtered lines are joined once, the aggregates only test the
+        # match of each line
+        if all(date_to for date_from, date_to in periods):
+            domain = domain + [('date', '<=', max(
+                date_to for date_from, date_to in periods))]
+        filtered_query = move_line._search(domain)
+
+        def column(name):
+            return SQL.identifier('ledger', name)
+
+        aggregates = []
+        for date_from, date_to in periods:
+            condition = SQL("%s IS NOT NULL", SQL.identifier('filtered', 'id'))
+            if date_from:
+                condition = SQL("%s AND %s >= %s", condition, column('date'),
+                                date_from)
+            if date_to:
+                condition = SQL("%s AND %s <= %s", condition, column('date'),
+                                date_to)
+            aggregates += [
+                SQL("COALESCE(SUM(%s) FILTER (WHERE %s), 0)",
+                    column(amount), condition)
+                for amount in ('debit', 'credit')]
+        totals = {
+            account_id: [(round(float(debit), 2), round(float(credit), 2))
+                         for debit, credit in zip(amounts[::2], amounts[1::2])]
+            for account_id, *amounts in self.env.execute_query(SQL(
+                """
+                SELECT %s, %s
+                  FROM (%s) AS ledger
+             LEFT JOIN (%s) AS filtered ON %s = %s
+              GROUP BY %s
+                """,
+                column('account_id'), SQL(", ").join(aggregates),
+                query.select(*(
+                    SQL.identifier(query.table, name)
+                    for name in ('id', 'account_id', 'date', 'debit',
+                                 'credit'))),
+                filtered_query.select(
+                    SQL.identifier(filtered_query.table, 'id')),
+                SQL.identifier('filtered', 'id'), column('id'),
+                column('account_id')))}
+        accounts = self.env['account.account'].search(
+            [('id', 'in', list(totals))])
+        return [(account, totals[account.id]) for account in accounts]
+
+    @api.model
+    def _get_end_balance(self, totals):
+        """
+        Find the end balance of an account from its totals, on the debit side
+        when it is positive and on the credit side otherwise.
+
+        :param totals: The (debit, credit) of each period of the account.
+        :type totals: list
+
+        :return: The end debit and credit of the account.
+        :rtype: tuple
+        """
+        diff_credit_debit = sum(debit - credit for debit, credit in totals)
+        if diff_credit_debit > 0:
+            return diff_credit_debit, 0.0
+        return 0.0, abs(diff_credit_debit)
+
     @api.model
     def get_month_name(self, date):
         """
@@ -31,10 +31,11 @@ from odoo import api, fields, models
 class CashBookReport(models.TransientModel):
     """For creating Cash Book report"""
     _name = 'cash.book.report'
+    _inherit = 'dynamic.ledger.mixin'
     _description = 'Account Cash Book Report'
 
     @api.model
-    def view_report(self):
+    def view_report(self, lazy=False):
         """
         Retrieves and formats data for the cash book report.
 
@@ -54,34 +55,17 @@ class CashBookReport(models.TransientModel):
           data: 'date', 'journal_id', 'partner_id', 'move_name', 'debit',
                  'move_id', 'credit', 'name', and 'ref'.
         """
-        data = {}
-        move_lines_total = {}
-        journals = self.env['account.journal'].search(
-            [('type', '=', 'cash')])
-        account_move_lines = self.env['account.move.line'].search(
-            [('parent_state', '=', 'posted'),
-             ('journal_id', 'in', journals.ids)])
-        accounts = account_move_lines.mapped('account_id').read(
+        data = self._get_book_data(
+            self._get_filter_domain(None, None, None, None), lazy=lazy)
+        data['accounts'] = self.env['account.account'].browse(
+            [total['account_id']
+             for total in data['move_lines_total'].values()]).read(
             ['display_name', 'name'])
-        for account in accounts:
-            move_lines = account_move_lines.filtered(
-                lambda x: x.account_id.id == account['id'])
-            move_line_data = move_lines.read(
-                ['date', 'journal_id', 'partner_id', 'move_name', 'debit',
-                 'move_id',
-                 'credit', 'name', 'ref'])
-            data[move_lines.mapped('account_id').display_name] = move_line_data
-            currency_id = self.env.company.currency_id.symbol
-            move_lines_total[move_lines.mapped('account_id').display_name] = {
-                'total_debit': round(sum(move_lines.mapped('debit')), 2),
-                'total_credit': round(sum(move_lines.mapped('credit')), 2),
-                'currency_id': currency_id}
-        data['move_lines_total'] = move_lines_total
-        data['accounts'] = accounts
         return data
 
     @api.model
-    def get_filter_values(self, partner_id, data_range, account_list, options):
+    def get_filter_values(self, partner_id, data_range, account_list, options,
+                          lazy=False):
         """
         Retrieves and formats filtered data for the cash book report based on
         the provided filter criteria.
@@ -115,8 +99,43 @@ class CashBookReport(models.TransientModel):
                           debit', 'move_id', 'credit', 'name', and 'ref'.
         :rtype: dict
         """
-        data = {}
-        move_lines_total = {}
+        return self._get_book_data(
+            self._get_filter_domain(partner_id, data_range, account_list,
+                                    options), lazy=lazy)
+
+    @api.model
+    def get_account_lines(self, account_id, partner_id, data_range,
+                          account_list, options, after=None):
+        """
+        Retrieve a page of the lines of an account of the cash book, for
+        the filters of get_filter_values.
+        :param account_id: The ID of the account expanded.
+        :type account_id: int
+        :param after: The key of the last line of the previous page, None
+                      for the first page.
+        :type after: list
+        :return: A dictionary with the 'lines' of the page, its
+                 'opening_balance' and the key of the 'next' page, False for
+                 the last page.
+        :rtype: dict
+        """
+        domain = self._get_filter_domain(
+            partner_id, data_range, account_list, options)
+        return self._get_ledger_page(
+            domain + [('account_id', '=', account_id)],
+            ['date', 'journal_id', 'partner_id', 'move_name', 'debit',
+             'move_id', 'credit', 'name', 'ref'],
+            after=after)
+
+    @api.model
+    def _get_filter_domain(self, partner_id, data_range, account_list,
+                           options):
+        """
+        Build the domain of the move lines of the cash journals for the
+        filters of get_filter_values.
+        :return: The domain of the move lines.
+        :rtype: list
+        """
         today = fields.Date.today()
         quarter_start, quarter_end = date_utils.get_quarter(today)
         previous_quarter_start = quarter_start - relativedelta(months=3)
@@ -126,78 +145,84 @@ class CashBookReport(models.TransientModel):
         if options is not None:
             if 'draft' in options:
                 option_domain = ['posted', 'draft']
+        domain = [('parent_state', 'in', option_domain),
+                  ('journal_id', 'in', journals.ids), ]
         if partner_id:
-            domain = [('parent_state', 'in', option_domain),
-                      ('journal_id', 'in', journals.ids),
-                      ('partner_id', 'in', partner_id), ]
-        else:
-            domain = [('parent_state', 'in', option_domain),
-                      ('journal_id', 'in', journals.ids), ]
+            domain += ('partner_id', 'in', partner_id),
         if account_list:
             domain += ('account_id', 'in', account_list),
         if data_range:
             if data_range == 'month':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.month == fields.Date.today().month)
+                domain += ('date', '>=', today + relativedelta(day=1)), (
+                    'date', '<=', today + relativedelta(day=31))
             elif data_range == 'year':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.year == fields.Date.today().year)
+                domain += ('date', '>=', today.replace(month=1, day=1)), (
+                    'date', '<=', today.replace(month=12, day=31))
             elif data_range == 'quarter':
                 domain += ('date', '>=', quarter_start), (
                     'date', '<=', quarter_end)
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
             elif data_range == 'last-month':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.month == fields.Date.today().month - 1)
+                last_month = today - relativedelta(months=1)
+                domain += ('date', '>=', last_month + relativedelta(day=1)), (
+                    'date', '<=', last_month + relativedelta(day=31))
             elif data_range == 'last-year':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.year == fields.Date.today().year - 1)
+                last_year = today.year - 1
+                domain += ('date', '>=', today.replace(
+                    year=last_year, month=1, day=1)), (
+                    'date', '<=', today.replace(
+                        year=last_year, month=12, day=31))
             elif data_range == 'last-quarter':
                 domain += ('date', '>=', previous_quarter_start), (
                     'date', '<=', previous_quarter_end)
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
             elif 'start_date' in data_range and 'end_date' in data_range:
                 start_date = datetime.strptime(data_range['start_date'],
                                                '%Y-%m-%d').date()
                 end_date = datetime.strptime(data_range['end_date'],
                                              '%Y-%m-%d').date()
                 domain += ('date', '>=', start_date), ('date', '<=', end_date),
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
             elif 'start_date' in data_range:
                 start_date = datetime.strptime(data_range['start_date'],
                                                '%Y-%m-%d').date()
                 domain.append(('date', '>=', start_date))
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
             elif 'end_date' in data_range:
                 end_date = datetime.strptime(data_range['end_date'],
                                              '%Y-%m-%d').date()
                 domain.append(('date', '<=', end_date))
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-        else:
-            account_move_lines = self.env['account.move.line'].search(domain)
-        accounts = account_move_lines.mapped('account_id').read(
-            ['display_name'])
-        for account in accounts:
-            move_lines = account_move_lines.filtered(
-                lambda x: x.account_id.id == account['id'])
-            move_line_data = move_lines.read(
-                ['date', 'journal_id', 'partner_id', 'move_name', 'debit',
-                 'move_id', 'credit', 'name', 'ref'])
-            data[move_lines.mapped('account_id').display_name] = move_line_data
-            currency_id = self.env.company.currency_id.symbol
-            move_lines_total[move_lines.mapped('account_id').display_name] = {
-                'total_debit': round(sum(move_lines.mapped('debit')), 2),
-                'total_credit': round(sum(move_lines.mapped('credit')), 2),
-                'currency_id': currency_id}
+        return domain
+
+    @api.model
+    def _get_book_data(self, domain, lazy=False):
+        """
+        Build the cash book data of the move lines matching the domain: the
+        totals of the accounts are read with one grouped query and, unless
+        lazy, the lines with one ordered query.
+        :param domain: The domain of the move lines.
+        :type domain: list
+        :param lazy: Whether to leave the lines of the accounts empty, to be
+                     loaded with get_account_lines.
+        :type lazy: bool
+        :return: A dictionary mapping the display names of the accounts to
+                 their lines, with the totals of the accounts as
+                 'move_lines_total'.
+        :rtype: dict
+        """
+        data = {}
+        move_lines_total = {}
+        currency_id = self.env.company.currency_id.symbol
+        for account, debit, credit, count in self._get_ledger_summary(domain):
+            data[account.display_name] = []
+            move_lines_total[account.display_name] = {
+                'total_debit': round(debit, 2),
+                'total_credit': round(credit, 2),
+                'currency_id': currency_id,
+                'account_id': account.id,
+                'line_count': count}
+        if not lazy:
+            move_lines = self._get_ledger_lines(domain)
+            for move_line_data in move_lines.read(
+                    ['date', 'journal_id', 'partner_id', 'move_name', 'debit',
+                     'move_id', 'credit', 'name', 'ref', 'account_id']):
+                data[move_line_data['account_id'][1]].append(move_line_data)
         data['move_lines_total'] = move_lines_total
         return data
 
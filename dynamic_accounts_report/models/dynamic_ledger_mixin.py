@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index
+
+# number of move lines of an account sent to the browser per page
+LEDGER_PAGE_SIZE = 80
+
+
+class DynamicLedgerMixin(models.AbstractModel):
+    """Loading of the move lines of the accounts of the ledger reports one
+    page at a time, when the accounts are expanded"""
+    _name = 'dynamic.ledger.mixin'
+    _description = 'Dynamic Ledger Lines'
+
+    def init(self):
+        """Create the index of the move lines in the order of the pages of
+        an account, on the same expressions as the keys of the pages, since
+        move_name is empty on some draft entries"""
+        create_index(self.env.cr, 'account_move_line_ledger_page_index',
+                     'account_move_line',
+                     ['account_id', 'date', "COALESCE(move_name, '')", 'id'])
+
+    @api.model
+    def _get_ledger_summary(self, domain):
+        """
+        Read the totals of the accounts of the move lines matching the domain
+        with one grouped query.
+
+        :param domain: The domain of the move lines of the report.
+        :type domain: list
+
+        :return: A list of (account, total debit, total credit, number of
+        lines) tuples, in the order of the accounts.
+        :rtype: list
+        """
+        return self.env['account.move.line']._read_group(
+            domain, ['account_id'], ['debit:sum', 'credit:sum', '__count'])
+
+    @api.model
+    def _get_ledger_order(self, query):
+        """
+        Build the order of the lines of the ledger reports (date, move_name,
+        id), the order of the keys of the pages.
+
+        :param query: The query of the move lines.
+        :type query: Query
+
+        :return: The ORDER BY expressions of the query.
+        :rtype: SQL
+        """
+        return SQL(
+            "%s, COALESCE(%s, ''), %s",
+            SQL.identifier(query.table, 'date'),
+            SQL.identifier(query.table, 'move_name'),
+            SQL.identifier(query.table, 'id'))
+
+    @api.model
+    def _get_ledger_lines(self, domain):
+        """
+        Search all the move lines matching the domain in the order of the
+        pages, for the exports to print the lines as they are shown.
+
+        :param domain: The domain of the move lines.
+        :type domain: list
+
+        :return: The move lines, in the order of the ledger.
+        :rtype: account.move.line
+        """
+        move_line = self.env['account.move.line']
+        query = move_line._search(domain)
+        query.order = self._get_ledger_order(query)
+        return move_line.browse(line_id for line_id, in self.env.execute_query(
+            query.select(SQL.identifier(query.table, 'id'))))
+
+    @api.model
+    def _get_ledger_page(self, domain, field_names, after=None, limit=None):
+        """
+        Read a page of the move lines matching the domain in the order of the
+        ledger (date, move_name, id). The page starts after the key of the
+        last line of the previous page: unlike an offset, the key is found
+        with the account_move_line_ledger_page_index index, whatever the
+        number of lines before it. The opening balance of the page is still
+        summed over all the lines of the account before it, so that query
+        grows with the position of the page in the account.
+
+        :param domain: The domain of the move lines, of one account.
+        :type domain: list
+
+        :param field_names: The fields of the move lines to read.
+        :type field_names: list
+
+        :param after: The key [date, move_name, id] of the last line of the
+        previous page, or None for the first page.
+        :type after: list
+
+        :param limit: The number of lines of the page.
+        :type limit: int
+
+        :return: A dictionary with the 'lines' read, each one with its
+        'running_balance', the 'opening_balance' of the page and the key of
+        its last line as 'next' when more lines follow, False otherwise.
+        :rtype: dict
+        """
+        limit = limit or LEDGER_PAGE_SIZE
+        move_line = self.env['account.move.line']
+
+        def line_key(query):
+            return SQL(
+                "(%s, COALESCE(%s, ''), %s)",
+                SQL.identifier(query.table, 'date'),
+                SQL.identifier(query.table, 'move_name'),
+                SQL.identifier(query.table, 'id'))
+
+        query = move_line._search(domain)
+        opening_balance = 0.0
+        if after:
+            after_key = SQL("(%s::date, %s, %s)", *after)
+            balance_query = move_line._search(domain)
+            balance_query.add_where(
+                SQL("%s <= %s", line_key(balance_query), after_key))
+            [(opening_balance,)] = self.env.execute_query(balance_query.select(
+                SQL("COALESCE(SUM(%s - %s), 0)",
+                    SQL.identifier(balance_query.table, 'debit'),
+                    SQL.identifier(balance_query.table, 'credit'))))
+            query.add_where(SQL("%s > %s", line_key(query), after_key))
+        query.order = self._get_ledger_order(query)
+        query.limit = limit + 1
+        line_ids = [line_id for line_id, in self.env.execute_query(
+            query.select(SQL.identifier(query.table, 'id')))]
+        lines = move_line.browse(line_ids[:limit]).read(
+            list(set(field_names) | {'date', 'move_name', 'debit', 'credit'}))
+        balance = opening_balance = float(opening_balance)
+        for line in lines:
+            balance += line['debit'] - line['credit']
+            line['running_balance'] = balance
+        next_key = False
+        if len(line_ids) > limit:
+            last_line = lines[-1]
+            next_key = [fields.Date.to_string(last_line['date']),
+                        last_line['move_name'] or '', last_line['id']]
+        return {
+            'lines': lines,
+            'opening_balance': opening_balance,
+            'next': next_key,
+        }
@@ -22,9 +22,9 @@
 import calendar
 import io
 import json
-from datetime import datetime
 import xlsxwriter
 from odoo import models, fields, api
+from odoo.tools import SQL
 from odoo.tools.date_utils import get_month, get_fiscal_year, \
     get_quarter_number, subtract
 
@@ -46,33 +46,15 @@ class TaxReport(models.TransientModel):
         """
         sale = []
         purchase = []
-        tax_ids = self.env['account.move.line'].search([]).mapped(
-            'tax_ids')
-        today = fields.Date.today()
-        for tax in tax_ids:
-            tax_id = self.env['account.move.line'].search(
-                [('tax_ids', '=', tax.id), ('parent_state', '=', 'posted'),
-                 ('date', '>=', get_month(today)[0]),
-                 ('date', '<=', get_month(today)[1])]).read(
-                ['debit', 'credit'])
-            tax_debit_sums = sum(record['debit'] for record in tax_id)
-            tax_credit_sums = sum(record['credit'] for record in tax_id)
+        tax_nets = {}
+        for tax, account, nets, count in self._get_tax_totals(
+                ['posted'], [get_month(fields.Date.today())]):
+            tax_nets[tax] = tax_nets.get(tax, 0.0) + nets[0]
+        for tax, net in tax_nets.items():
             if tax.type_tax_use == 'sale':
-                sale.append({
-                    'name': tax.name,
-                    'amount': tax.amount,
-                    'net': round(tax_debit_sums + tax_credit_sums, 2),
-                    'tax': round((tax_debit_sums + tax_credit_sums) * (
-                            tax.amount / 100), 2)
-                })
+                sale.append(self._get_tax_row(tax, [net]))
             elif tax.type_tax_use == 'purchase':
-                purchase.append({
-                    'name': tax.name,
-                    'amount': tax.amount,
-                    'net': round(tax_debit_sums + tax_credit_sums, 2),
-                    'tax': round((tax_debit_sums + tax_credit_sums) * (
-                            tax.amount / 100), 2)
-                })
+                purchase.append(self._get_tax_row(tax, [net]))
         return {
             'sale': sale,
             'purchase': purchase
@@ -96,504 +78,155 @@ class TaxReport(models.TransientModel):
         sale = []
         purchase = []
         dynamic_date_num = {}
-        if options == {}:
-            options = None
-        if options is None:
-            option_domain = ['posted']
-        elif 'draft' in options:
-            option_domain = ['posted', 'draft']
-        tax_ids = self.env['account.move.line'].search([]).mapped(
-            'tax_ids')
-        start_date_first = \
-            get_fiscal_year(datetime.strptime(start_date, "%Y-%m-%d").date())[
-                0] if comparison_type == 'year' else datetime.strptime(
-                start_date, "%Y-%m-%d").date()
-        end_date_first = \
-            get_fiscal_year(datetime.strptime(end_date, "%Y-%m-%d").date())[
-                1] if comparison_type == 'year' else datetime.strptime(
-                end_date, "%Y-%m-%d").date()
-        if report_type is not None and 'account' in report_type:
-            start_date = start_date_first
-            end_date = end_date_first
-            account_ids = self.env['account.move.line'].search([]).mapped(
-                'account_id')
-            for account in account_ids:
-                tax_ids = self.env['account.move.line'].search(
-                    [('account_id', '=', account.id)]).mapped('tax_ids')
-                if tax_ids:
-                    for tax in tax_ids:
-                        dynamic_total_tax_sum = {}
-                        dynamic_total_net_sum = {}
-                        if comparison_number:
-                            if comparison_type == 'year':
-                                start_date = start_date_first
-                                end_date = end_date_first
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              years=i)
-                                    com_end_date = subtract(end_date, years=i)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('date', '<=', com_end_date),
-                                         ('account_id', '=', account.id),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                            elif comparison_type == 'month':
-                                dynamic_date_num[
-                                    f"dynamic_date_num{0}"] = self.get_month_name(
-                                    start_date) + ' ' + str(start_date.year)
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              months=i)
-                                    com_end_date = subtract(end_date, months=i)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('account_id', '=', account.id),
-                                         ('date', '<=', com_end_date),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                                    dynamic_date_num[
-                                        f"dynamic_date_num{i}"] = self.get_month_name(
-                                        com_start_date) + ' ' + str(
-                                        com_start_date.year)
-                            elif comparison_type == 'quarter':
-                                dynamic_date_num[
-                                    f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                                    get_quarter_number(
-                                        start_date)) + ' ' + str(
-                                    start_date.year)
-                                for i in range(1, eval(comparison_number) + 1):
-                                    com_start_date = subtract(start_date,
-                                                              months=i * 3)
-                                    com_end_date = subtract(end_date,
-                                                            months=i * 3)
-                                    tax_id = self.env[
-                                        'account.move.line'].search(
-                                        [('tax_ids', '=', tax.id),
-                                         ('date', '>=', com_start_date),
-                                         ('account_id', '=', account.id),
-                                         ('date', '<=', com_end_date),
-                                         ('parent_state', 'in',
-                                          option_domain)]).read(
-                                        ['debit', 'credit'])
-                                    tax_debit_sums = sum(
-                                        record['debit'] for record in tax_id)
-                                    tax_credit_sums = sum(
-                                        record['credit'] for record in tax_id)
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                    dynamic_total_tax_sum[
-                                        f"dynamic_total_tax_sum{i}"] = \
-                                        dynamic_total_net_sum[
-                                            f"dynamic_total_net_sum{i}"] * (
-                                                tax.amount / 100)
-                                    dynamic_date_num[
-                                        f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                        get_quarter_number(
-                                            com_start_date)) + ' ' + str(
-                                        com_start_date.year)
-                        tax_id = self.env['account.move.line'].search(
-                            [('tax_ids', '=', tax.id),
-                             ('date', '>=', start_date_first),
-                             ('date', '<=', end_date_first),
-                             ('parent_state', 'in', option_domain),
-                             ('account_id', '=', account.id)]).read(
-                            ['debit', 'credit'])
-                        tax_debit_sums = sum(
-                            record['debit'] for record in tax_id)
-                        tax_credit_sums = sum(
-                            record['credit'] for record in tax_id)
-                        if tax_id and tax.type_tax_use == 'sale':
-                            if comparison_number:
-                                sale.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'dynamic net': dynamic_total_net_sum,
-                                    'dynamic tax': dynamic_total_tax_sum,
-                                    'account': account.display_name,
-                                })
-                            else:
-                                sale.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'account': account.display_name,
-                                })
-                        elif tax_id and tax.type_tax_use == 'purchase':
-                            if comparison_number:
-                                purchase.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'dynamic net': dynamic_total_net_sum,
-                                    'dynamic tax': dynamic_total_tax_sum,
-                                    'account': account.display_name,
-                                })
-                            else:
-                                purchase.append({
-                                    'name': tax.name,
-                                    'amount': tax.amount,
-                                    'net': round(
-                                        tax_debit_sums + tax_credit_sums,
-                                        2),
-                                    'tax': round(
-                                        (tax_debit_sums + tax_credit_sums) * (
-                                                tax.amount / 100), 2),
-                                    'account': account.display_name,
-                                })
-        elif report_type is not None and 'tax' in report_type:
-            start_date = start_date_first
-            end_date = end_date_first
-            for tax in tax_ids:
-                account_ids = self.env['account.move.line'].search(
-                    [('tax_ids', '=', tax.id)]).mapped('account_id')
-                for account in account_ids:
-                    dynamic_total_tax_sum = {}
-                    dynamic_total_net_sum = {}
-                    if comparison_number:
-                        if comparison_type == 'year':
-                            start_date = start_date_first
-                            end_date = end_date_first
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date,
-                                                          years=i)
-                                com_end_date = subtract(end_date, years=i)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                        elif comparison_type == 'month':
-                            dynamic_date_num[
-                                f"dynamic_date_num{0}"] = self.get_month_name(
-                                start_date) + ' ' + str(start_date.year)
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date, months=i)
-                                com_end_date = subtract(end_date, months=i)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                                dynamic_date_num[
-                                    f"dynamic_date_num{i}"] = self.get_month_name(
-                                    com_start_date) + ' ' + str(
-                                    com_start_date.year)
-                        elif comparison_type == 'quarter':
-                            dynamic_date_num[
-                                f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                                get_quarter_number(start_date)) + ' ' + str(
-                                start_date.year)
-                            for i in range(1, eval(comparison_number) + 1):
-                                com_start_date = subtract(start_date,
-                                                          months=i * 3)
-                                com_end_date = subtract(end_date,
-                                                        months=i * 3)
-                                tax_id = self.env[
-                                    'account.move.line'].search(
-                                    [('tax_ids', '=', tax.id),
-                                     ('date', '>=', com_start_date),
-                                     ('date', '<=', com_end_date),
-                                     ('account_id', '=', account.id),
-                                     ('parent_state', 'in',
-                                      option_domain)]).read(
-                                    ['debit', 'credit'])
-                                tax_debit_sums = sum(
-                                    record['debit'] for record in tax_id)
-                                tax_credit_sums = sum(
-                                    record['credit'] for record in tax_id)
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                                dynamic_total_tax_sum[
-                                    f"dynamic_total_tax_sum{i}"] = \
-                                    dynamic_total_net_sum[
-                                        f"dynamic_total_net_sum{i}"] * (
-                                            tax.amount / 100)
-                                dynamic_date_num[
-                                    f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                    get_quarter_number(
-                                        com_start_date)) + ' ' + str(
-                                    com_start_date.year)
-                    tax_id = self.env['account.move.line'].search(
-                        [('tax_ids', '=', tax.id),
-                         ('parent_state', 'in', option_domain),
-                         ('date', '>=', start_date_first),
-                         ('date', '<=', end_date_first),
-                         ('account_id', '=', account.id)]).read(
-                        ['debit', 'credit'])
-                    tax_debit_sums = sum(
-                        record['debit'] for record in tax_id)
-                    tax_credit_sums = sum(
-                        record['credit'] for record in tax_id)
-                    if tax_id and tax.type_tax_use == 'sale':
-                        if comparison_number:
-                            sale.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'dynamic net': dynamic_total_net_sum,
-                                'dynamic tax': dynamic_total_tax_sum,
-                                'account': account.display_name,
-                            })
-                        else:
-                            sale.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'account': account.display_name,
-                            })
-                    elif tax_id and tax.type_tax_use == 'purchase':
-                        if comparison_number:
-                            purchase.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'dynamic net': dynamic_total_net_sum,
-                                'dynamic tax': dynamic_total_tax_sum,
-                                'account': account.display_name,
-                            })
-                        else:
-                            purchase.append({
-                                'name': tax.name,
-                                'amount': tax.amount,
-                                'net': round(tax_debit_sums + tax_credit_sums,
-                                             2),
-                                'tax': round(
-                                    (tax_debit_sums + tax_credit_sums) * (
-                                            tax.amount / 100), 2),
-                                'account': account.display_name,
-                            })
+        option_domain = ['posted', 'draft'] if options and 'draft' in options \
+            else ['posted']
+        start_date = fields.Date.to_date(start_date)
+        end_date = fields.Date.to_date(end_date)
+        if comparison_type == 'year':
+            start_date = get_fiscal_year(start_date)[0]
+            end_date = get_fiscal_year(end_date)[1]
+        comparison_number = int(comparison_number or 0)
+
+        def shift(date, number):
+            if comparison_type == 'month':
+                return subtract(date, months=number)
+            if comparison_type == 'year':
+                return subtract(date, years=number)
+            return subtract(date, months=number * 3)
+
+        def period_name(date):
+            if comparison_type == 'month':
+                return self.get_month_name(date) + ' ' + str(date.year)
+            return 'Q' + ' ' + str(get_quarter_number(date)) + ' ' + str(
+                date.year)
+
+        periods = [(start_date, end_date)] + [
+            (shift(start_date, number), shift(end_date, number))
+            for number in range(1, comparison_number + 1)]
+        if comparison_number and comparison_type in ('month', 'quarter'):
+            dynamic_date_num['dynamic_date_num0'] = period_name(start_date)
+            for number in range(1, comparison_number + 1):
+                dynamic_date_num[f'dynamic_date_num{number}'] = period_name(
+                    periods[number][0])
+        totals = self._get_tax_totals(option_domain, periods)
+        if report_type is not None and (
+                'account' in report_type or 'tax' in report_type):
+            if 'account' in report_type:
+                totals.sort(key=lambda total: (
+                    total[1].code or '', total[1].id, total[0].sequence,
+                    total[0].id))
+            rows = [(tax, nets, account.display_name)
+                    for tax, account, nets, count in totals if count]
         else:
-            start_date = start_date_first
-            end_date = end_date_first
-            for tax in tax_ids:
-                dynamic_total_tax_sum = {}
-                dynamic_total_net_sum = {}
-                if comparison_number:
-                    if comparison_type == 'year':
-                        start_date = start_date_first
-                        end_date = end_date_first
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date,
-                                                      years=i)
-                            com_end_date = subtract(end_date, years=i)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                    elif comparison_type == 'month':
-                        dynamic_date_num[
-                            f"dynamic_date_num{0}"] = self.get_month_name(
-                            start_date) + ' ' + str(start_date.year)
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date, months=i)
-                            com_end_date = subtract(end_date, months=i)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                            dynamic_date_num[
-                                f"dynamic_date_num{i}"] = self.get_month_name(
-                                com_start_date) + ' ' + str(
-                                com_start_date.year)
-                    elif comparison_type == 'quarter':
-                        dynamic_date_num[
-                            f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                            get_quarter_number(start_date)) + ' ' + str(
-                            start_date.year)
-                        for i in range(1, eval(comparison_number) + 1):
-                            com_start_date = subtract(start_date,
-                                                      months=i * 3)
-                            com_end_date = subtract(end_date,
-                                                    months=i * 3)
-                            tax_id = self.env[
-                                'account.move.line'].search(
-                                [('tax_ids', '=', tax.id),
-                                 ('date', '>=', com_start_date),
-                                 ('date', '<=', com_end_date),
-                                 ('parent_state', 'in', option_domain)]).read(
-                                ['debit', 'credit'])
-                            tax_debit_sums = sum(
-                                record['debit'] for record in tax_id)
-                            tax_credit_sums = sum(
-                                record['credit'] for record in tax_id)
-                            dynamic_total_net_sum[
-                                f"dynamic_total_net_sum{i}"] = tax_debit_sums + tax_credit_sums
-                            dynamic_total_tax_sum[
-                                f"dynamic_total_tax_sum{i}"] = \
-                                dynamic_total_net_sum[
-                                    f"dynamic_total_net_sum{i}"] * (
-                                        tax.amount / 100)
-                            dynamic_date_num[
-                                f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                                get_quarter_number(
-                                    com_start_date)) + ' ' + str(
-                                com_start_date.year)
-                tax_id = self.env['account.move.line'].search(
-                    [('tax_ids', '=', tax.id),
-                     ('parent_state', 'in', option_domain),
-                     ('date', '>=', start_date_first),
-                     ('date', '<=', end_date_first)]).read(['debit', 'credit'])
-                tax_debit_sums = sum(record['debit'] for record in tax_id)
-                tax_credit_sums = sum(record['credit'] for record in tax_id)
-                if tax.type_tax_use == 'sale':
-                    if comparison_number:
-                        sale.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                            'dynamic net': dynamic_total_net_sum,
-                            'dynamic tax': dynamic_total_tax_sum,
-                        })
-                    else:
-                        sale.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                        })
-                elif tax.type_tax_use == 'purchase':
-                    if comparison_number:
-                        purchase.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                            'dynamic net': dynamic_total_net_sum,
-                            'dynamic tax': dynamic_total_tax_sum,
-                        })
-                    else:
-                        purchase.append({
-                            'name': tax.name,
-                            'amount': tax.amount,
-                            'net': round(tax_debit_sums + tax_credit_sums, 2),
-                            'tax': round((tax_debit_sums + tax_credit_sums) * (
-                                    tax.amount / 100), 2),
-                        })
+            tax_nets = {}
+            for tax, account, nets, count in totals:
+                tax_nets[tax] = [
+                    tax_net + net for tax_net, net in
+                    zip(tax_nets.get(tax, [0.0] * len(periods)), nets)]
+            rows = [(tax, nets, False) for tax, nets in tax_nets.items()]
+        for tax, nets, account_name in rows:
+            row = self._get_tax_row(tax, nets)
+            if account_name:
+                row['account'] = account_name
+            if tax.type_tax_use == 'sale':
+                sale.append(row)
+            elif tax.type_tax_use == 'purchase':
+                purchase.append(row)
         return {
             'dynamic_date_num': dynamic_date_num,
             'sale': sale,
             'purchase': purchase
         }
 
+    @api.model
+    def _get_tax_totals(self, option_domain, periods):
+        """
+        Sum the net amount of the move lines of every tax and account for
+        each period with one grouped query, one conditional aggregate per
+        period. Only the move lines of the periods are read, whatever the
+        size of the ledger.
+
+        :param option_domain: The states of the journal entries to include.
+        :type option_domain: list
+
+        :param periods: The (first date, last date) of the report period,
+        followed by those of the comparison periods.
+        :type periods: list
+
+        :return: A list of (tax, account, [net amount of each period], number
+        of lines in the report period) tuples, in the order of the taxes.
+        :rtype: list
+        """
+        move_line = self.env['account.move.line']
+        query = move_line._search([
+            ('parent_state', 'in', option_domain),
+            ('date', '>=', min(date_from for date_from, date_to in periods)),
+            ('date', '<=', max(date_to for date_from, date_to in periods))])
+
+        def column(name):
+            return SQL.identifier(query.table, name)
+
+        tax_field = move_line._fields['tax_ids']
+        tax_alias = query.make_alias(query.table, 'tax_ids')
+        query.add_join('JOIN', tax_alias, tax_field.relation, SQL(
+            "%s = %s", SQL.identifier(tax_alias, tax_field.column1),
+            column('id')))
+        tax_column = SQL.identifier(tax_alias, tax_field.column2)
+
+        def in_period(period):
+            return SQL("%s BETWEEN %s AND %s", column('date'), *period)
+
+        aggregates = [
+            SQL("COALESCE(SUM(%s + %s) FILTER (WHERE %s), 0)",
+                column('debit'), column('credit'), in_period(period))
+            for period in periods]
+        aggregates.append(
+            SQL("COUNT(*) FILTER (WHERE %s)", in_period(periods[0])))
+        query.groupby = SQL("%s, %s", tax_column, column('account_id'))
+        rows = self.env.execute_query(
+            query.select(tax_column, column('account_id'), *aggregates))
+        taxes = {tax.id: tax for tax in self.env['account.tax'].browse(
+            {row[0] for row in rows})}
+        accounts = {account.id: account for account in self.env[
+            'account.account'].browse({row[1] for row in rows})}
+        return [
+            (taxes[tax_id], accounts[account_id],
+             [float(net) for net in nets], count)
+            for tax_id, account_id, *nets, count in sorted(
+                rows, key=lambda row: (taxes[row[0]].sequence, row[0],
+                                       row[1]))]
+
+    @api.model
+    def _get_tax_row(self, tax, nets):
+        """
+        Build the line of a tax of the report from its net amounts.
+
+        :param tax: The tax of the line.
+        :type tax: account.tax
+
+        :param nets: The net amount of the report period, followed by those
+        of the comparison periods.
+        :type nets: list
+
+        :return: The name, rate, net and tax amounts of the tax, with those of
+        the comparison periods as 'dynamic net' and 'dynamic tax'.
+        :rtype: dict
+        """
+        row = {
+            'name': tax.name,
+            'amount': tax.amount,
+            'net': round(nets[0], 2),
+            'tax': round(nets[0] * (tax.amount / 100), 2),
+        }
+        if len(nets) > 1:
+            row['dynamic net'] = {
+                f"dynamic_total_net_sum{i}": net
+                for i, net in enumerate(nets[1:], 1)}
+            row['dynamic tax'] = {
+                f"dynamic_total_tax_sum{i}": net * (tax.amount / 100)
+                for i, net in enumerate(nets[1:], 1)}
+        return row
+
     @api.model
     def get_month_name(self, date):
         """
@@ -2,7 +2,7 @@
 const { Component } = owl;
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { useRef, useState } from "@odoo/owl";
+import { onMounted, onPatched, onWillUnmount, useRef, useState } from "@odoo/owl";
 import { BlockUI } from "@web/core/ui/block_ui";
 import { download } from "@web/core/network/download";
 const actionRegistry = registry.category("actions");
@@ -31,10 +31,34 @@ class CashBook extends owl.Component {
             currency: null,
             options: null,
             message_list : [],
+            expanded: {},
+            lines_next: {},
         });
+        this.loadingAccounts = new Set();
+        // load the next page of an expanded account when its last row shows
+        this.loadMoreObserver = new IntersectionObserver((entries) => {
+            for (const entry of entries) {
+                if (entry.isIntersecting) {
+                    this.loadAccountLines(entry.target.dataset.account, true);
+                }
+            }
+        });
+        onMounted(() => this.observeLoadMore());
+        onPatched(() => this.observeLoadMore());
+        onWillUnmount(() => this.loadMoreObserver.disconnect());
         this.load_data(self.initial_render = true);
 
         }
+    formatNumberWithSeparators(number) {
+        const parsedNumber = parseFloat(number);
+        if (isNaN(parsedNumber)) {
+            return "0.00"; // Fallback to 0.00 if the input is invalid
+        }
+        return parsedNumber.toLocaleString('en-US', {
+            minimumFractionDigits: 2,
+            maximumFractionDigits: 2
+        });
+    }
         async load_data() {
         /**
          * Loads the data for the cash book report.
@@ -49,7 +73,7 @@ class CashBook extends owl.Component {
         var action_title = self.props.action.display_name;
         try {
             var self = this;
-            self.state.data = await self.orm.call("cash.book.report", "view_report", []);
+            self.state.data = await self.orm.call("cash.book.report", "view_report", [], {lazy: true});
             for (const index in self.state.data) {
                 const value = self.state.data[index];
                 if (index !== 'move_lines_total' && index !== 'accounts') {
@@ -75,6 +99,48 @@ class CashBook extends owl.Component {
             window.location.href;
         }
     }
+    observeLoadMore() {
+        if (this.tbody.el) {
+            for (const row of this.tbody.el.querySelectorAll('.o_ledger_load_more')) {
+                this.loadMoreObserver.observe(row);
+            }
+        }
+    }
+    filterArgs() {
+        return [this.state.selected_partner, this.state.date_range, this.state.selected_account_list, this.state.options];
+    }
+    async toggleAccount(move_line) {
+        this.state.expanded[move_line] = !this.state.expanded[move_line];
+        if (this.state.expanded[move_line]) {
+            await this.loadAccountLines(move_line);
+        }
+    }
+    async loadAccountLines(move_line, more = false) {
+        /**
+         * Loads the first page of lines of an account, or the next one if
+         * more, keyed by the last line loaded.
+         */
+        const after = this.state.lines_next[move_line];
+        if ((more ? !after : after !== undefined) || this.loadingAccounts.has(move_line)) {
+            return;
+        }
+        this.loadingAccounts.add(move_line);
+        try {
+            const page = await this.orm.call("cash.book.report", "get_account_lines", [this.state.total[move_line]['account_id'], ...this.filterArgs()], {after: after || null});
+            for (const line of page.lines) {
+                line.running_balance_display = this.formatNumberWithSeparators(line.running_balance);
+            }
+            this.state.data[move_line] = [...(more ? this.state.data[move_line] : []), ...page.lines];
+            this.state.lines_next[move_line] = page.next;
+        } finally {
+            this.loadingAccounts.delete(move_line);
+        }
+    }
+    async loadExportData() {
+        // the exports print all the lines, not only the ones loaded
+        const data = await this.orm.call("cash.book.report", "get_filter_values", this.filterArgs());
+        return data;
+    }
     gotoJournalEntry(ev) {
         /**
          * Navigates to the journal entry form view based on the selected event target.
@@ -114,7 +180,7 @@ class CashBook extends owl.Component {
                 'move_lines': self.state.move_line,
                 'filters': this.filter(),
                 'grand_total': totals,
-                'data': self.state.data,
+                'data': await this.loadExportData(),
                 'total': self.state.total,
                 'title': action_title,
                 'report_name': self.props.action.display_name
@@ -194,7 +260,7 @@ class CashBook extends owl.Component {
         }
         var datas = {
             'move_lines': self.state.move_line,
-            'data': self.state.data,
+            'data': await this.loadExportData(),
             'total': self.state.total,
             'title': action_title,
             'filters': this.filter(),
@@ -232,6 +298,8 @@ class CashBook extends owl.Component {
         this.state.move_line = null
         this.state.data = null
         this.state.total = null
+        this.state.expanded = {}
+        this.state.lines_next = {}
         this.state.filter_applied = true;
         let totalDebitSum = 0;
         let totalCreditSum = 0;
@@ -291,7 +359,7 @@ class CashBook extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("cash.book.report", "get_filter_values", [this.state.selected_partner, this.state.date_range, this.state.selected_account_list, this.state.options,]);
+        let filtered_data = await this.orm.call("cash.book.report", "get_filter_values", [this.state.selected_partner, this.state.date_range, this.state.selected_account_list, this.state.options,], {lazy: true});
         for (const [index, value] of Object.entries(filtered_data)) {
             if (index !== 'move_lines_total') {
                 move_line_list.push(index);
@@ -320,14 +388,13 @@ class CashBook extends owl.Component {
          * @param {Event} ev - The event object triggered by the action.
          */
         if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.add('show')
+            for (const move_line of this.state.move_line) {
+                this.state.expanded[move_line] = true
             }
             ev.target.classList.add("selected-filter");
+            await Promise.all(this.state.move_line.map((move_line) => this.loadAccountLines(move_line)));
         } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.remove('show')
-            }
+            this.state.expanded = {}
             ev.target.classList.remove("selected-filter");
         }
     }
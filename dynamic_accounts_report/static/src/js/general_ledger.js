@@ -2,7 +2,7 @@
 const { Component } = owl;
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { useRef, useState } from "@odoo/owl";
+import { onMounted, onPatched, onWillUnmount, useRef, useState } from "@odoo/owl";
 import { BlockUI } from "@web/core/ui/block_ui";
 import { download } from "@web/core/network/download";
 const actionRegistry = registry.category("actions");
@@ -38,9 +38,64 @@ class GeneralLedger extends owl.Component {
             method: {
                         'accural': true
                     },
+            expanded: {},
+            lines_next: {},
         });
+        this.loadingAccounts = new Set();
+        // load the next page of an expanded account when its last row shows
+        this.loadMoreObserver = new IntersectionObserver((entries) => {
+            for (const entry of entries) {
+                if (entry.isIntersecting) {
+                    this.loadAccountLines(entry.target.dataset.account, true);
+                }
+            }
+        });
+        onMounted(() => this.observeLoadMore());
+        onPatched(() => this.observeLoadMore());
+        onWillUnmount(() => this.loadMoreObserver.disconnect());
         this.load_data(self.initial_render = true);
     }
+    observeLoadMore() {
+        if (this.tbody.el) {
+            for (const row of this.tbody.el.querySelectorAll('.o_ledger_load_more')) {
+                this.loadMoreObserver.observe(row);
+            }
+        }
+    }
+    filterArgs() {
+        return [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list, this.state.method];
+    }
+    async toggleAccount(account) {
+        this.state.expanded[account] = !this.state.expanded[account];
+        if (this.state.expanded[account]) {
+            await this.loadAccountLines(account);
+        }
+    }
+    async loadAccountLines(account, more = false) {
+        /**
+         * Loads the first page of lines of an account, or the next one if
+         * more, keyed by the last line loaded.
+         */
+        const after = this.state.lines_next[account];
+        if ((more ? !after : after !== undefined) || this.loadingAccounts.has(account)) {
+            return;
+        }
+        this.loadingAccounts.add(account);
+        try {
+            const page = await this.orm.call("account.general.ledger", "get_account_lines", [this.state.account_total[account]['account_id'], ...this.filterArgs()], {after: after || null});
+            for (const [line] of page.lines) {
+                line.running_balance_display = this.formatNumberWithSeparators(line.running_balance);
+            }
+            this.state.account_data[account] = [...(more ? this.state.account_data[account] : []), ...page.lines];
+            this.state.lines_next[account] = page.next;
+        } finally {
+            this.loadingAccounts.delete(account);
+        }
+    }
+    async loadExportData() {
+        // the exports print all the lines, not only the ones loaded
+        return this.orm.call("account.general.ledger", "get_filter_values", this.filterArgs());
+    }
     formatNumberWithSeparators(number) {
         const parsedNumber = parseFloat(number);
         if (isNaN(parsedNumber)) {
@@ -61,11 +116,11 @@ class GeneralLedger extends owl.Component {
         var action_title = self.props.action.display_name;
         try {
             var self = this;
-            let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [self.state.selected_journal_list, self.state.date_range, self.state.options, self.state.selected_analytic_list,self.state.method]);
+            let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [self.state.selected_journal_list, self.state.date_range, self.state.options, self.state.selected_analytic_list,self.state.method], {lazy: true});
             self.state.journals = filtered_data['journal_ids']
             self.state.analytics = filtered_data['analytic_ids']
             account_totals = filtered_data['account_totals']
-            self.state.account_data = await self.orm.call("account.general.ledger", "view_report", [self.wizard_id, action_title,]);
+            self.state.account_data = await self.orm.call("account.general.ledger", "view_report", [self.wizard_id, action_title,], {lazy: true});
             for (const [index, value] of Object.entries(self.state.account_data)){
                 if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
                     account_list.push(index)
@@ -115,6 +170,7 @@ class GeneralLedger extends owl.Component {
             'currency':this.state.currency  || false,
         }
         var action_title = self.props.action.display_name;
+        const account_data = await this.loadExportData();
         return self.action.doAction({
             'type': 'ir.actions.report',
             'report_type': 'qweb-pdf',
@@ -122,7 +178,7 @@ class GeneralLedger extends owl.Component {
             'report_file': 'dynamic_accounts_report.general_ledger',
             'data': {
                 'account': self.state.account,
-                'account_data': self.state.account_data,
+                'account_data': account_data,
                 'total': self.state.account_total,
                 'title': action_title,
                 'filters': this.filter(),
@@ -144,7 +200,7 @@ class GeneralLedger extends owl.Component {
         var action_title = self.props.action.display_name;
         var datas = {
             'account': self.state.account,
-            'data': self.state.account_data,
+            'data': await this.loadExportData(),
             'total': self.state.account_total,
             'title': action_title,
             'filters': this.filter(),
@@ -197,6 +253,8 @@ class GeneralLedger extends owl.Component {
         this.state.account = null
         this.state.account_data = null
         this.state.account_total = null
+        this.state.expanded = {}
+        this.state.lines_next = {}
         this.state.filter_applied = true;
         if (ev) {
             if (ev.input && ev.input.attributes.placeholder.value == 'Account' && !is_delete) {
@@ -306,7 +364,7 @@ class GeneralLedger extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list,this.state.method]);
+        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list,this.state.method], {lazy: true});
         for (let index in filtered_data) {
              const value = filtered_data[index];
             if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
@@ -331,14 +389,13 @@ class GeneralLedger extends owl.Component {
     }
     async unfoldAll(ev) {
         if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.add('show')
+            for (const account of this.state.account) {
+                this.state.expanded[account] = true
             }
             ev.target.classList.add("selected-filter");
+            await Promise.all(this.state.account.map((account) => this.loadAccountLines(account)));
         } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.remove('show')
-            }
+            this.state.expanded = {}
             ev.target.classList.remove("selected-filter");
         }
     }
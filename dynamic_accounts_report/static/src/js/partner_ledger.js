@@ -370,6 +370,18 @@ class PartnerLedger extends owl.Component {
                     };
                     val.target.classList.add("selected-filter"); // Add class "selected-filter"
                 }
+            } else if (val.target.attributes["data-value"].value === 'unreconciled') {
+                if (val.target.classList.contains("selected-filter")) {
+                    const { unreconciled, ...updatedOptions } = this.state.options;
+                    this.state.options = updatedOptions;
+                    val.target.classList.remove("selected-filter");
+                } else {
+                    this.state.options = {
+                        ...this.state.options,
+                        'unreconciled': true
+                    };
+                    val.target.classList.add("selected-filter");
+                }
             }
         }
         let filtered_data = await this.orm.call("account.partner.ledger", "get_filter_values", [this.state.selected_partner, this.state.date_range, this.state.account, this.state.options,]);
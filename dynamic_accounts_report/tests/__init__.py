@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from . import test_account_general_ledger
+from . import test_account_partner_ledger
+from . import test_account_trial_balance
+from . import test_dynamic_ledger_mixin
+from . import test_tax_report
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from odoo import Command
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+class DynamicAccountsReportCommon(AccountTestInvoicingCommon):
+    """Accounts and partners of their own, for the reports to be checked
+    on journal entries of known dates and amounts"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.misc_journal = cls.company_data['default_journal_misc']
+        cls.receivable = cls.company_data['default_account_receivable']
+        cls.revenue = cls.company_data['default_account_revenue']
+        cls.ledger_account, cls.other_account = cls.env[
+            'account.account'].create([{
+                'name': 'Ledger Test Account',
+                'code': '999001',
+                'account_type': 'asset_current',
+            }, {
+                'name': 'Ledger Other Account',
+                'code': '999002',
+                'account_type': 'asset_current',
+            }])
+        cls.partner_one, cls.partner_two, cls.partner_three = cls.env[
+            'res.partner'].create([
+                {'name': 'Ledger Partner One'},
+                {'name': 'Ledger Partner Two'},
+                {'name': 'Ledger Partner Three'},
+            ])
+
+    @classmethod
+    def _create_entry(cls, entry_date, account, amount, partner=None,
+                      post=True):
+        """Function for creating a journal entry of the amount on the
+        account, debit when positive, against the revenue account
+        @param entry_date: Accounting date of the entry
+        @param account: Account of the amount
+        @param amount: Amount, credit when negative
+        @param partner: Partner of the line of the account
+        @param post: Whether to post the entry
+        @return: The journal entry"""
+        move = cls.env['account.move'].create({
+            'move_type': 'entry',
+            'date': entry_date,
+            'journal_id': cls.misc_journal.id,
+            'line_ids': [
+                Command.create({
+                    'name': 'Report Test',
+                    'account_id': account.id,
+                    'partner_id': partner.id if partner else False,
+                    'debit': max(amount, 0.0),
+                    'credit': max(-amount, 0.0),
+                }),
+                Command.create({
+                    'name': 'Report Test',
+                    'account_id': cls.revenue.id,
+                    'debit': max(-amount, 0.0),
+                    'credit': max(amount, 0.0),
+                }),
+            ],
+        })
+        if post:
+            move.action_post()
+        return move
+
+    @classmethod
+    def _get_account_line(cls, move, account):
+        """Function for finding the line of the account in the entry
+        @param move: The journal entry
+        @param account: The account
+        @return: The move line"""
+        return move.line_ids.filtered(lambda line: line.account_id == account)
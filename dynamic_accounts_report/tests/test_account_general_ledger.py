@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import DynamicAccountsReportCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountGeneralLedger(DynamicAccountsReportCommon):
+    """General ledger data built from the grouped totals and the ordered
+    lines of the accounts"""
+
+    def test_general_ledger_data(self):
+        """The lines of an account are listed in the ledger order with the
+        totals of the account"""
+        self._create_entry(date(2024, 2, 20), self.ledger_account, -30.0)
+        self._create_entry(date(2024, 1, 10), self.ledger_account, 100.0)
+        self._create_entry(date(2024, 2, 5), self.ledger_account, 50.0)
+        self._create_entry(date(2024, 2, 6), self.ledger_account, 999.0,
+                           post=False)
+        data = self.env['account.general.ledger']._get_general_ledger_data(
+            [('account_id', '=', self.ledger_account.id),
+             ('parent_state', '=', 'posted')])
+        name = self.ledger_account.display_name
+        self.assertEqual(
+            [(line['date'], line['debit'], line['credit'])
+             for [line] in data[name]],
+            [(date(2024, 1, 10), 100.0, 0.0),
+             (date(2024, 2, 5), 50.0, 0.0),
+             (date(2024, 2, 20), 0.0, 30.0)])
+        totals = data['account_totals'][name]
+        self.assertEqual(totals['account_id'], self.ledger_account.id)
+        self.assertAlmostEqual(totals['total_debit'], 150.0)
+        self.assertAlmostEqual(totals['total_credit'], 30.0)
+        self.assertIn('journal_ids', data)
+        self.assertIn('analytic_ids', data)
+
+    def test_general_ledger_data_lazy(self):
+        """In lazy mode the accounts come with their totals and number of
+        lines but no lines"""
+        self._create_entry(date(2024, 1, 10), self.ledger_account, 100.0)
+        self._create_entry(date(2024, 2, 5), self.ledger_account, -40.0)
+        data = self.env['account.general.ledger']._get_general_ledger_data(
+            [('account_id', '=', self.ledger_account.id),
+             ('parent_state', '=', 'posted')], lazy=True)
+        name = self.ledger_account.display_name
+        self.assertEqual(data[name], [])
+        totals = data['account_totals'][name]
+        self.assertEqual(totals['line_count'], 2)
+        self.assertAlmostEqual(totals['total_debit'], 100.0)
+        self.assertAlmostEqual(totals['total_credit'], 40.0)
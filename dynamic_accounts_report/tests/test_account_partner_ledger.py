@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import DynamicAccountsReportCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountPartnerLedger(DynamicAccountsReportCommon):
+    """Partner ledger data built from the windowed totals and running
+    balances of the receivable and payable lines"""
+
+    period = {'start_date': '2024-02-01', 'end_date': '2024-02-29'}
+
+    def test_partner_ledger_data(self):
+        """The lines before the period make the initial balance, which
+        opens the running balance of the lines of the period, and a partner
+        with only lines before the period still has its totals"""
+        self._create_entry(date(2024, 1, 10), self.receivable, 100.0,
+                           partner=self.partner_one)
+        self._create_entry(date(2024, 2, 20), self.receivable, -30.0,
+                           partner=self.partner_one)
+        self._create_entry(date(2024, 2, 5), self.receivable, 50.0,
+                           partner=self.partner_one)
+        self._create_entry(date(2024, 3, 1), self.receivable, 500.0,
+                           partner=self.partner_one)
+        self._create_entry(date(2024, 1, 15), self.receivable, 70.0,
+                           partner=self.partner_two)
+        data = self.env['account.partner.ledger'].get_filter_values(
+            [self.partner_one.id, self.partner_two.id], self.period, {}, {})
+        self.assertEqual(
+            [(line['date'], line['debit'], line['credit'],
+              line['running_balance'])
+             for [line] in data[self.partner_one.name]],
+            [(date(2024, 2, 5), 50.0, 0.0, 150.0),
+             (date(2024, 2, 20), 0.0, 30.0, 120.0)])
+        totals = data['partner_totals'][self.partner_one.name]
+        self.assertEqual(totals['partner_id'], self.partner_one.id)
+        self.assertAlmostEqual(totals['initial_debit'], 100.0)
+        self.assertAlmostEqual(totals['initial_credit'], 0.0)
+        self.assertAlmostEqual(totals['initial_balance'], 100.0)
+        self.assertAlmostEqual(totals['total_debit'], 50.0)
+        self.assertAlmostEqual(totals['total_credit'], 30.0)
+        self.assertEqual(data[self.partner_two.name], [])
+        totals = data['partner_totals'][self.partner_two.name]
+        self.assertEqual(totals['partner_id'], self.partner_two.id)
+        self.assertAlmostEqual(totals['initial_balance'], 70.0)
+        self.assertAlmostEqual(totals['total_debit'], 0.0)
+        self.assertAlmostEqual(totals['total_credit'], 0.0)
+
+    def test_partner_ledger_unreconciled(self):
+        """The unreconciled option leaves out the reconciled lines"""
+        invoice = self._create_entry(date(2024, 2, 10), self.receivable,
+                                     40.0, partner=self.partner_three)
+        payment = self._create_entry(date(2024, 2, 12), self.receivable,
+                                     -40.0, partner=self.partner_three)
+        self._create_entry(date(2024, 2, 15), self.receivable, 25.0,
+                           partner=self.partner_three)
+        (self._get_account_line(invoice, self.receivable)
+         + self._get_account_line(payment, self.receivable)).reconcile()
+        partner_ledger = self.env['account.partner.ledger']
+        data = partner_ledger.get_filter_values(
+            [self.partner_three.id], self.period, {}, {})
+        self.assertEqual(len(data[self.partner_three.name]), 3)
+        data = partner_ledger.get_filter_values(
+            [self.partner_three.id], self.period, {}, {'unreconciled': True})
+        self.assertEqual(
+            [(line['date'], line['running_balance'])
+             for [line] in data[self.partner_three.name]],
+            [(date(2024, 2, 15), 25.0)])
+        totals = data['partner_totals'][self.partner_three.name]
+        self.assertAlmostEqual(totals['total_debit'], 25.0)
+        self.assertAlmostEqual(totals['total_credit'], 0.0)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import DynamicAccountsReportCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountTrialBalance(DynamicAccountsReportCommon):
+    """Trial balance totals of the initial, comparison and current periods
+    summed with one grouped query"""
+
+    def setUp(self):
+        super().setUp()
+        self._create_entry(date(2024, 1, 10), self.ledger_account, 100.0)
+        self._create_entry(date(2024, 2, 10), self.ledger_account, 40.0)
+        self._create_entry(date(2024, 3, 5), self.ledger_account, -30.0)
+        self._create_entry(date(2024, 3, 20), self.ledger_account, 500.0,
+                           post=False)
+        self._create_entry(date(2024, 3, 20), self.other_account, 80.0,
+                           post=False)
+
+    def _get_account_rows(self, options):
+        """Function for getting the rows of the test accounts for March 2024
+        compared with the previous month"""
+        rows = self.env['account.trial.balance'].get_filter_values(
+            '2024-03-01', '2024-03-31', '1', 'month', [], [], options, {})
+        return {row['account_id']: row for row in rows
+                if row['account_id'] in (self.ledger_account
+                                         + self.other_account).ids}
+
+    def test_trial_balance_periods(self):
+        """Each period sums the lines of its dates and the end balance nets
+        all of them, while an account without posted lines is still listed
+        with zero totals"""
+        rows = self._get_account_rows({})
+        row = rows[self.ledger_account.id]
+        self.assertEqual(row['account'], self.ledger_account.display_name)
+        self.assertAlmostEqual(row['initial_total_debit'], 100.0)
+        self.assertAlmostEqual(row['initial_total_credit'], 0.0)
+        self.assertAlmostEqual(row['dynamic_total_debit_1'], 40.0)
+        self.assertAlmostEqual(row['dynamic_total_credit_1'], 0.0)
+        self.assertAlmostEqual(row['total_debit'], 0.0)
+        self.assertAlmostEqual(row['total_credit'], 30.0)
+        self.assertAlmostEqual(row['end_total_debit'], 110.0)
+        self.assertAlmostEqual(row['end_total_credit'], 0.0)
+        self.assertEqual(row['dynamic_date_num'], {
+            'dynamic_date_num0': 'Mar 2024',
+            'dynamic_date_num1': 'Feb 2024',
+        })
+        row = rows[self.other_account.id]
+        self.assertAlmostEqual(row['total_debit'], 0.0)
+        self.assertAlmostEqual(row['end_total_debit'], 0.0)
+
+    def test_trial_balance_draft(self):
+        """The draft option adds the lines of the draft entries"""
+        rows = self._get_account_rows({'draft': True})
+        row = rows[self.ledger_account.id]
+        self.assertAlmostEqual(row['total_debit'], 500.0)
+        self.assertAlmostEqual(row['total_credit'], 30.0)
+        self.assertAlmostEqual(row['end_total_debit'], 610.0)
+        self.assertAlmostEqual(rows[self.other_account.id]['total_debit'],
+                               80.0)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import DynamicAccountsReportCommon
+
+
+@tagged('post_install', '-at_install')
+class TestDynamicLedgerMixin(DynamicAccountsReportCommon):
+    """Pages of ledger lines read after the key of the previous page"""
+
+    def setUp(self):
+        super().setUp()
+        self.moves = (
+            self._create_entry(date(2024, 1, 10), self.ledger_account, 100.0)
+            + self._create_entry(date(2024, 1, 10), self.ledger_account, -30.0)
+            + self._create_entry(date(2024, 2, 5), self.ledger_account, 50.0))
+        self.domain = [('account_id', '=', self.ledger_account.id),
+                       ('parent_state', '=', 'posted')]
+
+    def test_ledger_lines_order(self):
+        """The lines are ordered by date, entry number and id"""
+        lines = self.env['dynamic.ledger.mixin']._get_ledger_lines(
+            self.domain)
+        self.assertEqual(
+            [(line.date, line.move_name or '', line.id) for line in lines],
+            sorted((line.date, line.move_name or '', line.id)
+                   for line in lines))
+        self.assertEqual(lines.move_id, self.moves)
+
+    def test_ledger_pages(self):
+        """The running balance goes on from a page to the next one, which
+        opens with the balance of the lines before it"""
+        mixin = self.env['dynamic.ledger.mixin']
+        first_page = mixin._get_ledger_page(self.domain, ['name'], limit=2)
+        self.assertEqual(first_page['opening_balance'], 0.0)
+        self.assertEqual(
+            [line['running_balance'] for line in first_page['lines']],
+            [100.0, 70.0])
+        last_line = first_page['lines'][-1]
+        self.assertEqual(first_page['next'], [
+            '2024-01-10', last_line['move_name'] or '', last_line['id']])
+        second_page = mixin._get_ledger_page(
+            self.domain, ['name'], after=first_page['next'], limit=2)
+        self.assertAlmostEqual(second_page['opening_balance'], 70.0)
+        self.assertEqual(
+            [(line['date'], line['running_balance'])
+             for line in second_page['lines']],
+            [(date(2024, 2, 5), 120.0)])
+        self.assertFalse(second_page['next'])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import tagged
+
+from .common import DynamicAccountsReportCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTaxReport(DynamicAccountsReportCommon):
+    """Tax report nets summed by tax and account for the report period and
+    the comparison periods"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sale_tax, cls.purchase_tax = cls.env['account.tax'].create([{
+            'name': 'Report Sale Tax 10%',
+            'amount': 10.0,
+            'type_tax_use': 'sale',
+        }, {
+            'name': 'Report Purchase Tax 15%',
+            'amount': 15.0,
+            'type_tax_use': 'purchase',
+        }])
+        cls.sale_invoice = cls.init_invoice(
+            'out_invoice', cls.partner_one, '2024-03-10', post=True,
+            amounts=[100.0], taxes=cls.sale_tax)
+        cls.init_invoice('out_invoice', cls.partner_one, '2024-02-10',
+                         post=True, amounts=[200.0], taxes=cls.sale_tax)
+        cls.init_invoice('out_invoice', cls.partner_one, '2024-03-15',
+                         amounts=[1000.0], taxes=cls.sale_tax)
+        cls.purchase_invoice = cls.init_invoice(
+            'in_invoice', cls.partner_two, '2024-03-12', post=True,
+            amounts=[300.0], taxes=cls.purchase_tax)
+
+    def _get_tax_rows(self, options=None, report_type=None):
+        """Function for getting the rows of the test taxes for March 2024
+        compared with the previous month, by type of tax"""
+        values = self.env['tax.report'].get_filter_values(
+            '2024-03-01', '2024-03-31', '1', 'month', options, report_type)
+        names = (self.sale_tax + self.purchase_tax).mapped('name')
+        return values, {
+            tax_type: [row for row in values[tax_type]
+                       if row['name'] in names]
+            for tax_type in ('sale', 'purchase')}
+
+    def test_tax_report_periods(self):
+        """The nets and taxes of each tax are summed over the posted lines
+        of each period"""
+        values, rows = self._get_tax_rows()
+        self.assertEqual(values['dynamic_date_num'], {
+            'dynamic_date_num0': 'Mar 2024',
+            'dynamic_date_num1': 'Feb 2024',
+        })
+        [sale_row] = rows['sale']
+        self.assertEqual(sale_row['name'], self.sale_tax.name)
+        self.assertAlmostEqual(sale_row['net'], 100.0)
+        self.assertAlmostEqual(sale_row['tax'], 10.0)
+        self.assertAlmostEqual(
+            sale_row['dynamic net']['dynamic_total_net_sum1'], 200.0)
+        self.assertAlmostEqual(
+            sale_row['dynamic tax']['dynamic_total_tax_sum1'], 20.0)
+        [purchase_row] = rows['purchase']
+        self.assertAlmostEqual(purchase_row['net'], 300.0)
+        self.assertAlmostEqual(purchase_row['tax'], 45.0)
+        self.assertAlmostEqual(
+            purchase_row['dynamic net']['dynamic_total_net_sum1'], 0.0)
+
+    def test_tax_report_draft(self):
+        """The draft option adds the lines of the draft invoices"""
+        values, rows = self._get_tax_rows(options={'draft': True})
+        [sale_row] = rows['sale']
+        self.assertAlmostEqual(sale_row['net'], 1100.0)
+        self.assertAlmostEqual(sale_row['tax'], 110.0)
+
+    def test_tax_report_accounts(self):
+        """Grouped by account, each tax is listed with the account of its
+        base lines of the report period"""
+        values, rows = self._get_tax_rows(report_type={'account': True})
+        [sale_row] = rows['sale']
+        self.assertEqual(
+            sale_row['account'],
+            self.sale_invoice.invoice_line_ids.account_id.display_name)
+        self.assertAlmostEqual(sale_row['net'], 100.0)
+        [purchase_row] = rows['purchase']
+        self.assertEqual(
+            purchase_row['account'],
+            self.purchase_invoice.invoice_line_ids.account_id.display_name)
+        self.assertAlmostEqual(purchase_row['net'], 300.0)
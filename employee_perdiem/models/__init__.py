@@ -3,3 +3,4 @@
 from . import perdiem_config
 from . import employee_perdiem
 from . import hr_contract
+from . import hr_payslip
@@ -9,6 +9,15 @@ class HrContract(models.Model):
     def get_perdiem_amount(self, date_from, date_to):
         """Calculate total per diem amount for payroll period"""
         self.ensure_one()
+        entries = self._get_payroll_prefetch_entries(
+            'perdiem', date_from, date_to)
+        if entries is not None:
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+            return sum(value for request_id, start_date, end_date, value
+                       in entries
+                       if date_from <= start_date <= date_to
+                       or date_from <= end_date <= date_to)
         
         # Search for approved per diem requests within the payroll period
         perdiem_requests = self.env['employee.perdiem'].search([
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models
+
+
+class HrPayslip(models.Model):
+    _inherit = 'hr.payslip'
+
+    def _get_payroll_prefetch(self):
+        """Add the approved per diem requests of the employees over the
+        period, as (id, start date, end date, value) by employee, read by
+        hr.contract.get_perdiem_amount"""
+        prefetch = super()._get_payroll_prefetch()
+        if not self:
+            return prefetch
+        date_from = prefetch['date_from']
+        date_to = prefetch['date_to']
+        perdiem_requests = self.env['employee.perdiem'].search_fetch([
+            ('employee_id', 'in', self.employee_id.ids),
+            ('state', '=', 'approved'),
+            ('company_id', 'in', self.env.companies.ids),
+            '|',
+            '&', ('start_date', '>=', date_from), ('start_date', '<=', date_to),
+            '&', ('end_date', '>=', date_from), ('end_date', '<=', date_to),
+        ], ['employee_id', 'start_date', 'end_date', 'perdiem_value'])
+        prefetch['perdiem'] = defaultdict(list)
+        for request in perdiem_requests:
+            prefetch['perdiem'][request.employee_id.id].append((
+                request.id, request.start_date, request.end_date,
+                request.perdiem_value))
+        return prefetch
+
+    def _get_fingerprint_data(self, contracts_by_payslip, rules_by_payslip):
+        """Add the approved per diem requests of the period, which the
+        salary rules get through hr.contract.get_perdiem_amount"""
+        data = super()._get_fingerprint_data(contracts_by_payslip,
+                                             rules_by_payslip)
+        if not self:
+            return data
+        prefetch = self.env.context.get('payroll_prefetch') or \
+            self._get_payroll_prefetch()
+        for payslip in self:
+            data[payslip.id].append(sorted(
+                (request_id, value)
+                for request_id, start_date, end_date, value
+                in prefetch['perdiem'].get(payslip.employee_id.id, [])
+                if payslip.date_from <= start_date <= payslip.date_to
+                or payslip.date_from <= end_date <= payslip.date_to))
+        return data
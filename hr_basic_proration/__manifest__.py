@@ -10,6 +10,7 @@
     "data": [
         "security/ir.model.access.csv",
         "data/salary_rules.xml",
+        "views/res_company_views.xml",
     ],
     "installable": True,
     "application": False,
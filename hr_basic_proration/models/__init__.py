@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from . import hr_contract
+from . import hr_working_days
+from . import res_company
+from . import resource_calendar_leaves
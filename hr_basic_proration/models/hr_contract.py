@@ -10,29 +10,13 @@ class Contract(models.Model):
 
     def _count_working_days_excluding_sunday(self, start_date, end_date):
         """
-        Count days between start_date and end_date (inclusive) excluding Sundays.
+        Count working days between start_date and end_date (inclusive),
+        excluding the weekly rest days (Sundays by default) and public
+        holidays of the company of the contract.
         Accepts either date or string in 'YYYY-MM-DD'. Returns integer.
         """
-        if not start_date or not end_date:
-            return 0
-        
-        # normalize to date objects
-        if isinstance(start_date, str):
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        if isinstance(end_date, str):
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        
-        if start_date > end_date:
-            return 0
-        
-        days = 0
-        cur = start_date
-        while cur <= end_date:
-            # Monday=0 ... Sunday=6
-            if cur.weekday() != 6:  # Exclude Sunday
-                days += 1
-            cur += timedelta(days=1)
-        return days
+        return self.env['hr.working.days'].count_working_days(
+            start_date, end_date, company=self.company_id[:1] or None)
 
     def _prorated_basic(self, payslip_date_from, payslip_date_to):
         """
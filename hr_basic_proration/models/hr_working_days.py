@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+import pytz
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, tools
+
+
+class HrWorkingDays(models.AbstractModel):
+    _name = 'hr.working.days'
+    _description = 'Working Days Counting'
+
+    @api.model
+    def count_working_days(self, date_from, date_to, company=None):
+        """
+        Count the working days between date_from and date_to (inclusive):
+        the days which are neither a weekly rest day nor a public holiday of
+        the company. Accepts either date or string in 'YYYY-MM-DD'.
+        Returns integer.
+        """
+        if not date_from or not date_to:
+            return 0
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if date_from > date_to:
+            return 0
+        company = company or self.env.company
+        rest_days = company._get_payroll_rest_days()
+
+        # whole weeks, then the remaining days (less than a week)
+        weeks, remainder = divmod((date_to - date_from).days + 1, 7)
+        days = weeks * (7 - len(rest_days))
+        weekday = date_from.weekday()
+        days += sum(1 for offset in range(remainder)
+                    if (weekday + offset) % 7 not in rest_days)
+
+        # public holidays falling on working days, month by month
+        month = date_from.replace(day=1)
+        while month <= date_to:
+            holidays = self._get_month_holidays(company.id, month)
+            days -= bisect_right(holidays, date_to) - bisect_left(
+                holidays, date_from)
+            month += relativedelta(months=1)
+        return days
+
+    @api.model
+    @tools.ormcache('company_id', 'month')
+    def _get_month_holidays(self, company_id, month):
+        """
+        Sorted tuple of the public holidays of the company in the month
+        starting on the given date, the weekly rest days excluded.
+        """
+        company = self.env['res.company'].browse(company_id)
+        rest_days = company._get_payroll_rest_days()
+        calendar = company.resource_calendar_id
+        tz = pytz.timezone(calendar.tz or 'UTC')
+        month_end = month + relativedelta(months=1, days=-1)
+        # the leaves are stored in UTC, take a day of margin on both sides
+        leaves = self.env['resource.calendar.leaves'].sudo().search_fetch([
+            ('resource_id', '=', False),
+            ('company_id', 'in', [company_id, False]),
+            ('calendar_id', 'in', [calendar.id, False]),
+            ('date_from', '<=', datetime.combine(month_end, time.max)
+             + timedelta(days=1)),
+            ('date_to', '>=', datetime.combine(month, time.min)
+             - timedelta(days=1)),
+        ], ['date_from', 'date_to'])
+        holidays = set()
+        for leave in leaves:
+            day = pytz.utc.localize(leave.date_from).astimezone(tz).date()
+            # a leave ending at midnight does not cover the next day
+            last_day = max(day, (pytz.utc.localize(leave.date_to).astimezone(
+                tz) - timedelta(seconds=1)).date())
+            while day <= last_day:
+                if month <= day <= month_end \
+                        and day.weekday() not in rest_days:
+                    holidays.add(day)
+                day += timedelta(days=1)
+        return tuple(sorted(holidays))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from odoo import _, api, fields, models
+from odoo.exceptions import ValidationError
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    payroll_rest_days = fields.Char(
+        string='Weekly Rest Days',
+        default='6',
+        help="Days of the week which are not worked, used to prorate the "
+             "basic salary: comma separated numbers from 0 for Monday to 6 "
+             "for Sunday.")
+
+    @api.constrains('payroll_rest_days')
+    def _check_payroll_rest_days(self):
+        weekdays = {str(weekday) for weekday in range(7)}
+        for company in self:
+            if company.payroll_rest_days and any(
+                    day.strip() not in weekdays
+                    for day in company.payroll_rest_days.split(',')):
+                raise ValidationError(_(
+                    'The weekly rest days must be comma separated numbers '
+                    'from 0 (Monday) to 6 (Sunday).'))
+
+    def _get_payroll_rest_days(self):
+        """Set of the weekdays (Monday=0 ... Sunday=6) which are not worked"""
+        self.ensure_one()
+        return frozenset(int(day) for day in
+                         (self.payroll_rest_days or '').split(',')
+                         if day.strip())
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'payroll_rest_days' in vals:
+            # the cached public holidays exclude the rest days
+            self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, models
+
+
+class ResourceCalendarLeaves(models.Model):
+    _inherit = 'resource.calendar.leaves'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leaves = super().create(vals_list)
+        leaves._clear_holidays_cache()
+        return leaves
+
+    def write(self, vals):
+        self._clear_holidays_cache()
+        res = super().write(vals)
+        self._clear_holidays_cache()
+        return res
+
+    def unlink(self):
+        self._clear_holidays_cache()
+        return super().unlink()
+
+    def _clear_holidays_cache(self):
+        """The public holidays counted by hr.working.days are cached"""
+        if any(not leave.resource_id for leave in self):
+            self.env.registry.clear_cache()
@@ -41,6 +41,7 @@
         'security/hr_payroll_community_security.xml',
         'security/ir.model.access.csv',
         'data/ir_sequence_data.xml',
+        'data/ir_cron_data.xml',
         'data/hr_payroll_community_data.xml',
         'wizard/hr_payslips_employees_views.xml',
         'wizard/payslip_lines_contribution_register_views.xml',
@@ -57,6 +58,7 @@
         'views/hr_payslip_views.xml',
         'views/hr_payslip_line_views.xml',
         'views/hr_employee_views.xml',
+        'views/hr_payslip_rule_profile_report_views.xml',
         'views/hr_payslip_run_views.xml',
         'views/res_config_settings_views.xml',
     ],
@@ -27,10 +27,14 @@ from . import hr_employee
 from . import hr_leave_type
 from . import hr_payroll_structure
 from . import hr_payslip
+from . import hr_payslip_aggregate
 from . import hr_payslip_input
 from . import hr_salary_rule
 from . import hr_payslip_line
 from . import hr_payslip_run
+from . import hr_payslip_run_chunk
+from . import hr_payslip_rule_profile
+from . import hr_payslip_rule_profile_report
 from . import hr_payslip_worked_days
 from . import hr_rule_input
 from . import hr_salary_rule_category
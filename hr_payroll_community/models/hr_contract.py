@@ -20,7 +20,7 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import fields, models
+from odoo import fields, models, tools
 
 
 class HrContract(models.Model):
@@ -68,6 +68,13 @@ class HrContract(models.Model):
     other_allowance = fields.Monetary(string="Other Allowance",
                                       help="Other allowances")
 
+    def init(self):
+        """Index the contracts on the columns used to find the contracts
+        of the employees for a payroll period"""
+        tools.create_index(self._cr, 'hr_contract_employee_state_dates_index',
+                           self._table, ['employee_id', 'state', 'date_start',
+                                         'date_end'])
+
     def get_all_structures(self):
         """
         @return: the structures linked to the given contracts, ordered by
@@ -95,3 +102,22 @@ class HrContract(models.Model):
                 contract[code] = value
             else:
                 contract[code] = 0.0
+
+    def _get_payroll_prefetch_entries(self, source, date_from, date_to):
+        """
+        @param source: key of the data in the payroll prefetch
+        @param date_from: start date of the period asked by the salary rule
+        @param date_to: end date of the period asked by the salary rule
+        @return: returns the entries of the source prefetched for the
+        employee of the contract, or None when the payroll prefetch of the
+        context does not cover the source, the employee or the period
+        """
+        self.ensure_one()
+        prefetch = self.env.context.get('payroll_prefetch')
+        if not prefetch or source not in prefetch \
+                or self.employee_id.id not in prefetch['employee_ids']:
+            return None
+        if not (prefetch['date_from'] <= fields.Date.to_date(date_from)
+                and fields.Date.to_date(date_to) <= prefetch['date_to']):
+            return None
+        return prefetch[source].get(self.employee_id.id, [])
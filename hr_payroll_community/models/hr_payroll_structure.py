@@ -20,7 +20,7 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 
 
@@ -77,6 +77,21 @@ class HrPayrollStructure(models.Model):
         default = dict(default or {}, code=_("%s (copy)") % (self.code))
         return super(HrPayrollStructure, self).copy(default)
 
+    def write(self, vals):
+        """Drop the cached rule plans when the rules or the parents of a
+        structure change"""
+        res = super(HrPayrollStructure, self).write(vals)
+        if any(fname in vals
+               for fname in ('rule_ids', 'parent_id', 'children_ids')):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        """Drop the cached rule plans when a structure is deleted"""
+        res = super(HrPayrollStructure, self).unlink()
+        self.env.registry.clear_cache()
+        return res
+
     def get_all_rules(self):
         """
         @return: returns a list of tuple (id, sequence) of rules that are maybe
@@ -87,6 +102,26 @@ class HrPayrollStructure(models.Model):
             all_rules += struct.rule_ids._recursive_search_of_rules()
         return all_rules
 
+    @api.model
+    @tools.ormcache('structure_ids')
+    def _get_rule_plan(self, structure_ids):
+        """
+        @param structure_ids: tuple of ids of structures
+        @return: returns a tuple (rule_ids, descendants) where rule_ids are
+        the ids of the rules of the structures and their children sorted by
+        sequence, and descendants maps each rule id to the set of the ids of
+        the rule and all its children
+        """
+        rule_ids = self.browse(structure_ids).get_all_rules()
+        sorted_rule_ids = tuple(id for id, sequence in
+                                sorted(rule_ids, key=lambda x: x[1]))
+        descendants = {}
+        for rule in self.env['hr.salary.rule'].browse(sorted_rule_ids):
+            if rule.id not in descendants:
+                descendants[rule.id] = frozenset(
+                    id for id, sequence in rule._recursive_search_of_rules())
+        return sorted_rule_ids, tools.frozendict(descendants)
+
     def _get_parent_structure(self):
         """Function for getting Parent Structure"""
         parent = self.mapped('parent_id')
@@ -20,15 +20,118 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+import hashlib
+from collections import Counter, defaultdict
 from datetime import date, datetime, time
+from time import perf_counter
 from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
 from pytz import timezone
 import babel
 
 # This will generate 16th of days
 ROUNDING_FACTOR = 16
+# Number of payslips whose lines are computed and stored together
+PAYSLIP_COMPUTE_BATCH_SIZE = 500
+
+
+class PayslipAggregates(object):
+    """Class for the sums of the done payslips of a set of employees, read
+    from the payslip aggregates once by code for all the employees"""
+
+    def __init__(self, env, employee_ids):
+        """Function for getting env and the ids of the employees"""
+        self.env = env
+        self.employee_ids = tuple(employee_ids)
+        self.sums = {}
+
+    def sum(self, kind, employee_id, code, from_date, to_date=None):
+        """Function for getting the amount, number of days and number of
+        hours of the done payslips of the employee with respect to
+        from_date,to_date fields"""
+        if to_date is None:
+            to_date = fields.Date.today()
+        from_date = fields.Date.to_date(from_date)
+        to_date = fields.Date.to_date(to_date)
+        if employee_id in self.employee_ids:
+            if (kind, code) not in self.sums:
+                self.sums[kind, code] = self.env[
+                    'hr.payslip.aggregate']._read_sums(
+                    kind, code, self.employee_ids)
+            periods = self.sums[kind, code][employee_id]
+        else:
+            periods = self.env['hr.payslip.aggregate']._read_sums(
+                kind, code, [employee_id])[employee_id]
+        amount = number_of_days = number_of_hours = 0.0
+        for date_start, date_end, *values in periods:
+            if date_start >= from_date and date_end <= to_date:
+                amount += values[0]
+                number_of_days += values[1]
+                number_of_hours += values[2]
+        return amount, number_of_days, number_of_hours
+
+
+class BrowsableObject(object):
+    """Class for Browsable Object"""
+
+    def __init__(self, employee_id, dict, env, aggregates=None):
+        """Function for getting employee_id,dict,env and the aggregates of
+        the done payslips"""
+        self.employee_id = employee_id
+        self.dict = dict
+        self.env = env
+        self.aggregates = aggregates or PayslipAggregates(env, [employee_id])
+
+    def __getattr__(self, attr):
+        """Function for return dict"""
+        return attr in self.dict and self.dict.__getitem__(attr) or 0.0
+
+
+class InputLine(BrowsableObject):
+    """a class that will be used into the python code, mainly for
+    usability purposes"""
+
+    def sum(self, code, from_date, to_date=None):
+        """Function for getting sum of Payslip with respect to
+         from_date,to_date fields"""
+        return self.aggregates.sum('input', self.employee_id, code,
+                                   from_date, to_date)[0]
+
+
+class WorkedDays(BrowsableObject):
+    """a class that will be used into the python code, mainly for
+    usability purposes"""
+
+    def _sum(self, code, from_date, to_date=None):
+        """Function for getting sum of Payslip days with respect to
+         from_date,to_date fields"""
+        return self.aggregates.sum('worked_days', self.employee_id, code,
+                                   from_date, to_date)[1:]
+
+    def sum(self, code, from_date, to_date=None):
+        """Function for getting sum of Payslip with respect to
+         from_date,to_date fields"""
+        res = self._sum(code, from_date, to_date)
+        return res and res[0] or 0.0
+
+    def sum_hours(self, code, from_date, to_date=None):
+        """Function for getting sum of Payslip hours with respect to
+         from_date,to_date fields"""
+        res = self._sum(code, from_date, to_date)
+        return res and res[1] or 0.0
+
+
+class Payslips(BrowsableObject):
+    """a class that will be used into the python code, mainly for
+    usability purposes"""
+
+    def sum(self, code, from_date, to_date=None):
+        """Function for getting sum of Payslip with respect to
+         from_date,to_date fields"""
+        return self.aggregates.sum('line', self.employee_id, code,
+                                   from_date, to_date)[0]
 
 
 class HrPayslip(models.Model):
@@ -111,6 +214,12 @@ class HrPayslip(models.Model):
     payslip_count = fields.Integer(compute='_compute_payslip_count',
                                    string="Payslip Computation Details",
                                    help="Set Payslip Count")
+    compute_fingerprint = fields.Char(string='Computation Fingerprint',
+                                      copy=False, readonly=True,
+                                      help="Hash of the data the payslip "
+                                           "lines were computed from, the "
+                                           "lines are only computed again "
+                                           "when it changes")
 
     def _compute_details_by_salary_rule_category_ids(self):
         """Compute function for Salary Rule Category for getting
@@ -170,6 +279,19 @@ class HrPayslip(models.Model):
             'context': {}
         }
 
+    def write(self, vals):
+        """Function for keeping the aggregates of the done payslips up to
+        date when payslips are done or leave the done state"""
+        if 'state' not in vals:
+            return super(HrPayslip, self).write(vals)
+        was_done = self.filtered(lambda payslip: payslip.state == 'done')
+        res = super(HrPayslip, self).write(vals)
+        is_done = self.filtered(lambda payslip: payslip.state == 'done')
+        aggregates = self.env['hr.payslip.aggregate'].sudo()
+        aggregates._add_payslips(was_done - is_done, sign=-1)
+        aggregates._add_payslips(is_done - was_done)
+        return res
+
     def unlink(self):
         """Function for unlink the Payslip"""
         if any(self.filtered(
@@ -189,6 +311,19 @@ class HrPayslip(models.Model):
         @return: returns the ids of all the contracts for the given employee
         that need to be considered for the given dates
         """
+        return self.get_contracts_for_employees(
+            employee, date_from, date_to).get(employee.id, [])
+
+    @api.model
+    def get_contracts_for_employees(self, employees, date_from, date_to):
+        """
+        @param employees: recordset of employees
+        @param date_from: date_field
+        @param date_to: date_field
+        @return: returns a dict mapping the id of each employee to the ids of
+        all its contracts that need to be considered for the given dates,
+        found with a single query
+        """
         # a contract is valid if it ends between the given dates
         clause_1 = ['&', ('date_end', '<=', date_to),
                     ('date_end', '>=', date_from)]
@@ -199,28 +334,187 @@ class HrPayslip(models.Model):
         # date_end (or never finish)
         clause_3 = ['&', ('date_start', '<=', date_from), '|',
                     ('date_end', '=', False), ('date_end', '>=', date_to)]
-        clause_final = [('employee_id', '=', employee.id),
+        clause_final = [('employee_id', 'in', employees.ids),
                         ('state', '=', 'open'), '|',
                         '|'] + clause_1 + clause_2 + clause_3
-        return self.env['hr.contract'].search(clause_final).ids
+        res = {employee_id: [] for employee_id in employees.ids}
+        for contract in self.env['hr.contract'].search_fetch(
+                clause_final, ['employee_id']):
+            res[contract.employee_id.id].append(contract.id)
+        return res
 
     def action_compute_sheet(self):
         """Function for compute Payslip sheet"""
+        for payslips in split_every(PAYSLIP_COMPUTE_BATCH_SIZE, self.ids,
+                                    self.browse):
+            payslips.with_context(
+                payroll_prefetch=payslips._get_payroll_prefetch(),
+            )._compute_sheet_batch()
+        return True
+
+    def _get_payroll_prefetch(self):
+        """
+        Function for loading at once the data the salary rules read for the
+        employees of the payslips over their periods, like the overtimes,
+        loans or per diems of the modules providing them, which extend this
+        method with one entry by source. The returned dict is set as
+        payroll_prefetch in the context of the computation, where the
+        contract methods called by the rules find it.
+        @return: returns a dict with the ids of the employees
+        ('employee_ids'), the period covered ('date_from', 'date_to') and,
+        by source, the entries of each employee by employee id
+        """
+        if not self:
+            return {}
+        return {
+            'employee_ids': set(self.employee_id.ids),
+            'date_from': min(self.mapped('date_from')),
+            'date_to': max(self.mapped('date_to')),
+        }
+
+    def _compute_sheet_batch(self):
+        """Function for computing the sheets of a batch of payslips: the
+        rules are resolved once per set of structures, and the old lines
+        are deleted and the new ones created in bulk"""
+        # prefetch the contracts, worked days and inputs of the whole batch
+        self.mapped('contract_id.struct_id')
+        self.mapped('worked_days_line_ids.code')
+        self.mapped('input_line_ids.code')
+        # resolve the contracts of the payslips without contract, with one
+        # query per payroll period
+        employees_by_period = {}
+        for payslip in self.filtered(lambda slip: not slip.contract_id):
+            period = (payslip.date_from, payslip.date_to)
+            employees_by_period[period] = employees_by_period.get(
+                period, self.env['hr.employee']) | payslip.employee_id
+        contracts_by_period = {
+            period: self.get_contracts_for_employees(employees, *period)
+            for period, employees in employees_by_period.items()}
+        rule_plans = {}
+        contracts_by_payslip = {}
+        structures_by_payslip = {}
         for payslip in self:
-            number = payslip.number or self.env['ir.sequence'].next_by_code(
-                'salary.slip')
-            # delete old payslip lines
-            payslip.line_ids.unlink()
+            if not payslip.number:
+                payslip.number = self.env['ir.sequence'].next_by_code(
+                    'salary.slip')
             # set the list of contract for which the rules have to be applied
             # if we don't give the contract, then the rules to apply should be
             # for all current contracts of the employee
-            contract_ids = payslip.contract_id.ids or \
-                           self.get_contract(payslip.employee_id,
-                                             payslip.date_from, payslip.date_to)
-            lines = [(0, 0, line) for line in
-                     self._get_payslip_lines(contract_ids, payslip.id)]
-            payslip.write({'line_ids': lines, 'number': number})
-        return True
+            contract_ids = payslip.contract_id.ids or contracts_by_period[
+                payslip.date_from, payslip.date_to][payslip.employee_id.id]
+            contracts = self.env['hr.contract'].browse(contract_ids)
+            structure_ids = tuple(payslip._get_structure_ids(contracts))
+            if structure_ids not in rule_plans:
+                rule_plans[structure_ids] = self._get_rule_plan(
+                    structure_ids)
+            contracts_by_payslip[payslip.id] = contracts
+            structures_by_payslip[payslip.id] = structure_ids
+        # compute again only the payslips whose data changed since their
+        # lines were computed, or whose batch is profiled
+        fingerprints = self._get_fingerprints(contracts_by_payslip, {
+            payslip_id: rule_plans[structure_ids][0]
+            for payslip_id, structure_ids in structures_by_payslip.items()})
+        payslips = self.filtered(
+            lambda slip: self.env.context.get('force_compute')
+            or slip.payslip_run_id.profile_rules
+            or not slip.line_ids
+            or slip.compute_fingerprint != fingerprints[slip.id])
+        # delete old payslip lines
+        payslips.mapped('line_ids').unlink()
+        lines = []
+        # statistics of the rules by profiled payslip batch
+        profiles = defaultdict(lambda: defaultdict(Counter))
+        # sums of the done payslips, read once by code for the whole batch
+        aggregates = PayslipAggregates(self.env, payslips.employee_id.ids)
+        payslip_ids_by_structures = defaultdict(list)
+        for payslip in payslips:
+            payslip.compute_fingerprint = fingerprints[payslip.id]
+            structure_ids = structures_by_payslip[payslip.id]
+            payslip_ids_by_structures[structure_ids].append(payslip.id)
+        # compute together the payslips sharing the same rules
+        for structure_ids, payslip_ids in payslip_ids_by_structures.items():
+            group = self.browse(payslip_ids)
+            lines_by_payslip = group._compute_payslip_lines_batch(
+                contracts_by_payslip, *rule_plans[structure_ids],
+                profiles={
+                    payslip.id: profiles[payslip.payslip_run_id.id]
+                    for payslip in group
+                    if payslip.payslip_run_id.profile_rules},
+                aggregates=aggregates)
+            for payslip in group:
+                for line in lines_by_payslip[payslip.id]:
+                    line['slip_id'] = payslip.id
+                    lines.append(line)
+        self.env['hr.payslip.line']._create_bulk(lines)
+        self.env['hr.payslip.rule.profile'].sudo()._record_profiles(profiles)
+
+    def _get_fingerprints(self, contracts_by_payslip, rules_by_payslip):
+        """
+        @param contracts_by_payslip: dict mapping the id of each payslip to
+        the contracts its rules are applied to
+        @param rules_by_payslip: dict mapping the id of each payslip to its
+        sorted rules
+        @return: returns a dict mapping the id of each payslip to the hash of
+        the data its lines are computed from
+        """
+        data = self._get_fingerprint_data(contracts_by_payslip,
+                                          rules_by_payslip)
+        return {payslip_id: hashlib.sha1(repr(values).encode()).hexdigest()
+                for payslip_id, values in data.items()}
+
+    def _get_fingerprint_data(self, contracts_by_payslip, rules_by_payslip):
+        """
+        @return: returns a dict mapping the id of each payslip to the list of
+        the values its lines depend on. The modules providing other sources
+        to the salary rules add their values to the lists.
+        """
+        rule_versions = {}
+        data = {}
+        # the year to date sums of the rules change with the other done
+        # payslips of the employee, which all update the aggregates
+        aggregate_versions = {
+            employee.id: (write_date, count, amount)
+            for employee, write_date, count, amount in self.env[
+                'hr.payslip.aggregate'].sudo()._read_group(
+                [('employee_id', 'in', self.employee_id.ids)],
+                ['employee_id'],
+                ['write_date:max', '__count', 'amount:sum'])}
+        for payslip in self:
+            rules = rules_by_payslip[payslip.id]
+            if rules not in rule_versions:
+                rule_versions[rules] = [
+                    (rule.id, rule.write_date,
+                     [(category.id, category.code, category.write_date)
+                      for category in self._get_category_chain(
+                          rule.category_id)])
+                    for rule in rules]
+            data[payslip.id] = [
+                (payslip.date_from, payslip.date_to, payslip.credit_note,
+                 payslip.struct_id.id, payslip.employee_id.write_date),
+                aggregate_versions.get(payslip.employee_id.id),
+                [(contract.id, contract.wage, contract.write_date)
+                 for contract in contracts_by_payslip[payslip.id]],
+                [(line.code, line.contract_id.id, line.number_of_days,
+                  line.number_of_hours)
+                 for line in payslip.worked_days_line_ids],
+                [(line.code, line.contract_id.id, line.amount)
+                 for line in payslip.input_line_ids],
+                rule_versions[rules],
+            ]
+        return data
+
+    @api.model
+    def _get_category_chain(self, category):
+        """
+        @param category: salary rule category
+        @return: returns the list of the category and its parents, whose
+        totals the lines of the category are added to
+        """
+        chain = []
+        while category:
+            chain.append(category)
+            category = category.parent_id
+        return chain
 
     @api.model
     def get_worked_day_lines(self, contracts, date_from, date_to):
@@ -230,26 +524,51 @@ class HrPayslip(models.Model):
         applied for the given contract between date_from and date_to
         """
         res = []
+        day_from = datetime.combine(fields.Date.from_string(date_from),
+                                    time.min)
+        day_to = datetime.combine(fields.Date.from_string(date_to),
+                                  time.max)
         # fill only if the contract as a working schedule linked
-        for contract in contracts.filtered(
-                lambda contract: contract.resource_calendar_id):
-            day_from = datetime.combine(fields.Date.from_string(date_from),
-                                        time.min)
-            day_to = datetime.combine(fields.Date.from_string(date_to),
-                                      time.max)
+        contracts = contracts.filtered(
+            lambda contract: contract.resource_calendar_id)
+        # fetch the leaves and the worked days of all the employees at once
+        # for each working schedule
+        contracts_by_calendar = {}
+        for contract in contracts:
+            contracts_by_calendar.setdefault(
+                contract.resource_calendar_id, self.env['hr.contract'])
+            contracts_by_calendar[contract.resource_calendar_id] |= contract
+        leave_intervals_by_contract = {}
+        work_data_by_contract = {}
+        for calendar, calendar_contracts in contracts_by_calendar.items():
+            employees = calendar_contracts.mapped('employee_id')
+            leave_intervals = employees._list_leaves_batch(day_from, day_to,
+                                                           calendar)
+            work_data = employees._get_work_days_data_batch(day_from, day_to,
+                                                            calendar)
+            for contract in calendar_contracts:
+                leave_intervals_by_contract[contract.id] = leave_intervals[
+                    contract.employee_id.id]
+                work_data_by_contract[contract.id] = work_data[
+                    contract.employee_id.id]
+        # work hours of the whole days, by working schedule and day
+        day_work_hours = {}
+        for contract in contracts:
             # compute leave days
             leaves = {}
             calendar = contract.resource_calendar_id
             tz = timezone(calendar.tz)
-            day_leave_intervals = contract.employee_id.list_leaves(
-                day_from, day_to, calendar=contract.resource_calendar_id)
+            day_leave_intervals = leave_intervals_by_contract[contract.id]
             multi_leaves = []
             for day, hours, leave in day_leave_intervals:
-                work_hours = calendar.get_work_hours_count(
-                    tz.localize(datetime.combine(day, time.min)),
-                    tz.localize(datetime.combine(day, time.max)),
-                    compute_leaves=False,
-                )
+                if (calendar.id, day) not in day_work_hours:
+                    day_work_hours[calendar.id, day] = \
+                        calendar.get_work_hours_count(
+                            tz.localize(datetime.combine(day, time.min)),
+                            tz.localize(datetime.combine(day, time.max)),
+                            compute_leaves=False,
+                        )
+                work_hours = day_work_hours[calendar.id, day]
                 if len(leave) > 1:
                     for each in leave:
                         if each.holiday_id:
@@ -271,8 +590,7 @@ class HrPayslip(models.Model):
                         current_leave_struct[
                             'number_of_days'] += hours / work_hours
             # compute worked days
-            work_data = contract.employee_id.get_work_days_data(
-                day_from, day_to, calendar=contract.resource_calendar_id)
+            work_data = work_data_by_contract[contract.id]
             attendances = {
                 'name': _("Normal Working Days paid at 100%"),
                 'sequence': 1,
@@ -315,12 +633,8 @@ class HrPayslip(models.Model):
         """Function for getting contracts upon date_from and date_to fields"""
         res = []
         structure_ids = contracts.get_all_structures()
-        rule_ids = self.env['hr.payroll.structure'].browse(
-            structure_ids).get_all_rules()
-        sorted_rule_ids = [id for id, sequence in
-                           sorted(rule_ids, key=lambda x: x[1])]
-        inputs = self.env['hr.salary.rule'].browse(sorted_rule_ids).mapped(
-            'input_ids')
+        sorted_rules = self._get_rule_plan(structure_ids)[0]
+        inputs = sorted_rules.mapped('input_ids')
         for contract in contracts:
             for input in inputs:
                 input_data = {
@@ -336,203 +650,314 @@ class HrPayslip(models.Model):
     @api.model
     def _get_payslip_lines(self, contract_ids, payslip_id):
         """Function for getting Payslip Lines"""
-
-        def _sum_salary_rule_category(localdict, category, amount):
-            """Function for getting total sum of Salary Rule Category"""
-            if category.parent_id:
-                localdict = _sum_salary_rule_category(localdict,
-                                                      category.parent_id,
-                                                      amount)
-            localdict['categories'].dict[category.code] \
-                = category.code in localdict[
-                'categories'].dict and localdict['categories'].dict[
-                      category.code] + amount or amount
-            return localdict
-
-        class BrowsableObject(object):
-            """Class for Browsable Object"""
-
-            def __init__(self, employee_id, dict, env):
-                """Function for getting employee_id,dict and env"""
-                self.employee_id = employee_id
-                self.dict = dict
-                self.env = env
-
-            def __getattr__(self, attr):
-                """Function for return dict"""
-                return attr in self.dict and self.dict.__getitem__(attr) or 0.0
-
-        class InputLine(BrowsableObject):
-            """a class that will be used into the python code, mainly for
-            usability purposes"""
-
-            def sum(self, code, from_date, to_date=None):
-                """Function for getting sum of Payslip with respect to
-                 from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""
-                    SELECT sum(amount) as sum
-                    FROM hr_payslip as hp, hr_payslip_input as pi
-                    WHERE hp.employee_id = %s AND hp.state = 'done'
-                    AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id = 
-                    pi.payslip_id AND pi.code = %s""",
-                                    (self.employee_id, from_date, to_date,
-                                        code))
-                return self.env.cr.fetchone()[0] or 0.0
-
-        class WorkedDays(BrowsableObject):
-            """a class that will be used into the python code, mainly for
-            usability purposes"""
-
-            def _sum(self, code, from_date, to_date=None):
-                """Function for getting sum of Payslip days with respect to
-                 from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""
-                    SELECT sum(number_of_days) as number_of_days, 
-                    sum(number_of_hours) as number_of_hours
-                    FROM hr_payslip as hp, hr_payslip_worked_days as pi
-                    WHERE hp.employee_id = %s AND hp.state = 'done'
-                    AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id = 
-                    pi.payslip_id AND pi.code = %s""",
-                                    (self.employee_id, from_date, to_date,
-                                        code))
-                return self.env.cr.fetchone()
-
-            def sum(self, code, from_date, to_date=None):
-                """Function for getting sum of Payslip with respect to
-                 from_date,to_date fields"""
-                res = self._sum(code, from_date, to_date)
-                return res and res[0] or 0.0
-
-            def sum_hours(self, code, from_date, to_date=None):
-                """Function for getting sum of Payslip hours with respect to
-                 from_date,to_date fields"""
-                res = self._sum(code, from_date, to_date)
-                return res and res[1] or 0.0
-
-        class Payslips(BrowsableObject):
-            """a class that will be used into the python code, mainly for
-            usability purposes"""
-
-            def sum(self, code, from_date, to_date=None):
-                """Function for getting sum of Payslip with respect to
-                 from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""SELECT sum(case when hp.credit_note = 
-                False then (pl.total) else (-pl.total) end)
-                FROM hr_payslip as hp, hr_payslip_line as pl
-                WHERE hp.employee_id = %s AND hp.state = 'done'
-                AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id 
-                = pl.slip_id AND pl.code = %s""",
-                                    (
-                                        self.employee_id, from_date, to_date,
-                                        code))
-                res = self.env.cr.fetchone()
-                return res and res[0] or 0.0
-
-        # we keep a dict with the result because a value can be overwritten
-        # by another rule with the same code
-        result_dict = {}
-        rules_dict = {}
-        worked_days_dict = {}
-        inputs_dict = {}
-        blacklist = []
         payslip = self.env['hr.payslip'].browse(payslip_id)
-        for worked_days_line in payslip.worked_days_line_ids:
-            worked_days_dict[worked_days_line.code] = worked_days_line
-        for input_line in payslip.input_line_ids:
-            inputs_dict[input_line.code] = input_line
-        categories = BrowsableObject(payslip.employee_id.id, {}, self.env)
-        inputs = InputLine(payslip.employee_id.id, inputs_dict, self.env)
-        worked_days = WorkedDays(payslip.employee_id.id, worked_days_dict,
-                                 self.env)
-        payslips = Payslips(payslip.employee_id.id, payslip, self.env)
-        rules = BrowsableObject(payslip.employee_id.id, rules_dict, self.env)
-        baselocaldict = {'categories': categories, 'rules': rules,
-                         'payslip': payslips, 'worked_days': worked_days,
-                         'inputs': inputs}
-        # get the ids of the structures on the contracts and their
-        # parent id as well
         contracts = self.env['hr.contract'].browse(contract_ids)
-        if len(contracts) == 1 and payslip.struct_id:
-            structure_ids = list(
-                set(payslip.struct_id._get_parent_structure().ids))
-        else:
-            structure_ids = contracts.get_all_structures()
-        # get the rules of the structure and thier children
-        rule_ids = self.env['hr.payroll.structure'].browse(
-            structure_ids).get_all_rules()
-        # run the rules by sequence
-        sorted_rule_ids = [id for id, sequence in
-                           sorted(rule_ids, key=lambda x: x[1])]
-        sorted_rules = self.env['hr.salary.rule'].browse(sorted_rule_ids)
-        for contract in contracts:
-            employee = contract.employee_id
-            localdict = dict(baselocaldict, employee=employee,
-                             contract=contract)
-            for rule in sorted_rules:
-                key = rule.code + '-' + str(contract.id)
-                localdict['result'] = None
-                localdict['result_qty'] = 1.0
-                localdict['result_rate'] = 100
+        sorted_rules, descendants = self._get_rule_plan(
+            tuple(payslip._get_structure_ids(contracts)))
+        return payslip._compute_payslip_lines(contracts, sorted_rules,
+                                              descendants)
+
+    def _get_structure_ids(self, contracts):
+        """Function for getting the ids of the structures on the contracts
+        and their parent id as well"""
+        self.ensure_one()
+        if len(contracts) == 1 and self.struct_id:
+            return list(set(self.struct_id._get_parent_structure().ids))
+        return contracts.get_all_structures()
+
+    @api.model
+    def _get_rule_plan(self, structure_ids):
+        """Function for getting the rules of the structures and their
+        children sorted by sequence, and the ids of the children of each
+        rule (the rule included), from the plan cached for the structures"""
+        sorted_rule_ids, descendants = self.env[
+            'hr.payroll.structure']._get_rule_plan(tuple(structure_ids))
+        return self.env['hr.salary.rule'].browse(sorted_rule_ids), descendants
+
+    def _compute_payslip_lines(self, contracts, sorted_rules, descendants,
+                               profile=None, aggregates=None):
+        """Function for computing the values of the payslip lines by
+        running the sorted rules on each contract, descendants giving the
+        rules blacklisted with each rule. When a profile is given, the
+        evaluations, time and queries of every rule are added to it."""
+        self.ensure_one()
+        return self._compute_payslip_lines_batch(
+            {self.id: contracts}, sorted_rules, descendants,
+            profiles={self.id: profile}, aggregates=aggregates)[self.id]
+
+    def _compute_payslip_lines_batch(self, contracts_by_payslip, sorted_rules,
+                                     descendants, profiles=None,
+                                     aggregates=None):
+        """
+        Function for computing the values of the lines of payslips sharing
+        the same rules. Each rule is run on all the payslips before the next
+        one, the contracts of a payslip in turn, so that the fixed and
+        percentage rules on a number or a field are read once for the whole
+        batch and only the other rules are evaluated payslip by payslip.
+        @param contracts_by_payslip: dict mapping the id of each payslip to
+        the contracts its rules are applied to
+        @param sorted_rules: rules to run, sorted by sequence
+        @param descendants: dict mapping the id of each rule to the ids of
+        the rules blacklisted with it
+        @param profiles: dict mapping the id of the payslips to profile to
+        the statistics their rules are added to
+        @param aggregates: sums of the done payslips, shared by the payslips
+        computed together
+        @return: returns a dict mapping the id of each payslip to the values
+        of its lines
+        """
+        profiles = profiles or {}
+        aggregates = aggregates or PayslipAggregates(self.env,
+                                                     self.employee_id.ids)
+        cr = self.env.cr
+
+        def _evaluate(state, rule, step, method, localdict):
+            """Function for evaluating the condition or the amount of a
+            rule, measured when profiling"""
+            profile = state['profile']
+            if profile is None:
+                return method(localdict)
+            queries = cr.sql_log_count
+            start = perf_counter()
+            try:
+                return method(localdict)
+            finally:
+                stats = profile[rule._origin.id]
+                stats[step + '_count'] += 1
+                stats[step + '_time'] += perf_counter() - start
+                stats['query_count'] += cr.sql_log_count - queries
+
+        states = []
+        for payslip in self:
+            employee_id = payslip.employee_id.id
+            # we keep a dict with the result because a value can be
+            # overwritten by another rule with the same code
+            rules_dict = {}
+            worked_days_dict = {line.code: line
+                                for line in payslip.worked_days_line_ids}
+            inputs_dict = {line.code: line for line in payslip.input_line_ids}
+            states.append({
+                'payslip': payslip,
+                'contracts': contracts_by_payslip[payslip.id],
+                'profile': profiles.get(payslip.id),
+                'blacklist': set(),
+                'result_dict': {},
+                'rules_dict': rules_dict,
+                'baselocaldict': {
+                    'categories': BrowsableObject(employee_id, {}, self.env,
+                                                  aggregates),
+                    'rules': BrowsableObject(employee_id, rules_dict,
+                                             self.env, aggregates),
+                    'payslip': Payslips(employee_id, payslip, self.env,
+                                        aggregates),
+                    'worked_days': WorkedDays(employee_id, worked_days_dict,
+                                              self.env, aggregates),
+                    'inputs': InputLine(employee_id, inputs_dict, self.env,
+                                        aggregates),
+                },
+            })
+        rule_evaluators = []
+        for rule in sorted_rules:
+            # codes of the category of the rule and its parents, the
+            # topmost first
+            category_codes = []
+            category = rule.category_id
+            while category:
+                category_codes.insert(0, category.code)
+                category = category.parent_id
+            rule_evaluators.append((
+                rule, rule._get_condition_evaluator(),
+                rule._get_amount_evaluator(), rule._get_line_values(),
+                category_codes))
+        index = 0
+        while True:
+            lanes = [(state, dict(state['baselocaldict'],
+                                  employee=contract.employee_id,
+                                  contract=contract))
+                     for state in states
+                     for contract in state['contracts'][index:index + 1]]
+            if not lanes:
+                break
+            index += 1
+            for rule, satisfy_condition, compute_rule, line_values, \
+                    category_codes in rule_evaluators:
                 # check if the rule can be applied
-                if rule._satisfy_condition(
-                        localdict) and rule.id not in blacklist:
-                    # compute the amount of the rule
-                    amount, qty, rate = rule._compute_rule(localdict)
-                    # check if there is already a rule computed with that code
+                applied = []
+                for state, localdict in lanes:
+                    localdict['result'] = None
+                    localdict['result_qty'] = 1.0
+                    localdict['result_rate'] = 100
+                    if _evaluate(state, rule, 'condition', satisfy_condition,
+                                 localdict) and \
+                            rule._origin.id not in state['blacklist']:
+                        applied.append((state, localdict))
+                    else:
+                        # blacklist this rule and its children
+                        state['blacklist'] |= descendants[rule._origin.id]
+                # compute the amount of the rule
+                results = [_evaluate(state, rule, 'compute', compute_rule,
+                                     localdict)
+                           for state, localdict in applied]
+                totals = [amount * qty * rate / 100.0
+                          for amount, qty, rate in results]
+                for (state, localdict), (amount, qty, rate), tot_rule in zip(
+                        applied, results, totals):
+                    # check if there is already a rule computed with that
+                    # code
                     previous_amount = rule.code in localdict and localdict[
                         rule.code] or 0.0
                     # set/overwrite the amount computed for this rule in
                     # the localdict
-                    tot_rule = amount * qty * rate / 100.0
                     localdict[rule.code] = tot_rule
-                    rules_dict[rule.code] = rule
+                    state['rules_dict'][rule.code] = rule
                     # sum the amount for its salary category
-                    localdict = _sum_salary_rule_category(
-                        localdict, rule.category_id, tot_rule - previous_amount)
+                    amount_delta = tot_rule - previous_amount
+                    categories = localdict['categories'].dict
+                    for code in category_codes:
+                        categories[code] = code in categories and categories[
+                            code] + amount_delta or amount_delta
                     # create/overwrite the rule in the temporary results
-                    result_dict[key] = {
-                        'salary_rule_id': rule.id,
-                        'contract_id': contract.id,
-                        'name': rule.name,
-                        'code': rule.code,
-                        'category_id': rule.category_id.id,
-                        'sequence': rule.sequence,
-                        'appears_on_payslip': rule.appears_on_payslip,
-                        'condition_select': rule.condition_select,
-                        'condition_python': rule.condition_python,
-                        'condition_range': rule.condition_range,
-                        'condition_range_min': rule.condition_range_min,
-                        'condition_range_max': rule.condition_range_max,
-                        'amount_select': rule.amount_select,
-                        'amount_fix': rule.amount_fix,
-                        'amount_python_compute': rule.amount_python_compute,
-                        'amount_percentage': rule.amount_percentage,
-                        'amount_percentage_base': rule.amount_percentage_base,
-                        'register_id': rule.register_id.id,
-                        'amount': amount,
-                        'employee_id': contract.employee_id.id,
-                        'quantity': qty,
-                        'rate': rate,
-                    }
-                else:
-                    # blacklist this rule and its children
-                    blacklist += [id for id, seq in
-                                  rule._recursive_search_of_rules()]
-        return list(result_dict.values())
+                    contract = localdict['contract']
+                    state['result_dict'][
+                        rule.code + '-' + str(contract.id)] = dict(
+                        line_values, contract_id=contract.id, amount=amount,
+                        employee_id=contract.employee_id.id, quantity=qty,
+                        rate=rate)
+        return {state['payslip'].id: list(state['result_dict'].values())
+                for state in states}
+
+    @api.model
+    def simulate_payroll(self, employees, date_from, date_to,
+                         overrides=None, credit_note=False):
+        """
+        Function for simulating the payroll of employees over a period with
+        the same rules as the payslip computation, without writing anything:
+        the payslips, and the contracts and rules changed by the overrides,
+        are new records only held in memory.
+        @param employees: recordset of the employees
+        @param date_from: start date of the period
+        @param date_to: end date of the period
+        @param overrides: optional dict of changes to simulate, with the
+        keys:
+            * wage_rate: percentage added to the wages of all contracts
+            * wage_delta: amount added to the wages, or dict mapping
+              employee ids to the amount added to their wages
+            * rules: dict mapping salary rule codes to the new values of
+              their fields (amount_fix, amount_percentage,
+              amount_python_compute...)
+        @param credit_note: simulate refund payslips
+        @return: returns a dict with the totals of the lines by rule code,
+        for the whole payroll ('totals'), by department id ('departments')
+        and by employee id ('employees'), and the number of simulated
+        payslips ('payslip_count')
+        """
+        overrides = overrides or {}
+        wage_rate = overrides.get('wage_rate') or 0.0
+        wage_delta = overrides.get('wage_delta') or 0.0
+        if isinstance(wage_delta, dict):
+            # the keys are strings when called over RPC
+            wage_delta = {int(employee_id): delta
+                          for employee_id, delta in wage_delta.items()}
+        rule_changes = overrides.get('rules') or {}
+        contracts_by_employee = self.get_contracts_for_employees(
+            employees, date_from, date_to)
+        contracts = self.env['hr.contract'].browse(sorted(
+            {contract_id for contract_ids in contracts_by_employee.values()
+             for contract_id in contract_ids}))
+        worked_days_by_contract = defaultdict(list)
+        for line in self.get_worked_day_lines(contracts, date_from, date_to):
+            worked_days_by_contract[line['contract_id']].append(line)
+        simulated_contracts = {}
+        for contract in contracts:
+            delta = wage_delta.get(contract.employee_id.id, 0.0) if \
+                isinstance(wage_delta, dict) else wage_delta
+            if wage_rate or delta:
+                contract = contract.new({
+                    'wage': contract.wage * (1 + wage_rate / 100.0) + delta,
+                }, origin=contract)
+            simulated_contracts[contract._origin.id] = contract
+        payslips = self.browse()
+        contracts_by_payslip = {}
+        structures_by_payslip = {}
+        for employee in employees:
+            values = self.onchange_employee_id(
+                date_from, date_to, employee.id,
+                employee_contract_ids=contracts_by_employee[employee.id],
+                worked_days_by_contract=worked_days_by_contract)['value']
+            if not values.get('contract_id'):
+                continue
+            payslip = self.new({
+                'employee_id': employee.id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'credit_note': credit_note,
+                'company_id': values.get('company_id'),
+                'contract_id': values['contract_id'],
+                'struct_id': values.get('struct_id'),
+                'worked_days_line_ids': [
+                    (0, 0, line) for line in values['worked_days_line_ids']],
+                'input_line_ids': [
+                    (0, 0, line) for line in values['input_line_ids']],
+            })
+            employee_contracts = contracts.browse(
+                contracts_by_employee[employee.id])
+            structures_by_payslip[payslip.id] = tuple(
+                payslip._get_structure_ids(employee_contracts))
+            contracts_by_payslip[payslip.id] = self.env['hr.contract'].concat(
+                *[simulated_contracts[contract.id]
+                  for contract in employee_contracts])
+            payslips |= payslip
+        result = {
+            'totals': defaultdict(float),
+            'departments': defaultdict(lambda: defaultdict(float)),
+            'employees': defaultdict(lambda: defaultdict(float)),
+            'payslip_count': len(payslips),
+        }
+        aggregates = PayslipAggregates(self.env, payslips.employee_id.ids)
+        # the data read by the rules is loaded at once for all the payslips
+        prefetch = payslips._get_payroll_prefetch()
+        contracts_by_payslip = {
+            payslip_id: contracts.with_context(payroll_prefetch=prefetch)
+            for payslip_id, contracts in contracts_by_payslip.items()}
+        for structure_ids in set(structures_by_payslip.values()):
+            group = payslips.filtered(
+                lambda slip: structures_by_payslip[slip.id] == structure_ids)
+            sorted_rules, descendants = self._get_rule_plan(structure_ids)
+            sorted_rules = sorted_rules.concat(*[
+                rule.new(rule_changes[rule.code], origin=rule)
+                if rule.code in rule_changes else rule
+                for rule in sorted_rules])
+            lines_by_payslip = group._compute_payslip_lines_batch(
+                contracts_by_payslip, sorted_rules, descendants,
+                aggregates=aggregates)
+            for payslip in group:
+                employee = payslip.employee_id
+                for line in lines_by_payslip[payslip.id]:
+                    total = line['quantity'] * line['amount'] * line[
+                        'rate'] / 100
+                    result['totals'][line['code']] += total
+                    result['departments'][employee.department_id.id][
+                        line['code']] += total
+                    result['employees'][employee.id][line['code']] += total
+        result['totals'] = dict(result['totals'])
+        for key in ('departments', 'employees'):
+            result[key] = {record_id: dict(totals)
+                           for record_id, totals in result[key].items()}
+        return result
 
     # YTI
     # TODO To rename. This method is not really an onchange,
     #  as it is not in any view
     # employee_id and contract_id could be browse records
     def onchange_employee_id(self, date_from, date_to, employee_id=False,
-                             contract_id=False):
-        """Function for return worked days when changing onchange_employee_id"""
+                             contract_id=False, employee_contract_ids=None,
+                             worked_days_by_contract=None):
+        """Function for return worked days when changing onchange_employee_id
+        When generating the payslips of several employees,
+        employee_contract_ids are the ids of the contracts of the employee
+        found with get_contracts_for_employees, and worked_days_by_contract
+        the worked day lines of all their contracts by contract id, computed
+        at once with get_worked_day_lines"""
         # defaults
         res = {
             'value': {
@@ -557,17 +982,16 @@ class HrPayslip(models.Model):
                                             locale=locale))),
             'company_id': employee.company_id.id,
         })
-        if not self.env.context.get('contract'):
-            # fill with the first contract of the employee
-            contract_ids = self.get_contract(employee, date_from, date_to)
+        if self.env.context.get('contract') and contract_id:
+            # set the list of contract for which the input have to be filled
+            contract_ids = [contract_id]
+        elif employee_contract_ids is not None:
+            contract_ids = employee_contract_ids
         else:
-            if contract_id:
-                # set the list of contract for which the input have to be filled
-                contract_ids = [contract_id]
-            else:
-                # if we don't give the contract, then the input to fill
-                # should be for all current contracts of the employee
-                contract_ids = self.get_contract(employee, date_from, date_to)
+            # fill with the first contract of the employee, or if we don't
+            # give the contract, then the input to fill should be for all
+            # current contracts of the employee
+            contract_ids = self.get_contract(employee, date_from, date_to)
         if not contract_ids:
             return res
         contract = self.env['hr.contract'].browse(contract_ids[0])
@@ -582,8 +1006,13 @@ class HrPayslip(models.Model):
         })
         # computation of the salary input
         contracts = self.env['hr.contract'].browse(contract_ids)
-        worked_days_line_ids = self.get_worked_day_lines(contracts, date_from,
-                                                         date_to)
+        if worked_days_by_contract is None:
+            worked_days_line_ids = self.get_worked_day_lines(
+                contracts, date_from, date_to)
+        else:
+            worked_days_line_ids = [
+                line for contract in contracts
+                for line in worked_days_by_contract.get(contract.id, [])]
         input_line_ids = self.get_inputs(contracts, date_from, date_to)
         res['value'].update({
             'worked_days_line_ids': worked_days_line_ids,
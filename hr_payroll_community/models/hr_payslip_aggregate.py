@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#    A part of Open HRMS Project <https://www.openhrms.com>
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, fields, models
+
+# Sums of the done payslips added to the aggregates, by kind
+AGGREGATE_QUERIES = {
+    'line': """
+        SELECT hp.employee_id, 'line', pl.code, hp.date_from, hp.date_to,
+               SUM(CASE WHEN hp.credit_note = False THEN pl.total
+                        ELSE -pl.total END),
+               0.0, 0.0, COUNT(DISTINCT hp.id)
+        FROM hr_payslip hp
+        JOIN hr_payslip_line pl ON pl.slip_id = hp.id
+        WHERE hp.id IN %(payslip_ids)s AND pl.code IS NOT NULL
+        GROUP BY hp.employee_id, pl.code, hp.date_from, hp.date_to""",
+    'input': """
+        SELECT hp.employee_id, 'input', pi.code, hp.date_from, hp.date_to,
+               SUM(pi.amount), 0.0, 0.0, COUNT(DISTINCT hp.id)
+        FROM hr_payslip hp
+        JOIN hr_payslip_input pi ON pi.payslip_id = hp.id
+        WHERE hp.id IN %(payslip_ids)s AND pi.code IS NOT NULL
+        GROUP BY hp.employee_id, pi.code, hp.date_from, hp.date_to""",
+    'worked_days': """
+        SELECT hp.employee_id, 'worked_days', pi.code, hp.date_from,
+               hp.date_to, 0.0, SUM(pi.number_of_days),
+               SUM(pi.number_of_hours), COUNT(DISTINCT hp.id)
+        FROM hr_payslip hp
+        JOIN hr_payslip_worked_days pi ON pi.payslip_id = hp.id
+        WHERE hp.id IN %(payslip_ids)s AND pi.code IS NOT NULL
+        GROUP BY hp.employee_id, pi.code, hp.date_from, hp.date_to""",
+}
+
+
+class HrPayslipAggregate(models.Model):
+    """Create new model for the sums of the done payslips by employee,
+    code and payroll period, used by the year to date helpers of the
+    salary rules instead of the payslip lines"""
+    _name = 'hr.payslip.aggregate'
+    _description = 'Payslip Aggregate'
+    _order = 'employee_id, kind, code, date_from'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee',
+                                  required=True, ondelete='cascade',
+                                  help="Employee of the payslips")
+    kind = fields.Selection([
+        ('line', 'Payslip Line'),
+        ('input', 'Input'),
+        ('worked_days', 'Worked Days'),
+    ], string='Kind', required=True, help="Lines the sums are made of")
+    code = fields.Char(string='Code', required=True,
+                       help="Code of the summed lines")
+    date_from = fields.Date(string='Date From', required=True,
+                            help="Start date of the payslips")
+    date_to = fields.Date(string='Date To', required=True,
+                          help="End date of the payslips")
+    amount = fields.Float(string='Amount',
+                          help="Sum of the totals of the payslip lines, "
+                               "refunds deducted, or of the input amounts")
+    number_of_days = fields.Float(string='Number of Days',
+                                  help="Sum of the worked days")
+    number_of_hours = fields.Float(string='Number of Hours',
+                                   help="Sum of the worked hours")
+    payslip_count = fields.Integer(string='Payslip Count',
+                                   help="Number of done payslips summed")
+
+    _sql_constraints = [
+        ('aggregate_unique',
+         'UNIQUE(employee_id, kind, code, date_from, date_to)',
+         'The aggregate of a code must be unique by employee and period!'),
+    ]
+
+    def init(self):
+        """Function for filling the aggregates from the payslips done
+        before the installation of the table"""
+        self.env.cr.execute("SELECT 1 FROM hr_payslip_aggregate LIMIT 1")
+        if self.env.cr.fetchone():
+            return
+        self.env.cr.execute("SELECT id FROM hr_payslip WHERE state = 'done'")
+        payslip_ids = [row[0] for row in self.env.cr.fetchall()]
+        if payslip_ids:
+            self._add_payslips(self.env['hr.payslip'].browse(payslip_ids))
+
+    @api.model
+    def _add_payslips(self, payslips, sign=1):
+        """Function for adding the lines, inputs and worked days of the
+        given payslips to the aggregates, or for removing them with a
+        negative sign"""
+        if not payslips:
+            return
+        for model in ('hr.payslip', 'hr.payslip.line', 'hr.payslip.input',
+                      'hr.payslip.worked.days'):
+            self.env[model].flush_model()
+        self.flush_model()
+        for query in AGGREGATE_QUERIES.values():
+            self.env.cr.execute("""
+                INSERT INTO hr_payslip_aggregate (
+                    employee_id, kind, code, date_from, date_to, amount,
+                    number_of_days, number_of_hours, payslip_count,
+                    create_uid, create_date, write_uid, write_date)
+                SELECT employee_id, kind, code, date_from, date_to,
+                       %(sign)s * amount, %(sign)s * number_of_days,
+                       %(sign)s * number_of_hours,
+                       %(sign)s * payslip_count,
+                       %(uid)s, NOW() AT TIME ZONE 'UTC',
+                       %(uid)s, NOW() AT TIME ZONE 'UTC'
+                FROM (""" + query + """)
+                    AS sums (employee_id, kind, code, date_from, date_to,
+                             amount, number_of_days, number_of_hours,
+                             payslip_count)
+                ON CONFLICT (employee_id, kind, code, date_from, date_to)
+                DO UPDATE SET
+                    amount = hr_payslip_aggregate.amount + EXCLUDED.amount,
+                    number_of_days = hr_payslip_aggregate.number_of_days
+                        + EXCLUDED.number_of_days,
+                    number_of_hours = hr_payslip_aggregate.number_of_hours
+                        + EXCLUDED.number_of_hours,
+                    payslip_count = hr_payslip_aggregate.payslip_count
+                        + EXCLUDED.payslip_count,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date""", {
+                'sign': sign,
+                'uid': self.env.uid,
+                'payslip_ids': tuple(payslips.ids),
+            })
+        self.env.cr.execute(
+            "DELETE FROM hr_payslip_aggregate WHERE payslip_count <= 0")
+        self.invalidate_model()
+
+    @api.model
+    def _read_sums(self, kind, code, employee_ids):
+        """
+        @param kind: kind of the summed lines
+        @param code: code of the summed lines
+        @param employee_ids: ids of the employees
+        @return: returns a dict mapping each employee id to the list of
+        (date_from, date_to, amount, number_of_days, number_of_hours) of its
+        periods
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT employee_id, date_from, date_to, amount, number_of_days,
+                   number_of_hours
+            FROM hr_payslip_aggregate
+            WHERE kind = %s AND code = %s AND employee_id IN %s""",
+                            (kind, code, tuple(employee_ids)))
+        res = {employee_id: [] for employee_id in employee_ids}
+        for employee_id, *values in self.env.cr.fetchall():
+            res[employee_id].append(tuple(values))
+        return res
@@ -23,6 +23,11 @@
 from odoo import api, fields, models, _
 from odoo.addons import decimal_precision as dp
 from odoo.exceptions import UserError
+from odoo.models import LOG_ACCESS_COLUMNS
+from odoo.tools import SQL, split_every
+
+# Number of payslip lines inserted by query
+PAYSLIP_LINE_INSERT_SIZE = 1000
 
 
 class HrPayslipLine(models.Model):
@@ -76,3 +81,58 @@ class HrPayslipLine(models.Model):
                     raise UserError(
                         _('You must set a contract to create a payslip line.'))
         return super(HrPayslipLine, self).create(vals_list)
+
+    @api.model
+    def _create_bulk(self, vals_list):
+        """
+        Function for inserting computed payslip lines with multi-row
+        inserts: the fields missing from the values take their default,
+        the total is computed while inserting and only the stored fields
+        depending on the lines are recomputed.
+        @param vals_list: values of the lines, with their payslip,
+        employee and contract
+        @return: returns the created lines
+        """
+        if not vals_list:
+            return self.browse()
+        self.check_access('create')
+        fnames = set().union(*vals_list)
+        defaults = self.default_get([
+            name for name, field in self._fields.items()
+            if field.store and field.column_type and not field.compute
+            and name not in fnames and name != 'id'
+            and name not in LOG_ACCESS_COLUMNS])
+        columns = sorted(fnames.union(defaults) - {'total'})
+        fields_ = [self._fields[name] for name in columns]
+        total_field = self._fields['total']
+        log_access = SQL(', ').join([
+            SQL('%s', self.env.uid), SQL('%s', self.env.cr.now())] * 2)
+        rows = []
+        for vals in vals_list:
+            values = dict(defaults, **vals)
+            cache = {field.name: field.convert_to_cache(
+                values.get(field.name), self, validate=False)
+                for field in fields_}
+            cache['total'] = float(cache['quantity']) * cache['amount'] * \
+                cache['rate'] / 100
+            rows.append(SQL('(%s, %s)', SQL(', ').join(
+                SQL('%s', field.convert_to_column_insert(
+                    cache[field.name], self, values))
+                for field in fields_ + [total_field]), log_access))
+        ids = []
+        for chunk in split_every(PAYSLIP_LINE_INSERT_SIZE, rows):
+            self.env.cr.execute(SQL(
+                'INSERT INTO %s (%s) VALUES %s RETURNING id',
+                SQL.identifier(self._table),
+                SQL(', ').join(SQL.identifier(name) for name in columns + [
+                    'total'] + list(LOG_ACCESS_COLUMNS)),
+                SQL(', ').join(chunk)))
+            ids.extend(row[0] for row in self.env.cr.fetchall())
+        lines = self.browse(ids)
+        # the total is inserted, recompute only what depends on the lines
+        lines.modified([name for name in columns
+                        if name not in total_field.depends], create=True)
+        self.env['hr.payslip'].browse(list(
+            {vals['slip_id'] for vals in vals_list})).invalidate_recordset(
+            ['line_ids'])
+        return lines
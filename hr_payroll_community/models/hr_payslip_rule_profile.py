@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#    A part of Open HRMS Project <https://www.openhrms.com>
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, fields, models
+
+
+class HrPayslipRuleProfile(models.Model):
+    """Create new model for the statistics of the salary rules collected
+    while computing the payslips of a profiled Payslip Batch. A record is
+    added for each rule by computed set of payslips, so that parallel
+    computations never update the same rows."""
+    _name = 'hr.payslip.rule.profile'
+    _description = 'Salary Rule Profile'
+    _order = 'run_id, rule_id, id'
+
+    run_id = fields.Many2one('hr.payslip.run', string='Payslip Batch',
+                             required=True, index=True, ondelete='cascade',
+                             help="Payslip Batch whose payslips were "
+                                  "computed")
+    rule_id = fields.Many2one('hr.salary.rule', string='Salary Rule',
+                              required=True, ondelete='cascade',
+                              help="Profiled salary rule")
+    condition_count = fields.Integer(string='Condition Evaluations',
+                                     help="Number of evaluations of the "
+                                          "condition of the rule")
+    condition_time = fields.Float(string='Condition Time (s)',
+                                  help="Time spent evaluating the condition "
+                                       "of the rule")
+    compute_count = fields.Integer(string='Amount Evaluations',
+                                   help="Number of computations of the "
+                                        "amount of the rule")
+    compute_time = fields.Float(string='Amount Time (s)',
+                                help="Time spent computing the amount of "
+                                     "the rule")
+    query_count = fields.Integer(string='Queries',
+                                 help="Number of SQL queries run while "
+                                      "evaluating the rule")
+
+    @api.model
+    def _record_profiles(self, profiles):
+        """
+        @param profiles: dict mapping the id of each payslip batch to the
+        statistics of its rules, by rule id
+        @return: returns the created profile records
+        """
+        return self.create([
+            dict(stats, run_id=run_id, rule_id=rule_id)
+            for run_id, rules in profiles.items()
+            for rule_id, stats in rules.items()])
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#    A part of Open HRMS Project <https://www.openhrms.com>
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import fields, models, tools
+
+
+class HrPayslipRuleProfileReport(models.Model):
+    """Create new model for the report of the salary rules profiled for the
+    Payslip Batches, one line by batch and rule"""
+    _name = 'hr.payslip.rule.profile.report'
+    _description = 'Salary Rule Profile Report'
+    _auto = False
+    _order = 'total_time desc'
+
+    run_id = fields.Many2one('hr.payslip.run', string='Payslip Batch',
+                             readonly=True)
+    rule_id = fields.Many2one('hr.salary.rule', string='Salary Rule',
+                              readonly=True)
+    code = fields.Char(string='Code', readonly=True)
+    condition_count = fields.Integer(string='Condition Evaluations',
+                                     readonly=True)
+    condition_time = fields.Float(string='Condition Time (s)', readonly=True)
+    compute_count = fields.Integer(string='Amount Evaluations', readonly=True)
+    compute_time = fields.Float(string='Amount Time (s)', readonly=True)
+    total_time = fields.Float(string='Total Time (s)', readonly=True)
+    average_time = fields.Float(string='Average Time (ms)', readonly=True,
+                                aggregator='avg',
+                                help="Time by evaluation of the condition "
+                                     "in milliseconds, amount included")
+    query_count = fields.Integer(string='Queries', readonly=True)
+
+    def init(self):
+        """Function for creating the view of the report"""
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT MIN(profile.id) AS id,
+                       profile.run_id,
+                       profile.rule_id,
+                       rule.code,
+                       SUM(profile.condition_count) AS condition_count,
+                       SUM(profile.condition_time) AS condition_time,
+                       SUM(profile.compute_count) AS compute_count,
+                       SUM(profile.compute_time) AS compute_time,
+                       SUM(profile.condition_time + profile.compute_time)
+                           AS total_time,
+                       1000 * SUM(profile.condition_time
+                                  + profile.compute_time)
+                           / NULLIF(SUM(profile.condition_count), 0)
+                           AS average_time,
+                       SUM(profile.query_count) AS query_count
+                FROM hr_payslip_rule_profile profile
+                JOIN hr_salary_rule rule ON rule.id = profile.rule_id
+                GROUP BY profile.run_id, profile.rule_id, rule.code
+            )""" % self._table)
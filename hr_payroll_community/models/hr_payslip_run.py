@@ -20,9 +20,16 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from collections import defaultdict
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
-from odoo import fields, models
+from odoo import api, fields, models
+from odoo.tools import split_every
+
+# Cron jobs generating the payslips of the chunks, in parallel
+GENERATION_CRON_XMLIDS = [
+    'hr_payroll_community.ir_cron_generate_payslips_%s' % worker
+    for worker in range(1, 5)]
 
 
 class HrPayslipRun(models.Model):
@@ -55,6 +62,38 @@ class HrPayslipRun(models.Model):
                                  help="If its checked, indicates that all"
                                       "payslips generated from here are refund"
                                       "payslips.")
+    chunk_ids = fields.One2many('hr.payslip.run.chunk', 'run_id',
+                                string='Generation Chunks',
+                                help="Chunks of employees whose payslips are "
+                                     "generated in the background")
+    generation_progress = fields.Float(string='Generation Progress',
+                                       compute='_compute_generation_progress',
+                                       help="Percentage of the employees "
+                                            "whose payslips are generated")
+    failed_chunk_count = fields.Integer(string='Failed Chunks',
+                                        compute='_compute_generation_progress',
+                                        help="Number of chunks whose "
+                                             "generation failed")
+    profile_rules = fields.Boolean(string='Profile Salary Rules',
+                                   help="If its checked, the evaluations, "
+                                        "time and queries of every salary "
+                                        "rule are recorded when the payslips "
+                                        "of the batch are computed.")
+    rule_profile_ids = fields.One2many('hr.payslip.rule.profile', 'run_id',
+                                       string='Salary Rule Profiles',
+                                       help="Statistics of the salary rules "
+                                            "recorded for the batch")
+
+    @api.depends('chunk_ids.state', 'chunk_ids.employee_count')
+    def _compute_generation_progress(self):
+        """Compute function for the progress of the background generation"""
+        for run in self:
+            total = sum(run.chunk_ids.mapped('employee_count'))
+            done = sum(run.chunk_ids.filtered(
+                lambda chunk: chunk.state == 'done').mapped('employee_count'))
+            run.generation_progress = total and 100.0 * done / total or 0.0
+            run.failed_chunk_count = len(run.chunk_ids.filtered(
+                lambda chunk: chunk.state == 'failed'))
 
     def action_payslip_run(self):
         """Function for state change"""
@@ -63,3 +102,120 @@ class HrPayslipRun(models.Model):
     def close_payslip_run(self):
         """Function for state change"""
         return self.write({'state': 'close'})
+
+    def action_retry_failed_chunks(self):
+        """Function for generating again the chunks which failed, the
+        chunks already done are kept"""
+        self.mapped('chunk_ids').filtered(
+            lambda chunk: chunk.state == 'failed').write(
+            {'state': 'pending', 'error': False})
+        self._trigger_generation_workers()
+        return True
+
+    def _create_generation_chunks(self, employees, chunk_size):
+        """Function for splitting the employees in chunks whose payslips
+        are generated in the background by the generation workers"""
+        self.ensure_one()
+        self.env['hr.payslip.run.chunk'].create([{
+            'run_id': self.id,
+            'employee_ids': [(6, 0, employee_ids)],
+        } for employee_ids in split_every(chunk_size, employees.ids, list)])
+        self._trigger_generation_workers()
+
+    def _trigger_generation_workers(self):
+        """Function for waking up the cron jobs generating the chunks"""
+        for xmlid in GENERATION_CRON_XMLIDS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    def _generate_payslips(self, employees):
+        """Function for generating and computing the payslips of the
+        batch for the given employees"""
+        self.ensure_one()
+        payslips = self.env['hr.payslip']
+        from_date = self.date_start
+        to_date = self.date_end
+        contracts_by_employee = payslips.get_contracts_for_employees(
+            employees, from_date, to_date)
+        # compute the worked days of all the contracts at once
+        contracts = self.env['hr.contract'].browse(sorted(
+            {contract_id for contract_ids in contracts_by_employee.values()
+             for contract_id in contract_ids}))
+        worked_days_by_contract = defaultdict(list)
+        for line in payslips.get_worked_day_lines(contracts, from_date,
+                                                  to_date):
+            worked_days_by_contract[line['contract_id']].append(line)
+        for employee in employees:
+            slip_data = (
+                self.env['hr.payslip'].onchange_employee_id(
+                    from_date, to_date, employee.id, contract_id=False,
+                    employee_contract_ids=contracts_by_employee[employee.id],
+                    worked_days_by_contract=worked_days_by_contract))
+            res = {
+                'employee_id': employee.id,
+                'name': slip_data['value'].get('name'),
+                'struct_id': slip_data['value'].get('struct_id'),
+                'contract_id': slip_data['value'].get('contract_id'),
+                'payslip_run_id': self.id,
+                'input_line_ids': [(0, 0, x) for x in
+                                   slip_data['value'].get('input_line_ids')],
+                'worked_days_line_ids': [(0, 0, x) for x in
+                                         slip_data['value'].get(
+                                             'worked_days_line_ids')],
+                'date_from': from_date,
+                'date_to': to_date,
+                'credit_note': self.credit_note,
+                'company_id': employee.company_id.id,
+            }
+            payslips += self.env['hr.payslip'].create(res)
+        payslips.action_compute_sheet()
+        return payslips
+
+    def action_view_rule_profile(self):
+        """Function for opening the report of the salary rules profiled
+        for the batch, the slowest first"""
+        self.ensure_one()
+        return {
+            'name': 'Salary Rule Profile',
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.payslip.rule.profile.report',
+            'view_mode': 'list,pivot',
+            'domain': [('run_id', '=', self.id)],
+            'context': {'create': False},
+        }
+
+    def action_clear_rule_profile(self):
+        """Function for deleting the statistics of the salary rules
+        recorded for the batches"""
+        self.mapped('rule_profile_ids').unlink()
+        return True
+
+    def simulate_payroll(self, employee_ids=None, overrides=None):
+        """
+        Function for simulating the payroll of the batch period without
+        writing anything, see hr.payslip.simulate_payroll
+        @param employee_ids: ids of the employees to simulate, by default
+        the employees of the payslips of the batch or, for a batch without
+        payslips, all the employees of the company
+        @param overrides: changes of wages and rules to simulate
+        @return: returns the totals of the simulated lines by rule code,
+        department and employee
+        """
+        self.ensure_one()
+        if employee_ids is not None:
+            employees = self.env['hr.employee'].browse(employee_ids)
+        else:
+            employees = self.slip_ids.employee_id or self.env[
+                'hr.employee'].search([('company_id', '=',
+                                        self.env.company.id)])
+        return self.env['hr.payslip'].simulate_payroll(
+            employees, self.date_start, self.date_end, overrides=overrides,
+            credit_note=self.credit_note)
+
+    def action_compute_sheet(self):
+        """Function for computing all the draft payslips of the batches
+        at once"""
+        self.mapped('slip_ids').filtered(
+            lambda slip: slip.state == 'draft').action_compute_sheet()
+        return True
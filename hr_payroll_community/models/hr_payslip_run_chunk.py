@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#    A part of Open HRMS Project <https://www.openhrms.com>
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class HrPayslipRunChunk(models.Model):
+    """Create new model for the chunks of employees whose payslips are
+    generated in the background for a Payslip Batch"""
+    _name = 'hr.payslip.run.chunk'
+    _description = 'Payslip Batch Generation Chunk'
+    _order = 'run_id, id'
+
+    run_id = fields.Many2one('hr.payslip.run', string='Payslip Batch',
+                             required=True, index=True, ondelete='cascade',
+                             help="Payslip Batch the payslips are generated "
+                                  "for")
+    employee_ids = fields.Many2many('hr.employee',
+                                    'hr_payslip_run_chunk_employee_rel',
+                                    'chunk_id', 'employee_id',
+                                    string='Employees',
+                                    help="Employees of the chunk")
+    employee_count = fields.Integer(string='Employee Count',
+                                    compute='_compute_employee_count',
+                                    store=True,
+                                    help="Number of employees of the chunk")
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True,
+        help="* Pending: the payslips of the chunk remain to be generated."
+             "\n* Done: the payslips of the chunk are generated."
+             "\n* Failed: the generation failed, it can be retried from the "
+             "Payslip Batch.")
+    error = fields.Text(string='Error', readonly=True,
+                        help="Reason of the last failure of the chunk")
+
+    @api.depends('employee_ids')
+    def _compute_employee_count(self):
+        """Compute function for the number of employees of the chunk"""
+        for chunk in self:
+            chunk.employee_count = len(chunk.employee_ids)
+
+    @api.model
+    def _cron_generate_payslips(self):
+        """Function called by the generation workers: claim the pending
+        chunks one by one, skipping the chunks claimed by the other
+        workers, and generate their payslips each in its own transaction
+        so that the chunks already done are kept if a later one fails"""
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM hr_payslip_run_chunk
+                WHERE state = 'pending'
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED""")
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            chunk = self.browse(row[0])
+            try:
+                chunk.run_id._generate_payslips(chunk.employee_ids)
+                chunk.write({'state': 'done', 'error': False})
+                self.env.cr.commit()
+            except Exception as error:
+                self.env.cr.rollback()
+                _logger.exception("Generation of payslips chunk %s failed",
+                                  chunk.id)
+                # the lock was released by the rollback, claim the chunk
+                # again unless another worker took it meanwhile
+                self.env.cr.execute("""
+                    SELECT id FROM hr_payslip_run_chunk
+                    WHERE id = %s AND state = 'pending'
+                    FOR UPDATE SKIP LOCKED""", (chunk.id,))
+                if self.env.cr.fetchone():
+                    chunk.write({'state': 'failed', 'error': str(error)})
+                self.env.cr.commit()
@@ -20,10 +20,55 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import api, fields, models, _
+import functools
+import hashlib
+import keyword
+import re
+
+from odoo import api, fields, models, tools, _
 from odoo.addons import decimal_precision as dp
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools.safe_eval import _BUILTINS, _SAFE_OPCODES, check_values, \
+    test_expr
+
+# Fields of a salary rule holding python evaluated in the sandbox
+RULE_CODE_FIELDS = ('condition_python', 'condition_range', 'quantity',
+                    'amount_percentage_base', 'amount_python_compute')
+# Fields of a salary rule used to build the rule plans of the structures
+RULE_PLAN_FIELDS = ('sequence', 'active', 'parent_rule_id', 'child_ids')
+# Expressions read without evaluation: a number or a dotted name
+SIMPLE_EXPRESSION_RE = re.compile(
+    r'\s*(?:(?P<number>[-+]?(?:(?:0|[1-9]\d*)(?:\.\d*)?|\.\d+))'
+    r'|(?P<path>[A-Za-z]\w*(?:\.[A-Za-z]\w*)*))\s*')
+
+
+@functools.lru_cache(maxsize=1024)
+def get_simple_accessor(source):
+    """
+    @param source: python expression of a salary rule
+    @return: returns a function reading the value of the expression from
+    the localdict when it is a number or a dotted name (like contract.wage),
+    None otherwise. The function raises when the value cannot be read, the
+    expression is then to be evaluated to get the error of the rule.
+    """
+    match = source and SIMPLE_EXPRESSION_RE.fullmatch(source)
+    if not match:
+        return None
+    if match.group('number'):
+        value = float(match.group('number'))
+        if '.' not in match.group('number'):
+            value = int(value)
+        return lambda localdict: value
+    name, *attrs = match.group('path').split('.')
+    if any(keyword.iskeyword(part) for part in [name] + attrs):
+        return None
+
+    def accessor(localdict):
+        value = localdict[name]
+        for attr in attrs:
+            value = getattr(value, attr)
+        return value
+    return accessor
 
 
 class HrSalaryRule(models.Model):
@@ -159,6 +204,62 @@ class HrSalaryRule(models.Model):
                 _('Error! You cannot create recursive hierarchy '
                   'of Salary Rules.'))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop the cached rule plans when a child rule is created"""
+        rules = super(HrSalaryRule, self).create(vals_list)
+        # payslip lines inherit this model, creating them changes no plan
+        if self._name == 'hr.salary.rule' and any(
+                vals.get('parent_rule_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return rules
+
+    def write(self, vals):
+        """Drop the cached rule plans when the place of the rules in the
+        rule tree changes. Edited code needs no clearing: the compiled code
+        is cached by the digest of its source."""
+        res = super(HrSalaryRule, self).write(vals)
+        if self._name == 'hr.salary.rule' and any(
+                fname in vals for fname in RULE_PLAN_FIELDS):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        """Drop the cached rule plans containing the deleted rules"""
+        res = super(HrSalaryRule, self).unlink()
+        # payslip lines inherit this model, deleting them changes no plan
+        if self._name == 'hr.salary.rule':
+            self.env.registry.clear_cache()
+        return res
+
+    @tools.ormcache('rule_id', 'fname', 'digest', 'mode')
+    def _get_compiled_code(self, rule_id, fname, digest, mode, source):
+        """
+        Check the source against the opcodes allowed by the sandbox and
+        compile it, once per rule and version of the source.
+        Invalid code raises here and is never cached.
+        """
+        return test_expr(source, _SAFE_OPCODES, mode=mode)
+
+    def _eval_rule_code(self, fname, localdict, mode='eval'):
+        """
+        Evaluate the code stored in the field fname like safe_eval does,
+        reusing the code compiled for the rule.
+        @param fname: one of RULE_CODE_FIELDS
+        @param localdict: the evaluation context, updated in place in 'exec'
+        mode (like safe_eval with nocopy=True)
+        @return: the value of the expression in 'eval' mode
+        """
+        self.ensure_one()
+        source = self[fname]
+        digest = hashlib.sha1(source.encode()).hexdigest()
+        code = self._get_compiled_code(self._origin.id, fname, digest, mode,
+                                       source)
+        globals_dict = localdict if mode == 'exec' else dict(localdict)
+        check_values(globals_dict)
+        globals_dict['__builtins__'] = dict(_BUILTINS)
+        return eval(code, globals_dict)
+
     def _recursive_search_of_rules(self):
         """
         @return: returns a list of tuple (id, sequence) which are all the
@@ -183,7 +284,7 @@ class HrSalaryRule(models.Model):
             if rec.amount_select == 'fix':
                 try:
                     return rec.amount_fix, float(
-                        safe_eval(rec.quantity, localdict)), 100.0
+                        rec._eval_rule_code('quantity', localdict)), 100.0
                 except:
                     raise UserError(
                         _('Wrong quantity defined for salary rule %s (%s).') % (
@@ -191,8 +292,9 @@ class HrSalaryRule(models.Model):
             elif rec.amount_select == 'percentage':
                 try:
                     return (
-                        float(safe_eval(rec.amount_percentage_base, localdict)),
-                        float(safe_eval(rec.quantity, localdict)),
+                        float(rec._eval_rule_code('amount_percentage_base',
+                                                  localdict)),
+                        float(rec._eval_rule_code('quantity', localdict)),
                         rec.amount_percentage)
                 except:
                     raise UserError(
@@ -201,8 +303,8 @@ class HrSalaryRule(models.Model):
                             rec.name, rec.code))
             else:
                 try:
-                    safe_eval(rec.amount_python_compute, localdict, mode='exec',
-                              nocopy=True)
+                    rec._eval_rule_code('amount_python_compute', localdict,
+                                        mode='exec')
                     return (float(localdict['result']),
                             'result_qty' in localdict and
                             localdict['result_qty'] or 1.0, 'result_rate'
@@ -213,6 +315,91 @@ class HrSalaryRule(models.Model):
                           'rule %s (%s).') % (
                             rec.name, rec.code))
 
+    def _get_condition_evaluator(self):
+        """
+        @return: returns a function of the localdict behaving like
+        _satisfy_condition, which reads range conditions on a number or a
+        dotted name without evaluating them
+        """
+        self.ensure_one()
+        if self.condition_select == 'none':
+            return lambda localdict: True
+        accessor = self.condition_select == 'range' and get_simple_accessor(
+            self.condition_range)
+        if not accessor:
+            return self._satisfy_condition
+        range_min = self.condition_range_min
+        range_max = self.condition_range_max
+
+        def satisfy_condition(localdict):
+            try:
+                return range_min <= accessor(localdict) <= range_max or False
+            except Exception:
+                return self._satisfy_condition(localdict)
+        return satisfy_condition
+
+    def _get_amount_evaluator(self):
+        """
+        @return: returns a function of the localdict behaving like
+        _compute_rule, which reads the base and quantity of fixed and
+        percentage rules on a number or a dotted name without evaluating
+        them
+        """
+        self.ensure_one()
+        quantity = self.amount_select in ('fix', 'percentage') and \
+            get_simple_accessor(self.quantity)
+        if quantity and self.amount_select == 'fix':
+            amount_fix = self.amount_fix
+
+            def compute_rule(localdict):
+                try:
+                    return amount_fix, float(quantity(localdict)), 100.0
+                except Exception:
+                    return self._compute_rule(localdict)
+            return compute_rule
+        base = quantity and get_simple_accessor(self.amount_percentage_base)
+        if base:
+            percentage = self.amount_percentage
+
+            def compute_rule(localdict):
+                try:
+                    return (float(base(localdict)),
+                            float(quantity(localdict)), percentage)
+                except Exception:
+                    return self._compute_rule(localdict)
+            return compute_rule
+        return self._compute_rule
+
+    def _get_line_values(self):
+        """
+        @return: returns the values of the payslip lines of the rule which
+        do not depend on the contract
+        """
+        self.ensure_one()
+        values = {
+            'salary_rule_id': self._origin.id,
+            'name': self.name,
+            'code': self.code,
+            'category_id': self.category_id.id,
+            'sequence': self.sequence,
+            'appears_on_payslip': self.appears_on_payslip,
+            'condition_select': self.condition_select,
+            'condition_python': self.condition_python,
+            'condition_range': self.condition_range,
+            'condition_range_min': self.condition_range_min,
+            'condition_range_max': self.condition_range_max,
+            'amount_select': self.amount_select,
+            'amount_fix': self.amount_fix,
+            'amount_python_compute': self.amount_python_compute,
+            'amount_percentage': self.amount_percentage,
+            'amount_percentage_base': self.amount_percentage_base,
+            'register_id': self.register_id.id,
+        }
+        if self.env['ir.config_parameter'].sudo().get_param(
+                'hr_payroll_community.payslip_line_skip_rule_code'):
+            values.update(condition_python='', amount_python_compute=False)
+        return values
+
     def _satisfy_condition(self, localdict):
         """
         @param localdict: id of hr_contract to be tested
@@ -224,7 +411,7 @@ class HrSalaryRule(models.Model):
             return True
         elif self.condition_select == 'range':
             try:
-                result = safe_eval(self.condition_range, localdict)
+                result = self._eval_rule_code('condition_range', localdict)
                 return (
                             self.condition_range_min <= result <= self.condition_range_max or False)
             except:
@@ -234,8 +421,8 @@ class HrSalaryRule(models.Model):
                         self.name, self.code))
         else:  # python code
             try:
-                safe_eval(self.condition_python, localdict, mode='exec',
-                          nocopy=True)
+                self._eval_rule_code('condition_python', localdict,
+                                     mode='exec')
                 return 'result' in localdict and localdict['result'] or False
             except:
                 raise UserError(
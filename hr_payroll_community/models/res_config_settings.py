@@ -35,3 +35,8 @@ class ResConfigSettings(models.TransientModel):
                                                help="Is Belgium Payroll")
     module_l10n_in_hr_payroll = fields.Boolean(string='Indian Payroll',
                                                help="Is Indian Payroll")
+    payslip_line_skip_rule_code = fields.Boolean(
+        string='Keep Rule Code off Payslip Lines',
+        config_parameter='hr_payroll_community.payslip_line_skip_rule_code',
+        help="If its checked, the python condition and code of the salary "
+             "rules are not copied onto the computed payslip lines.")
@@ -48,8 +48,21 @@ class ResourceMixin(models.AbstractModel):
             Returns a dict {'days': n, 'hours': h} containing the
             quantity of working time expressed as days and as hours.
         """
-        resource = self.resource_id
         calendar = calendar or self.resource_calendar_id
+        return self._get_work_days_data_batch(
+            from_datetime, to_datetime, calendar,
+            compute_leaves=compute_leaves, domain=domain)[self.id]
+
+    def _get_work_days_data_batch(self, from_datetime, to_datetime, calendar,
+                                  compute_leaves=True, domain=None):
+        """
+            Same as get_work_days_data for all the records working with the
+            given calendar, the attendances and leaves of their resources
+            being fetched at once.
+
+            Returns a dict {record.id: {'days': n, 'hours': h}}.
+        """
+        resources = self.mapped('resource_id')
         # naive datetime are made explicit in UTC
         if not from_datetime.tzinfo:
             from_datetime = from_datetime.replace(tzinfo=utc)
@@ -59,30 +72,60 @@ class ResourceMixin(models.AbstractModel):
         # in order to compute the total hours on the first and last days
         from_full = from_datetime - timedelta(days=1)
         to_full = to_datetime + timedelta(days=1)
-        intervals = calendar._attendance_intervals_batch(from_full, to_full,
-                                                         resource)
-        day_total = defaultdict(float)
-        for start, stop, meta in intervals[resource.id]:
-            day_total[start.date()] += (stop - start).total_seconds() / 3600
+        full_intervals = calendar._attendance_intervals_batch(
+            from_full, to_full, resources)
         # actual hours per day
         if compute_leaves:
-            intervals = calendar._work_intervals_batch(from_datetime,
-                                                       to_datetime, resource,
-                                                       domain)
+            work_intervals = calendar._work_intervals_batch(
+                from_datetime, to_datetime, resources, domain)
         else:
-            intervals = calendar._attendance_intervals_batch(from_datetime,
-                                                             to_datetime,
-                                                             resource)
-        day_hours = defaultdict(float)
-        for start, stop, meta in intervals[resource.id]:
-            day_hours[start.date()] += (stop - start).total_seconds() / 3600
-        # compute number of days as quarters
-        days = sum(
-            float_utils.round(ROUNDING_FACTOR * day_hours[day] / day_total[
-                day]) / ROUNDING_FACTOR
-            for day in day_hours
-        )
-        return {
-            'days': days,
-            'hours': sum(day_hours.values()),
-        }
+            work_intervals = calendar._attendance_intervals_batch(
+                from_datetime, to_datetime, resources)
+        result = {}
+        for record in self:
+            resource = record.resource_id
+            day_total = defaultdict(float)
+            for start, stop, meta in full_intervals[resource.id]:
+                day_total[start.date()] += (stop - start).total_seconds() / 3600
+            day_hours = defaultdict(float)
+            for start, stop, meta in work_intervals[resource.id]:
+                day_hours[start.date()] += (stop - start).total_seconds() / 3600
+            # compute number of days as quarters
+            days = sum(
+                float_utils.round(ROUNDING_FACTOR * day_hours[day] / day_total[
+                    day]) / ROUNDING_FACTOR
+                for day in day_hours
+            )
+            result[record.id] = {
+                'days': days,
+                'hours': sum(day_hours.values()),
+            }
+        return result
+
+    def _list_leaves_batch(self, from_datetime, to_datetime, calendar,
+                           domain=None):
+        """
+            Same as list_leaves for all the records working with the given
+            calendar, the attendances and leaves of their resources being
+            fetched at once.
+
+            Returns a dict {record.id: [(day, hours, leaves)]}.
+        """
+        resources = self.mapped('resource_id')
+        # naive datetime are made explicit in UTC
+        if not from_datetime.tzinfo:
+            from_datetime = from_datetime.replace(tzinfo=utc)
+        if not to_datetime.tzinfo:
+            to_datetime = to_datetime.replace(tzinfo=utc)
+        attendances = calendar._attendance_intervals_batch(
+            from_datetime, to_datetime, resources)
+        leaves = calendar._leave_intervals_batch(
+            from_datetime, to_datetime, resources, domain)
+        result = {}
+        for record in self:
+            resource = record.resource_id
+            result[record.id] = [
+                (start.date(), (stop - start).total_seconds() / 3600, leave)
+                for start, stop, leave in (
+                    leaves[resource.id] & attendances[resource.id])]
+        return result
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_hr_payslip_aggregate
+from . import test_hr_payslip_fingerprint
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests.common import TransactionCase
+
+
+class HrPayrollCommon(TransactionCase):
+    """Employee with a running contract and a structure with a basic salary
+    rule and a year to date rule summing the basic salaries of the done
+    payslips of the year"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['hr.salary.rule.category'].create({
+            'name': 'Basic',
+            'code': 'BASIC',
+        })
+        rules = cls.env['hr.salary.rule'].create([{
+            'name': 'Basic Salary',
+            'code': 'BASIC',
+            'category_id': cls.category.id,
+            'sequence': 1,
+            'amount_select': 'code',
+            'amount_python_compute': 'result = contract.wage',
+        }, {
+            'name': 'Year to Date Basic',
+            'code': 'YTD_BASIC',
+            'category_id': cls.category.id,
+            'sequence': 2,
+            'amount_select': 'code',
+            'amount_python_compute':
+                "result = payslip.sum('BASIC', "
+                "payslip.date_from.replace(month=1, day=1), "
+                "payslip.date_to)",
+        }])
+        cls.structure = cls.env['hr.payroll.structure'].create({
+            'name': 'Test Structure',
+            'code': 'TEST',
+            'parent_id': False,
+            'rule_ids': [(6, 0, rules.ids)],
+        })
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Test Employee',
+        })
+        cls.contract = cls.env['hr.contract'].create({
+            'name': 'Test Contract',
+            'employee_id': cls.employee.id,
+            'struct_id': cls.structure.id,
+            'wage': 3000.0,
+            'date_start': date(2024, 1, 1),
+            'state': 'open',
+        })
+
+    @classmethod
+    def _create_payslip(cls, date_from, date_to):
+        """Function for creating a payslip of the employee with worked days
+        and an input
+        @param date_from: Start date of the payslip
+        @param date_to: End date of the payslip
+        @return: The payslip"""
+        return cls.env['hr.payslip'].create({
+            'name': 'Test Payslip',
+            'employee_id': cls.employee.id,
+            'contract_id': cls.contract.id,
+            'struct_id': cls.structure.id,
+            'date_from': date_from,
+            'date_to': date_to,
+            'worked_days_line_ids': [(0, 0, {
+                'name': 'Normal Working Days',
+                'code': 'WORK100',
+                'contract_id': cls.contract.id,
+                'number_of_days': 20.0,
+                'number_of_hours': 160.0,
+            })],
+            'input_line_ids': [(0, 0, {
+                'name': 'Bonus',
+                'code': 'BONUS',
+                'contract_id': cls.contract.id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'amount': 250.0,
+            })],
+        })
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import HrPayrollCommon
+from ..models.hr_payslip import InputLine, Payslips, WorkedDays
+
+
+@tagged('post_install', '-at_install')
+class TestHrPayslipAggregate(HrPayrollCommon):
+    """Sums of the done payslips kept by the payslip aggregates"""
+
+    def _get_aggregates(self):
+        """Function for reading the aggregates of the employee
+        @return: Dictionary of the aggregates by kind and code"""
+        return {(aggregate.kind, aggregate.code): aggregate
+                for aggregate in self.env['hr.payslip.aggregate'].search(
+                    [('employee_id', '=', self.employee.id)])}
+
+    def test_payslip_done_updates_aggregates(self):
+        """Confirming a payslip adds its lines, inputs and worked days to
+        the aggregates read by the year to date sums, and resetting it
+        removes them"""
+        payslip = self._create_payslip(date(2024, 1, 1), date(2024, 1, 31))
+        payslip.action_payslip_done()
+        self.assertEqual(payslip.state, 'done')
+        aggregates = self._get_aggregates()
+        basic = aggregates['line', 'BASIC']
+        self.assertEqual(basic.amount, 3000.0)
+        self.assertEqual(basic.payslip_count, 1)
+        self.assertEqual(
+            (basic.date_from, basic.date_to),
+            (date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(aggregates['input', 'BONUS'].amount, 250.0)
+        worked_days = aggregates['worked_days', 'WORK100']
+        self.assertEqual(worked_days.number_of_days, 20.0)
+        self.assertEqual(worked_days.number_of_hours, 160.0)
+
+        year_start, year_end = date(2024, 1, 1), date(2024, 12, 31)
+        employee_id = self.employee.id
+        self.assertEqual(Payslips(employee_id, payslip, self.env).sum(
+            'BASIC', year_start, year_end), 3000.0)
+        self.assertEqual(InputLine(employee_id, {}, self.env).sum(
+            'BONUS', year_start, year_end), 250.0)
+        worked_days_sums = WorkedDays(employee_id, {}, self.env)
+        self.assertEqual(worked_days_sums.sum(
+            'WORK100', year_start, year_end), 20.0)
+        self.assertEqual(worked_days_sums.sum_hours(
+            'WORK100', year_start, year_end), 160.0)
+
+        payslip.action_payslip_draft()
+        self.assertFalse(self._get_aggregates())
+        self.assertEqual(Payslips(employee_id, payslip, self.env).sum(
+            'BASIC', year_start, year_end), 0.0)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import HrPayrollCommon
+
+
+@tagged('post_install', '-at_install')
+class TestHrPayslipFingerprint(HrPayrollCommon):
+    """Payslips computed again only when the data of their lines changed"""
+
+    def _get_amount(self, payslip, code):
+        """Function for reading the amount of a line of the payslip
+        @param payslip: The payslip
+        @param code: Code of the line
+        @return: Total of the line"""
+        return payslip.line_ids.filtered(
+            lambda line: line.code == code).total
+
+    def test_unchanged_payslip_is_skipped(self):
+        """Computing a payslip again without any change keeps its lines"""
+        payslip = self._create_payslip(date(2024, 2, 1), date(2024, 2, 29))
+        payslip.action_compute_sheet()
+        lines = payslip.line_ids
+        payslip.action_compute_sheet()
+        self.assertEqual(payslip.line_ids, lines)
+
+    def test_done_payslip_updates_year_to_date(self):
+        """Confirming an earlier payslip of the employee changes the year
+        to date sums, so the later payslip is computed again"""
+        payslip = self._create_payslip(date(2024, 2, 1), date(2024, 2, 29))
+        payslip.action_compute_sheet()
+        self.assertEqual(self._get_amount(payslip, 'YTD_BASIC'), 0.0)
+        self._create_payslip(
+            date(2024, 1, 1), date(2024, 1, 31)).action_payslip_done()
+        payslip.action_compute_sheet()
+        self.assertEqual(self._get_amount(payslip, 'YTD_BASIC'), 3000.0)
+
+    def test_rule_category_change_recomputes(self):
+        """Moving the category of the rules under a parent category computes
+        the payslip again"""
+        payslip = self._create_payslip(date(2024, 2, 1), date(2024, 2, 29))
+        payslip.action_compute_sheet()
+        lines = payslip.line_ids
+        self.category.parent_id = self.env['hr.salary.rule.category'].create({
+            'name': 'Gross',
+            'code': 'GROSS',
+        })
+        payslip.action_compute_sheet()
+        self.assertNotEqual(payslip.line_ids, lines)
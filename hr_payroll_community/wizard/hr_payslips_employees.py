@@ -34,40 +34,28 @@ class HrPayslipEmployees(models.TransientModel):
                                     'payslip_id',
                                     'employee_id', 'Employees',
                                     help="Choose employee for Payslip")
+    generate_in_background = fields.Boolean(
+        string='Generate in Background',
+        help="Split the employees in chunks whose payslips are generated "
+             "and computed in the background by several workers, each "
+             "chunk in its own transaction. The progress is shown on the "
+             "Payslip Batch, where the failed chunks can be retried.")
+    chunk_size = fields.Integer(string='Chunk Size', default=100,
+                                help="Number of employees per chunk")
 
     def action_compute_sheet(self):
         """Function for compute Payslip Sheet"""
-        payslips = self.env['hr.payslip']
         [data] = self.read()
         active_id = self.env.context.get('active_id')
-        if active_id:
-            [run_data] = self.env['hr.payslip.run'].browse(active_id).read(
-                ['date_start', 'date_end', 'credit_note'])
-        from_date = run_data.get('date_start')
-        to_date = run_data.get('date_end')
+        run = self.env['hr.payslip.run'].browse(active_id)
         if not data['employee_ids']:
             raise UserError(
                 _("You must select employee(s) to generate payslip(s)."))
-        for employee in self.env['hr.employee'].browse(data['employee_ids']):
-            slip_data = (
-                self.env['hr.payslip'].onchange_employee_id(
-                    from_date, to_date, employee.id, contract_id=False))
-            res = {
-                'employee_id': employee.id,
-                'name': slip_data['value'].get('name'),
-                'struct_id': slip_data['value'].get('struct_id'),
-                'contract_id': slip_data['value'].get('contract_id'),
-                'payslip_run_id': active_id,
-                'input_line_ids': [(0, 0, x) for x in
-                                   slip_data['value'].get('input_line_ids')],
-                'worked_days_line_ids': [(0, 0, x) for x in
-                                         slip_data['value'].get(
-                                             'worked_days_line_ids')],
-                'date_from': from_date,
-                'date_to': to_date,
-                'credit_note': run_data.get('credit_note'),
-                'company_id': employee.company_id.id,
-            }
-            payslips += self.env['hr.payslip'].create(res)
-        payslips.action_compute_sheet()
+        employees = self.env['hr.employee'].browse(data['employee_ids'])
+        if self.generate_in_background:
+            if self.chunk_size < 1:
+                raise UserError(_("The chunk size must be positive."))
+            run._create_generation_chunks(employees, self.chunk_size)
+        else:
+            run._generate_payslips(employees)
         return {'type': 'ir.actions.act_window_close'}
@@ -30,6 +30,17 @@ class HrContract(models.Model):
     def get_loan_amount(self, date_from, date_to):
         """Calculate total loan deduction amount for payroll period"""
         self.ensure_one()
+        entries = self._get_payroll_prefetch_entries('loan', date_from,
+                                                     date_to)
+        if entries is not None:
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+            total_deduction = 0.0
+            for loan_id, lines in entries:
+                total_deduction += sum(
+                    amount for line_id, date, amount in lines
+                    if date_from <= date <= date_to)
+            return total_deduction
         
         # Search for approved loans for this employee
         loans = self.env['hr.loan'].search([
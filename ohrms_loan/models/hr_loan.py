@@ -101,8 +101,8 @@ class HrLoan(models.Model):
 
     def _compute_total_amount(self):
         """ Compute total loan amount,balance amount and total paid amount"""
-        total_paid = 0.0
         for loan in self:
+            total_paid = 0.0
             for line in loan.loan_lines:
                 if line.paid:
                     total_paid += line.amount
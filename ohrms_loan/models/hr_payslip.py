@@ -20,6 +20,8 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from collections import defaultdict
+
 from odoo import models
 
 
@@ -28,31 +30,103 @@ class HrPayslip(models.Model):
     additional functionality related to employee loans."""
     _inherit = 'hr.payslip'
 
+    def _get_payroll_prefetch(self):
+        """ Add the unpaid installments of the approved loans of the
+        employees over the period, as (loan id, [(line id, date, amount)])
+        by employee in the order of the loans, read by
+        hr.contract.get_loan_amount"""
+        prefetch = super(HrPayslip, self)._get_payroll_prefetch()
+        if not self:
+            return prefetch
+        loans = self.env['hr.loan'].search_fetch([
+            ('employee_id', 'in', self.employee_id.ids),
+            ('state', '=', 'approve'),
+            ('company_id', 'in', self.env.companies.ids),
+        ], ['employee_id'])
+        lines_by_loan = defaultdict(list)
+        for line in self.env['hr.loan.line'].search_fetch([
+                ('loan_id', 'in', loans.ids),
+                ('date', '>=', prefetch['date_from']),
+                ('date', '<=', prefetch['date_to']),
+                ('paid', '=', False)], ['loan_id', 'date', 'amount']):
+            lines_by_loan[line.loan_id.id].append(
+                (line.id, line.date, line.amount))
+        prefetch['loan'] = defaultdict(list)
+        for loan in loans:
+            prefetch['loan'][loan.employee_id.id].append(
+                (loan.id, lines_by_loan[loan.id]))
+        return prefetch
+
+    def _get_fingerprint_data(self, contracts_by_payslip, rules_by_payslip):
+        """ Add the unpaid installments of the approved loans in the period,
+        which the salary rules get through hr.contract.get_loan_amount"""
+        data = super(HrPayslip, self)._get_fingerprint_data(
+            contracts_by_payslip, rules_by_payslip)
+        if not self:
+            return data
+        prefetch = self.env.context.get('payroll_prefetch') or \
+            self._get_payroll_prefetch()
+        for payslip in self:
+            data[payslip.id].append(sorted(
+                (line_id, amount)
+                for loan_id, lines
+                in prefetch['loan'].get(payslip.employee_id.id, [])
+                for line_id, date, amount in lines
+                if payslip.date_from <= date <= payslip.date_to))
+        return data
+
     def action_payslip_done(self):
         """ Mark loan lines as paid when payslip is confirmed"""
         result = super(HrPayslip, self).action_payslip_done()
-        
-        # Mark loan lines as paid for this payroll period
-        for payslip in self:
-            if payslip.employee_id and payslip.contract_id:
-                # Find approved loans for this employee
-                loans = self.env['hr.loan'].search([
-                    ('employee_id', '=', payslip.employee_id.id),
-                    ('state', '=', 'approve'),
-                    ('company_id', 'in', self.env.companies.ids),
-                ])
-                
-                for loan in loans:
-                    # Find loan lines within the payroll period that are not yet paid
-                    loan_lines = loan.loan_lines.filtered(
-                        lambda line: (
-                            payslip.date_from <= line.date <= payslip.date_to and 
-                            not line.paid
-                        )
-                    )
-                    # Mark them as paid
-                    loan_lines.write({'paid': True})
-                    # Recompute loan totals
-                    loan._compute_total_amount()
-        
+        self._settle_loan_lines()
         return result
+
+    def _settle_loan_lines(self):
+        """ Mark paid, with one statement for all the payslips, the unpaid
+        installments of the approved loans of their employees falling in
+        their periods, and recompute the totals of the loans concerned.
+        The loans are locked first, so a concurrent confirmation of the same
+        employees waits and then fails to serialize instead of settling the
+        same installments twice; it is retried and finds them paid.
+        @return: returns the settled loan lines"""
+        payslips = self.filtered(
+            lambda payslip: payslip.employee_id and payslip.contract_id)
+        if not payslips:
+            return self.env['hr.loan.line']
+        self.env['hr.payslip'].flush_model(
+            ['employee_id', 'contract_id', 'date_from', 'date_to'])
+        self.env['hr.loan'].flush_model(['employee_id', 'state',
+                                         'company_id'])
+        self.env['hr.loan.line'].flush_model(['loan_id', 'date', 'paid',
+                                              'payslip_id'])
+        self.env.cr.execute("""
+            SELECT id FROM hr_loan
+            WHERE employee_id IN %s AND state = 'approve'
+              AND company_id IN %s
+            ORDER BY id
+            FOR UPDATE""", (tuple(payslips.employee_id.ids),
+                            tuple(self.env.companies.ids)))
+        loan_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not loan_ids:
+            return self.env['hr.loan.line']
+        self.env.cr.execute("""
+            UPDATE hr_loan_line line
+            SET paid = TRUE, payslip_id = slip.id,
+                write_uid = %s, write_date = NOW() AT TIME ZONE 'UTC'
+            FROM hr_loan loan, hr_payslip slip
+            WHERE line.loan_id = loan.id
+              AND loan.id IN %s
+              AND slip.id IN %s
+              AND slip.employee_id = loan.employee_id
+              AND line.date BETWEEN slip.date_from AND slip.date_to
+              AND line.paid IS NOT TRUE
+            RETURNING line.id, line.loan_id""", (
+            self.env.uid, tuple(loan_ids), tuple(payslips.ids)))
+        rows = self.env.cr.fetchall()
+        lines = self.env['hr.loan.line'].browse([row[0] for row in rows])
+        lines.invalidate_recordset(['paid', 'payslip_id', 'write_uid',
+                                    'write_date'])
+        # Recompute loan totals
+        self.env['hr.loan'].browse(
+            sorted({row[1] for row in rows}))._compute_total_amount()
+        return lines
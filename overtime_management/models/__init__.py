@@ -1 +1 @@
-from . import overtime, overtime_type, lunch_time_configuration
+from . import overtime, overtime_type, lunch_time_configuration, hr_payslip
@@ -0,0 +1,49 @@
+from collections import defaultdict
+from datetime import datetime, time
+
+from odoo import models
+
+
+class HrPayslip(models.Model):
+    _inherit = 'hr.payslip'
+
+    def _get_payroll_prefetch(self):
+        """Add the approved overtimes of the employees over the period, as
+        (id, start, end, amount) by employee, read by
+        hr.contract.get_overtime_amount"""
+        prefetch = super()._get_payroll_prefetch()
+        if not self:
+            return prefetch
+        overtimes = self.env['employee.overtime'].search_fetch([
+            ('employee_id', 'in', self.employee_id.ids),
+            ('state', '=', 'hr_approved'),
+            ('start_datetime', '<=', prefetch['date_to']),
+            ('end_datetime', '>=', prefetch['date_from']),
+            ('company_id', 'in', self.env.companies.ids),
+        ], ['employee_id', 'start_datetime', 'end_datetime', 'amount_birr'])
+        prefetch['overtime'] = defaultdict(list)
+        for overtime in overtimes:
+            prefetch['overtime'][overtime.employee_id.id].append((
+                overtime.id, overtime.start_datetime, overtime.end_datetime,
+                overtime.amount_birr))
+        return prefetch
+
+    def _get_fingerprint_data(self, contracts_by_payslip, rules_by_payslip):
+        """Add the approved overtimes of the period, which the salary rules
+        get through hr.contract.get_overtime_amount"""
+        data = super()._get_fingerprint_data(contracts_by_payslip,
+                                             rules_by_payslip)
+        if not self:
+            return data
+        prefetch = self.env.context.get('payroll_prefetch') or \
+            self._get_payroll_prefetch()
+        for payslip in self:
+            # dates are compared to datetimes as midnight, like in a domain
+            date_from = datetime.combine(payslip.date_from, time.min)
+            date_to = datetime.combine(payslip.date_to, time.min)
+            data[payslip.id].append(sorted(
+                (overtime_id, amount)
+                for overtime_id, start, end, amount
+                in prefetch['overtime'].get(payslip.employee_id.id, [])
+                if start <= date_to and end >= date_from))
+        return data
@@ -1,15 +1,33 @@
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta, time
 import logging
+import psycopg2
+from pytz import timezone as pytz_timezone, UTC
 
 _logger = logging.getLogger(__name__)
 
+
+def _float_to_time(float_time):
+    """Convert float time (e.g., 12.5) to time object (12:30)"""
+    hours = int(float_time)
+    minutes = int((float_time - hours) * 60)
+    return time(hours, minutes)
+
+
 class HrContract(models.Model):
     _inherit = 'hr.contract'
 
     def get_overtime_amount(self, date_from, date_to):
         self.ensure_one()
+        entries = self._get_payroll_prefetch_entries(
+            'overtime', date_from, date_to)
+        if entries is not None:
+            # dates are compared to datetimes as midnight, like in a domain
+            date_from = fields.Datetime.to_datetime(date_from)
+            date_to = fields.Datetime.to_datetime(date_to)
+            return sum(amount for overtime_id, start, end, amount in entries
+                       if start <= date_to and end >= date_from)
         overtimes = self.env['employee.overtime'].search([
             ('employee_id', '=', self.employee_id.id),
             ('state', '=', 'hr_approved'),
@@ -49,6 +67,29 @@ class EmployeeOvertime(models.Model):
         ('rejected', 'Rejected')
     ], default='draft', tracking=True)
 
+    # the GiST index of the constraint also serves _get_overlapping_pairs
+    _sql_constraints = [
+        ('no_overlap',
+         "EXCLUDE USING gist (employee_id WITH =, "
+         "tsrange(start_datetime, end_datetime) WITH &&) "
+         "WHERE (state NOT IN ('draft', 'rejected') "
+         "AND start_datetime < end_datetime)",
+         'Overlapping overtime entries detected for an employee.'),
+    ]
+
+    def init(self):
+        # btree_gist provides the equality operator class on employee_id
+        # needed by the exclusion constraint, added after the models init
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except psycopg2.Error:
+            _logger.warning("Unable to create the btree_gist extension, overlapping overtime entries are only checked by the application.")
+            tools.create_index(
+                self.env.cr, 'employee_overtime_period_gist_index', self._table,
+                ['tsrange(start_datetime, end_datetime)'], method='gist',
+                where="state NOT IN ('draft', 'rejected') AND start_datetime < end_datetime")
+
     @api.model
     def create(self, vals):
         if vals.get('name', _('New')) == _('New'):
@@ -61,113 +102,126 @@ class EmployeeOvertime(models.Model):
         Uses company-specific lunch configuration instead of hardcoded times.
         Handles timezone conversion properly by converting to user's timezone.
         """
-        # Get approved and active lunch configuration for the company
-        lunch_config = self.env['lunch.time.configuration'].search([
-            ('company_id', '=', self.company_id.id),
-            ('state', '=', 'approved'),
-            ('is_active_config', '=', True),
-        ], limit=1)
-        
+        lunch_config = self._get_lunch_configs(self.company_id)[self.company_id.id]
         if not lunch_config:
-            _logger.warning(f"No approved and active lunch time configuration found for company {self.company_id.name}. No lunch hours will be deducted.")
+            _logger.warning("No approved and active lunch time configuration found for company %s. No lunch hours will be deducted.", self.company_id.name)
             return 0.0
-        
-        # Convert datetime from UTC to user's local timezone
-        # Odoo stores datetimes in UTC, so we need to convert to local time for comparison
-        from pytz import timezone as pytz_timezone, UTC
-        user_tz = self.env.user.tz or 'UTC'
-        local_tz = pytz_timezone(user_tz)
-        
-        _logger.info(f"Original start_dt: {start_dt}, tzinfo: {start_dt.tzinfo}")
-        _logger.info(f"Original end_dt: {end_dt}, tzinfo: {end_dt.tzinfo}")
-        _logger.info(f"User timezone: {user_tz}")
-        
+        return self._compute_lunch_overlap(
+            start_dt, end_dt, lunch_config, self._get_local_timezone())
+
+    @api.model
+    def _get_lunch_configs(self, companies):
+        """
+        Approved and active lunch time configuration of each company, read
+        with one search: dict mapping company ids to a configuration or to
+        an empty recordset.
+        """
+        configs = dict.fromkeys(companies.ids, self.env['lunch.time.configuration'])
+        for config in self.env['lunch.time.configuration'].search([
+            ('company_id', 'in', companies.ids),
+            ('state', '=', 'approved'),
+            ('is_active_config', '=', True),
+        ]):
+            # the first one in the order of the model, as search with limit=1
+            if not configs[config.company_id.id]:
+                configs[config.company_id.id] = config
+        return configs
+
+    @api.model
+    def _get_local_timezone(self):
+        # Odoo stores datetimes in UTC, the lunch times are in the user's timezone
+        return pytz_timezone(self.env.user.tz or 'UTC')
+
+    @api.model
+    def _compute_lunch_overlap(self, start_dt, end_dt, lunch_config, local_tz):
+        """
+        Hours of the span between start_dt and end_dt (UTC) overlapping the
+        daily lunch time of the configuration, computed from the first and
+        last days: all the days in between overlap the whole lunch time.
+        """
         # If datetime is naive (no timezone), assume it's UTC
         if start_dt.tzinfo is None:
             start_dt = UTC.localize(start_dt)
         if end_dt.tzinfo is None:
             end_dt = UTC.localize(end_dt)
-        
         # Convert to local timezone and remove timezone info
         start_dt = start_dt.astimezone(local_tz).replace(tzinfo=None)
         end_dt = end_dt.astimezone(local_tz).replace(tzinfo=None)
-        
-        total_lunch_hours = 0.0
-        current_date = start_dt.date()
-        _logger.info(f"start_dt (local, naive): {start_dt}, end_dt (local, naive): {end_dt}")
-        _logger.info(f"Using lunch config: {lunch_config.name}, start: {lunch_config.lunch_start_time}, end: {lunch_config.lunch_end_time}")
-
-        # Convert float time to time object
-        def float_to_time(float_time):
-            """Convert float time (e.g., 12.5) to time object (12:30)"""
-            hours = int(float_time)
-            minutes = int((float_time - hours) * 60)
-            return time(hours, minutes)
-
-        lunch_start_time = float_to_time(lunch_config.lunch_start_time)
-        lunch_end_time = float_to_time(lunch_config.lunch_end_time)
-
-        while current_date <= end_dt.date():
-            # Create naive datetime objects (no timezone)
-            lunch_start = datetime.combine(current_date, lunch_start_time)
-            lunch_end = datetime.combine(current_date, lunch_end_time)
-            _logger.info(f"current_date: {current_date}, lunch_start: {lunch_start}, lunch_end: {lunch_end}")
-
-            # Check if overtime overlaps lunch period
-            latest_start = max(start_dt, lunch_start)
-            earliest_end = min(end_dt, lunch_end)
-            _logger.info(f"latest_start: {latest_start}, earliest_end: {earliest_end}")
 
-            if latest_start < earliest_end:
-                # Calculate only the overlapping portion
-                overlap = (earliest_end - latest_start).total_seconds() / 3600.0
-                _logger.info(f"overlap: {overlap}")
-                total_lunch_hours += overlap
-            else:
-                _logger.info("No overlap detected")
+        lunch_start_time = _float_to_time(lunch_config.lunch_start_time)
+        lunch_end_time = _float_to_time(lunch_config.lunch_end_time)
 
-            current_date += timedelta(days=1)
+        def day_overlap(day):
+            # Check if overtime overlaps lunch period of the day
+            latest_start = max(start_dt, datetime.combine(day, lunch_start_time))
+            earliest_end = min(end_dt, datetime.combine(day, lunch_end_time))
+            if latest_start < earliest_end:
+                return (earliest_end - latest_start).total_seconds() / 3600.0
+            return 0.0
 
-        _logger.info(f"total_lunch_hours: {total_lunch_hours}")
+        first_day = start_dt.date()
+        last_day = end_dt.date()
+        if last_day < first_day:
+            return 0.0
+        total_lunch_hours = day_overlap(first_day)
+        if last_day > first_day:
+            full_days = (last_day - first_day).days - 1
+            if full_days:
+                total_lunch_hours += full_days * day_overlap(
+                    first_day + timedelta(days=1))
+            total_lunch_hours += day_overlap(last_day)
         return total_lunch_hours
 
     @api.depends('start_datetime', 'end_datetime')
     def _compute_worked_hours(self):
+        lunch_configs = self._get_lunch_configs(self.company_id)
+        local_tz = self._get_local_timezone()
+        for company_id, config in lunch_configs.items():
+            if not config and any(rec.company_id.id == company_id
+                                  and rec.start_datetime and rec.end_datetime
+                                  for rec in self):
+                _logger.warning("No approved and active lunch time configuration found for company %s. No lunch hours will be deducted.", self.env['res.company'].browse(company_id).name)
         for rec in self:
             if rec.start_datetime and rec.end_datetime:
                 duration = (rec.end_datetime - rec.start_datetime).total_seconds() / 3600.0
-                lunch_hours = rec._get_lunch_hours(rec.start_datetime, rec.end_datetime)
-                _logger.info(f"duration: {duration}, lunch_hours: {lunch_hours}")
+                lunch_config = lunch_configs.get(rec.company_id.id)
+                lunch_hours = lunch_config and rec._compute_lunch_overlap(
+                    rec.start_datetime, rec.end_datetime, lunch_config,
+                    local_tz) or 0.0
                 rec.lunch_hours_deducted = lunch_hours
                 rec.worked_hours = max(0.0, duration - lunch_hours)
                 rec.worked_days = rec.worked_hours / 8.0
-                _logger.info(f"worked_hours: {rec.worked_hours}, worked_days: {rec.worked_days}")
             else:
                 rec.worked_hours = rec.worked_days = rec.lunch_hours_deducted = 0.0
+        _logger.debug("Computed the worked hours of %s overtime requests", len(self))
 
     @api.depends('worked_days', 'overtime_type_id', 'employee_id')
     def _compute_amount(self):
+        # open contract of every employee, the first one as search with limit=1
+        contracts = {}
+        for contract in self.env['hr.contract'].search([
+            ('employee_id', 'in', self.employee_id.ids),
+            ('state', '=', 'open')
+        ]):
+            contracts.setdefault(contract.employee_id.id, contract)
+        working_days_config = None
         for rec in self:
-            contract = self.env['hr.contract'].search([
-                ('employee_id', '=', rec.employee_id.id),
-                ('state', '=', 'open')
-            ], limit=1)
+            contract = contracts.get(rec.employee_id.id)
             if contract:
-                # Get approved working days config from custom_employee_module
-                working_days_config = self.env['working.days.config'].search([
-                    ('state', '=', 'approved'),
-                    ('company_id', '=', self.env.company.id)
-                ], limit=1)
-                
+                if working_days_config is None:
+                    # Get approved working days config from custom_employee_module
+                    working_days_config = self.env['working.days.config'].search([
+                        ('state', '=', 'approved'),
+                        ('company_id', '=', self.env.company.id)
+                    ], limit=1)
                 if not working_days_config:
                     raise UserError(_("No approved working days configuration found. Please configure working days first."))
                 
                 daily_wage = contract.wage / working_days_config.number_of_working_days
                 rec.amount_birr = rec.worked_days * daily_wage * rec.overtime_type_id.multiplier
-                _logger.info(f"daily_wage: {daily_wage}, multiplier: {rec.overtime_type_id.multiplier}, amount_birr: {rec.amount_birr}")
             else:
                 rec.amount_birr = 0.0
-                _logger.info("No active contract found for employee")
+        _logger.debug("Computed the amount of %s overtime requests", len(self))
 
     @api.constrains('start_datetime', 'end_datetime')
     def _check_dates(self):
@@ -175,22 +229,46 @@ class EmployeeOvertime(models.Model):
             if rec.start_datetime >= rec.end_datetime:
                 raise ValidationError("End time must be after start time.")
 
+    def _get_overlapping_pairs(self):
+        """
+        Find with one query the overtime entries overlapping the submitted
+        (neither draft nor rejected) entries of the recordset.
+        Returns a list of (entry, overlapping entry) pairs, each pair once.
+        """
+        self.flush_model(['employee_id', 'start_datetime', 'end_datetime', 'state'])
+        if not self.ids:
+            return []
+        # here we use a plain SQL query to benefit of the tsrange overlap
+        # operator, served by the GiST index of the no_overlap constraint
+        self.env.cr.execute("""
+            SELECT ot.id, other.id
+              FROM employee_overtime ot
+              JOIN employee_overtime other
+                ON other.employee_id = ot.employee_id
+               AND other.id != ot.id
+               AND other.state NOT IN ('draft', 'rejected')
+               AND other.start_datetime < other.end_datetime
+               AND tsrange(other.start_datetime, other.end_datetime)
+                   && tsrange(ot.start_datetime, ot.end_datetime)
+             WHERE ot.id IN %s
+               AND ot.state NOT IN ('draft', 'rejected')
+               AND ot.start_datetime < ot.end_datetime
+             ORDER BY ot.id, other.id
+        """, [tuple(self.ids)])
+        pairs = []
+        for overtime_id, other_id in self.env.cr.fetchall():
+            # pairs of two entries of the recordset are found both ways
+            if other_id in self._ids and other_id < overtime_id:
+                continue
+            pairs.append((self.browse(overtime_id), self.browse(other_id)))
+        return pairs
+
     @api.constrains('employee_id', 'start_datetime', 'end_datetime', 'state')
     def _check_overlap(self):
-        for rec in self:
-            if rec.state != 'draft':
-                overlapping = self.env['employee.overtime'].search([
-                    ('id', '!=', rec.id),
-                    ('employee_id', '=', rec.employee_id.id),
-                    ('state', 'not in', ['draft', 'rejected']),
-                    '|',
-                    '&', ('start_datetime', '<=', rec.start_datetime), ('end_datetime', '>', rec.start_datetime),
-                    '|',
-                    '&', ('start_datetime', '<', rec.end_datetime), ('end_datetime', '>=', rec.end_datetime),
-                    '&', ('start_datetime', '>=', rec.start_datetime), ('end_datetime', '<=', rec.end_datetime)
-                ])
-                if overlapping:
-                    raise ValidationError("Overlapping overtime entries detected for employee %s." % rec.employee_id.name)
+        pairs = self._get_overlapping_pairs()
+        if pairs:
+            employees = self.browse([overtime.id for overtime, _other in pairs]).employee_id
+            raise ValidationError("Overlapping overtime entries detected for employee %s." % ', '.join(employees.mapped('name')))
 
     def schedule_activity_for_derestrict(self, summary, note):
         for rec in self:
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import date, datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo.tests.common import TransactionCase
+
+
+class PayrollBenchmarkCommon(TransactionCase):
+    """Synthetic payroll data for the benchmarks: employees with contracts,
+    a structure with nested rules, leaves, inputs, overtimes, per diems and,
+    when ohrms_loan is installed, loans.
+
+    The number of employees is read from the PAYROLL_BENCHMARK_EMPLOYEES
+    environment variable."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.employee_count = int(
+            os.environ.get('PAYROLL_BENCHMARK_EMPLOYEES', 200))
+        cls.date_from = date.today().replace(day=1) - relativedelta(months=1)
+        cls.date_to = cls.date_from + relativedelta(months=1, days=-1)
+        cls.company = cls.env.company
+        cls.calendar = cls.company.resource_calendar_id
+        cls._generate_configuration()
+        cls.structure = cls._generate_structure()
+        cls.employees = cls._generate_employees()
+        cls.contracts = cls._generate_contracts()
+        cls._generate_leaves()
+        cls._generate_overtimes()
+        cls._generate_perdiems()
+        if 'hr.loan' in cls.env:
+            cls._generate_loans()
+        cls.run = cls.env['hr.payslip.run'].create({
+            'name': 'Benchmark %s' % cls.date_from.strftime('%B %Y'),
+            'date_start': cls.date_from,
+            'date_end': cls.date_to,
+        })
+        cls.env.flush_all()
+
+    @classmethod
+    def _generate_configuration(cls):
+        """Approved working days configuration and overtime type"""
+        if not cls.env['working.days.config'].search(
+                [('company_id', '=', cls.company.id)]):
+            cls.env['working.days.config'].create({
+                'name': 'Benchmark Working Days',
+                'number_of_working_days': 26,
+                'state': 'approved',
+            })
+        cls.overtime_type = cls.env['overtime.type'].search([
+            ('name', '=', 'regular'),
+            ('company_id', '=', cls.company.id),
+        ], limit=1) or cls.env['overtime.type'].create({
+            'name': 'regular',
+            'multiplier': 1.5,
+        })
+        cls.overtime_type.state = 'approved'
+        cls.perdiem_config = cls.env['perdiem.config'].create({
+            'name': 'Benchmark Per Diem',
+            'daily_rate': 350.0,
+        })
+
+    @classmethod
+    def _generate_structure(cls):
+        """Structure with fixed, percentage and code rules, a rule with
+        conditional children and rules reading the other payroll sources"""
+        category = cls.env['hr.salary.rule.category']
+        basic = category.create({'name': 'Basic', 'code': 'BASIC'})
+        allowance = category.create({'name': 'Allowance', 'code': 'ALW'})
+        gross = category.create({'name': 'Gross', 'code': 'GROSS'})
+        deduction = category.create({'name': 'Deduction', 'code': 'DED'})
+        net = category.create({'name': 'Net', 'code': 'NET'})
+        period = 'payslip.date_from, payslip.date_to'
+        rules = [
+            ('Basic Salary', 'BASIC', basic, 1, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = contract._prorated_basic(%s)' % period}),
+            ('House Rent', 'HRA', allowance, 10, {
+                'amount_select': 'percentage',
+                'amount_percentage_base': 'contract.wage',
+                'amount_percentage': 10.0}),
+            ('Transport', 'TRANSPORT', allowance, 11, {
+                'amount_select': 'fix',
+                'amount_fix': 600.0}),
+            ('Overtime', 'OVERTIME', allowance, 12, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = contract.get_overtime_amount(%s)' % period}),
+            ('Per Diem', 'PERDIEM', allowance, 13, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = contract.get_perdiem_amount(%s)' % period}),
+            ('Bonus', 'BONUS', allowance, 14, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = inputs.BONUS and inputs.BONUS.amount or 0.0',
+                'input_ids': [(0, 0, {'name': 'Bonus', 'code': 'BONUS'})]}),
+            ('Gross', 'GROSS', gross, 100, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = categories.BASIC + categories.ALW'}),
+            ('Pension', 'EE_PENSION', deduction, 110, {
+                'amount_select': 'percentage',
+                'amount_percentage_base': 'categories.BASIC',
+                'amount_percentage': -7.0}),
+            ('Year to Date Net', 'YTD_NET', deduction, 120, {
+                'amount_select': 'code',
+                'appears_on_payslip': False,
+                'amount_python_compute':
+                    "result = 0.0 * payslip.sum('NET', "
+                    "payslip.date_from.replace(month=1, day=1), "
+                    "payslip.date_to)"}),
+            ('Income Tax', 'INCOME_TAX', deduction, 130, {
+                'condition_select': 'range',
+                'condition_range': 'contract.wage',
+                'condition_range_min': 600.0,
+                'condition_range_max': 1000000.0,
+                'amount_select': 'code',
+                'amount_python_compute': 'result = 0.0',
+                'child_ids': [
+                    (0, 0, {
+                        'name': 'Income Tax (High)',
+                        'code': 'INCOME_TAX_HIGH',
+                        'category_id': deduction.id,
+                        'sequence': 131,
+                        'condition_select': 'python',
+                        'condition_python':
+                            'result = categories.GROSS > 10000',
+                        'amount_select': 'code',
+                        'amount_python_compute':
+                            'result = -(categories.GROSS - 10000) * 0.35 '
+                            '- 1500'}),
+                    (0, 0, {
+                        'name': 'Income Tax (Low)',
+                        'code': 'INCOME_TAX_LOW',
+                        'category_id': deduction.id,
+                        'sequence': 132,
+                        'condition_select': 'python',
+                        'condition_python':
+                            'result = categories.GROSS <= 10000',
+                        'amount_select': 'percentage',
+                        'amount_percentage_base': 'categories.GROSS',
+                        'amount_percentage': -15.0}),
+                ]}),
+        ]
+        if 'hr.loan' in cls.env:
+            rules.append(('Loan', 'LOAN', deduction, 140, {
+                'amount_select': 'code',
+                'amount_python_compute':
+                    'result = -contract.get_loan_amount(%s)' % period}))
+        rules.append(('Net Salary', 'NET', net, 200, {
+            'amount_select': 'code',
+            'amount_python_compute':
+                'result = categories.BASIC + categories.ALW '
+                '+ categories.DED'}))
+        rule_ids = cls.env['hr.salary.rule'].create([dict(
+            vals, name=name, code=code, category_id=category.id,
+            sequence=sequence) for name, code, category, sequence, vals in
+            rules])
+        return cls.env['hr.payroll.structure'].create({
+            'name': 'Benchmark Structure',
+            'code': 'BENCH',
+            'parent_id': False,
+            'rule_ids': [(6, 0, rule_ids.ids)],
+        })
+
+    @classmethod
+    def _generate_employees(cls):
+        """Employees spread over a few departments"""
+        departments = cls.env['hr.department'].create([
+            {'name': 'Benchmark Department %s' % index}
+            for index in range(5)])
+        return cls.env['hr.employee'].create([{
+            'name': 'Benchmark Employee %s' % index,
+            'department_id': departments[index % len(departments)].id,
+            'resource_calendar_id': cls.calendar.id,
+        } for index in range(cls.employee_count)])
+
+    @classmethod
+    def _generate_contracts(cls):
+        """Running contracts, a tenth of them starting within the period"""
+        return cls.env['hr.contract'].create([{
+            'name': 'Benchmark Contract %s' % index,
+            'employee_id': employee.id,
+            'struct_id': cls.structure.id,
+            'wage': 5000.0 + 97.0 * index,
+            'date_start': cls.date_from + timedelta(days=10)
+            if index % 10 == 0 else cls.date_from - relativedelta(years=1),
+            'resource_calendar_id': cls.calendar.id,
+            'state': 'open',
+        } for index, employee in enumerate(cls.employees)])
+
+    @classmethod
+    def _generate_leaves(cls):
+        """A day of leave for a tenth of the employees"""
+        leave_day = cls.date_from + timedelta(days=15)
+        cls.env['resource.calendar.leaves'].create([{
+            'name': 'Benchmark Leave',
+            'calendar_id': cls.calendar.id,
+            'resource_id': employee.resource_id.id,
+            'date_from': datetime.combine(leave_day, time(6, 0)),
+            'date_to': datetime.combine(leave_day, time(18, 0)),
+            'time_type': 'leave',
+        } for employee in cls.employees[::10]])
+
+    @classmethod
+    def _generate_overtimes(cls):
+        """Approved overtimes for a third of the employees"""
+        start = datetime.combine(cls.date_from + timedelta(days=3),
+                                 time(17, 0))
+        for employee in cls.employees[::3]:
+            cls.env['employee.overtime'].create({
+                'employee_id': employee.id,
+                'start_datetime': start,
+                'end_datetime': start + timedelta(hours=3),
+                'overtime_type_id': cls.overtime_type.id,
+                'state': 'hr_approved',
+            })
+
+    @classmethod
+    def _generate_perdiems(cls):
+        """Approved per diems of three days for a fifth of the employees"""
+        start = cls.date_from + timedelta(days=5)
+        for employee in cls.employees[::5]:
+            cls.env['employee.perdiem'].create({
+                'employee_id': employee.id,
+                'start_date': start,
+                'end_date': start + timedelta(days=2),
+                'perdiem_config_id': cls.perdiem_config.id,
+                'line_ids': [(0, 0, {'date': start + timedelta(days=day)})
+                             for day in range(3)],
+                'state': 'approved',
+            })
+
+    @classmethod
+    def _generate_loans(cls):
+        """Approved loans paid in six installments for a quarter of the
+        employees"""
+        for employee in cls.employees[::4]:
+            loan = cls.env['hr.loan'].create({
+                'employee_id': employee.id,
+                'loan_amount': 6000.0,
+                'installment': 6,
+                'payment_date': cls.date_from,
+            })
+            loan.action_compute_installment()
+            loan.write({'state': 'approve'})
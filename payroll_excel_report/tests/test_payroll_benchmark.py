@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from odoo.tests import tagged
+
+from .common import PayrollBenchmarkCommon
+
+_logger = logging.getLogger(__name__)
+
+THRESHOLDS_FILE = os.path.join(
+    os.path.dirname(__file__), 'payroll_benchmark_thresholds.json')
+
+
+@tagged('payroll_benchmark', '-standard', '-at_install', 'post_install')
+class TestPayrollBenchmark(PayrollBenchmarkCommon):
+    """End to end payroll benchmark: batch generation, recomputation,
+    confirmation and the batch Excel export of a synthetic company.
+
+    Run it explicitly with ``--test-tags payroll_benchmark``. The wall time
+    and the number of queries of every phase are logged, written to the
+    file named by PAYROLL_BENCHMARK_OUTPUT if set, and compared with the
+    per employee limits of payroll_benchmark_thresholds.json (or of the
+    file named by PAYROLL_BENCHMARK_THRESHOLDS)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = {}
+
+    @contextmanager
+    def _measure(self, phase):
+        """Function for measuring the wall time and queries of a phase,
+        pending writes included
+        @param phase: Name of the measured phase"""
+        cr = self.env.cr
+        self.env.flush_all()
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        self.results[phase] = {
+            'seconds': time.perf_counter() - start,
+            'queries': cr.sql_log_count - queries,
+        }
+
+    def _get_thresholds(self):
+        """Function for reading the per employee limits of every phase
+        @return: Dictionary of limits by phase"""
+        path = os.environ.get('PAYROLL_BENCHMARK_THRESHOLDS', THRESHOLDS_FILE)
+        with open(path) as thresholds_file:
+            return json.load(thresholds_file)
+
+    def _report(self):
+        """Function for logging the measurements and writing them to the
+        output file"""
+        lines = ['Payroll benchmark, %s employees' % self.employee_count]
+        for phase, result in self.results.items():
+            lines.append('%-10s %8.2fs %8d queries %8.2fms/employee' % (
+                phase, result['seconds'], result['queries'],
+                1000 * result['seconds'] / self.employee_count))
+        _logger.info('\n'.join(lines))
+        output = os.environ.get('PAYROLL_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump({'employees': self.employee_count,
+                           'phases': self.results}, output_file, indent=4)
+
+    def test_payroll_benchmark(self):
+        """Generate, recompute, confirm and export the batch and check
+        every phase against its thresholds"""
+        with self._measure('generate'):
+            self.env['hr.payslip.employees'].with_context(
+                active_id=self.run.id).create({
+                    'employee_ids': [(6, 0, self.employees.ids)],
+                }).action_compute_sheet()
+        payslips = self.run.slip_ids
+        self.assertEqual(len(payslips), self.employee_count)
+        self.assertTrue(all(slip.line_ids for slip in payslips))
+        for contract in self.contracts[:3]:
+            slip = payslips.filtered(
+                lambda payslip: payslip.employee_id == contract.employee_id)
+            with self.subTest(contract=contract.name):
+                self.assertAlmostEqual(
+                    slip.line_ids.filtered(
+                        lambda line: line.code == 'HRA').total,
+                    contract.wage * 0.1, places=2)
+
+        with self._measure('compute'):
+            payslips.with_context(force_compute=True).action_compute_sheet()
+
+        with self._measure('confirm'):
+            payslips.action_payslip_done()
+        self.assertEqual(set(payslips.mapped('state')), {'done'})
+
+        with self._measure('excel'):
+            self.env['payroll.batch.excel.wizard'].create({
+                'batch_id': self.run.id,
+            }).action_generate_excel()
+
+        self._report()
+        for phase, limits in self._get_thresholds().items():
+            result = self.results[phase]
+            with self.subTest(phase=phase):
+                self.assertLessEqual(
+                    result['seconds'],
+                    limits['max_seconds_per_employee'] * self.employee_count,
+                    'Payroll benchmark phase %s is slower than its '
+                    'threshold' % phase)
+                self.assertLessEqual(
+                    result['queries'],
+                    limits['max_queries_per_employee'] * self.employee_count,
+                    'Payroll benchmark phase %s runs more queries than its '
+                    'threshold' % phase)
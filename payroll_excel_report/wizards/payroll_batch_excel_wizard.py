@@ -3,9 +3,29 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 import io
+import tempfile
 import xlsxwriter
 import base64
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import groupby
+
+# columns of the payroll sheet read from the payslip lines: key, rule code
+# and whether the absolute amount is shown
+LINE_COLUMNS = [
+    ('earning_salary', 'BASIC', False),
+    ('taxable_allowance', 'TA', False),
+    ('non_taxable_allowance', 'NTA', False),
+    ('overtime', 'OVERTIME', False),
+    ('per_diem', 'PERDIEM', False),
+    ('gross', 'GROSS', False),
+    ('tti', 'TTI', False),
+    ('income_tax', 'INCOME_TAX', True),
+    ('ee_pension', 'EE_PENSION', False),
+    ('er_pension', 'EMP_PENSION', False),
+    ('loan', 'LOAN', True),
+    ('total_deduction', 'TD', False),
+    ('net_pay', 'NET', False),
+]
 
 class PayrollBatchExcelWizard(models.TransientModel):
     _name = 'payroll.batch.excel.wizard'
@@ -20,7 +40,7 @@ class PayrollBatchExcelWizard(models.TransientModel):
 
     def _calculate_working_days(self, employee, payslip_start, payslip_end):
         """
-        Calculate working days from payroll period, excluding Sundays.
+        Calculate working days from payroll period, excluding the weekly rest days and public holidays.
         If employee contract started after payroll start, calculate from contract start date.
         """
         # Get employee's active contract
@@ -31,22 +51,21 @@ class PayrollBatchExcelWizard(models.TransientModel):
             actual_start_date = contract.date_start
         else:
             actual_start_date = payslip_start
-            
-        # Calculate total calendar days in the period
-        total_days = (payslip_end - actual_start_date).days + 1
-        
-        # Count Sundays in the period (exclude them from working days)
-        sundays_count = 0
-        current_date = actual_start_date
-        while current_date <= payslip_end:
-            if current_date.weekday() == 6:  # Sunday is weekday 6
-                sundays_count += 1
-            current_date += timedelta(days=1)
-        
-        # Calculate actual working days (total days minus Sundays)
-        actual_working_days = total_days - sundays_count
-        
-        return actual_working_days
+
+        return self.env['hr.working.days'].count_working_days(
+            actual_start_date, payslip_end, company=employee.company_id or None)
+
+    def _get_line_pivot(self, payslips):
+        """
+        Read the amounts of the payslip lines of the payslips with one
+        grouped query: dict mapping payslip ids to {rule code: amount}.
+        """
+        pivot = {payslip_id: {} for payslip_id in payslips.ids}
+        for payslip, code, amount in self.env['hr.payslip.line']._read_group(
+                [('slip_id', 'in', payslips.ids)], ['slip_id', 'code'],
+                ['amount:sum']):
+            pivot[payslip.id][code] = amount
+        return pivot
 
     def action_generate_excel(self):
         self.ensure_one()
@@ -55,9 +74,10 @@ class PayrollBatchExcelWizard(models.TransientModel):
         if not batch.slip_ids:
             raise UserError("The selected payroll batch has no payslips.")
 
-        # Create an in-memory Excel file
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
+        # Create the Excel file in a temporary file, the rows are streamed
+        # to it in order in constant memory mode
+        output = tempfile.TemporaryFile()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
 
         # Get company
         company = self.env.company
@@ -85,14 +105,6 @@ class PayrollBatchExcelWizard(models.TransientModel):
             'border_color': '#000000',
         })
         
-        cell_format = workbook.add_format({
-            'bold': True,
-            'border': 2,
-            'border_color': '#000000',
-            'align': 'left',
-            'valign': 'vcenter',
-        })
-        
         dynamic_cell_format = workbook.add_format({
             'border': 1,
             'align': 'left',
@@ -159,11 +171,11 @@ class PayrollBatchExcelWizard(models.TransientModel):
         worksheet.set_row(4, 25)
 
         # --- Company Logo ---
+        logo_label = 'Logo'
         logo_data = company.logo
         if logo_data:
             try:
                 logo_image = io.BytesIO(base64.b64decode(logo_data))
-                worksheet.merge_range('A1:B3', '', cell_format)
                 worksheet.insert_image('A1', 'company_logo.png', {
                     'image_data': logo_image,
                     'x_scale': 0.15,
@@ -171,52 +183,64 @@ class PayrollBatchExcelWizard(models.TransientModel):
                     'x_offset': 10,
                     'y_offset': 10
                 })
+                logo_label = ''
             except Exception:
-                worksheet.merge_range('A1:B3', 'Logo', cell_format)
-        else:
-            worksheet.merge_range('A1:B3', 'Logo', cell_format)
+                pass
 
         # --- Header Rows ---
+        # In constant memory mode a row can't be written to once a next row
+        # is: the logo box is merged row by row, bordered outside only.
+        logo_box = {
+            'bold': True,
+            'left': 2,
+            'right': 2,
+            'border_color': '#000000',
+            'align': 'left',
+            'valign': 'vcenter',
+        }
+        logo_top_format = workbook.add_format(dict(logo_box, top=2))
+        logo_middle_format = workbook.add_format(logo_box)
+        logo_bottom_format = workbook.add_format(dict(logo_box, bottom=2))
+        worksheet.merge_range('A1:B1', logo_label, logo_top_format)
         worksheet.merge_range('C1:O1', company.name, title_format)
-        worksheet.merge_range('C2:O2', 'PAYROLL SHEET FORM', title_format_2)
         worksheet.merge_range('P1:T1', f'Issue Date: {batch.date_start.strftime("%d/%m/%Y")} to {batch.date_end.strftime("%d/%m/%Y")}', dynamic_revision_format)
+        worksheet.merge_range('A2:B2', '', logo_middle_format)
+        worksheet.merge_range('C2:O2', 'PAYROLL SHEET FORM', title_format_2)
         worksheet.merge_range('P2:T2', 'Revision No: 01 | Page 1 of 1', dynamic_revision_format)
+        worksheet.merge_range('A3:B3', '', logo_bottom_format)
         worksheet.merge_range('C3:T3', f'FOR THE MONTH OF {month_year.upper()}', dynamic_subtitle_format)
 
         # --- Collect All Payslip Data ---
+        payslips = batch.slip_ids
+        line_pivot = self._get_line_pivot(payslips)
         all_payslip_data = []
-        department_payslips = {}
         
-        for payslip in batch.slip_ids:
+        for payslip in payslips:
             employee = payslip.employee_id
-            department = employee.department_id.name if employee.department_id else 'No Department'
-            if department not in department_payslips:
-                department_payslips[department] = []
-            department_payslips[department].append(payslip)
+            amounts = line_pivot[payslip.id]
             
             # Collect all payslip data
             contract_wage = payslip.contract_id.wage if payslip.contract_id else 0.0
             payslip_data = {
                 'employee': employee,
                 'payslip': payslip,
+                'department': employee.department_id.name if employee.department_id else 'No Department',
                 'days_worked': self._calculate_working_days(employee, payslip.date_from, payslip.date_to),
                 'basic_salary': contract_wage,
-                'earning_salary': payslip.line_ids.filtered(lambda l: l.code == 'BASIC').amount or 0.0,
-                'taxable_allowance': payslip.line_ids.filtered(lambda l: l.code == 'TA').amount or 0.0,
-                'non_taxable_allowance': payslip.line_ids.filtered(lambda l: l.code == 'NTA').amount or 0.0,
-                'overtime': payslip.line_ids.filtered(lambda l: l.code == 'OVERTIME').amount or 0.0,
-                'per_diem': payslip.line_ids.filtered(lambda l: l.code == 'PERDIEM').amount or 0.0,
-                'gross': payslip.line_ids.filtered(lambda l: l.code == 'GROSS').amount or 0.0,
-                'tti': payslip.line_ids.filtered(lambda l: l.code == 'TTI').amount or 0.0,
-                'income_tax': abs(payslip.line_ids.filtered(lambda l: l.code == 'INCOME_TAX').amount or 0.0),
-                'ee_pension': payslip.line_ids.filtered(lambda l: l.code == 'EE_PENSION').amount or 0.0,
-                'er_pension': payslip.line_ids.filtered(lambda l: l.code == 'EMP_PENSION').amount or 0.0,
-                'loan': abs(payslip.line_ids.filtered(lambda l: l.code == 'LOAN').amount or 0.0),
-                'total_deduction': payslip.line_ids.filtered(lambda l: l.code == 'TD').amount or 0.0,
-                'net_pay': payslip.line_ids.filtered(lambda l: l.code == 'NET').amount or 0.0,
             }
+            for field_key, code, absolute in LINE_COLUMNS:
+                amount = amounts.get(code) or 0.0
+                payslip_data[field_key] = abs(amount) if absolute else amount
             all_payslip_data.append(payslip_data)
 
+        # rule codes with an amount on any payslip
+        line_codes = {
+            code
+            for amounts in line_pivot.values()
+            for code, amount in amounts.items()
+            if abs(amount or 0.0) > 0.01
+        }
+
         # --- Define All Possible Columns ---
         all_columns = [
             ('Sr No', 'sr_no'),
@@ -241,10 +265,14 @@ class PayrollBatchExcelWizard(models.TransientModel):
         ]
 
         # --- Filter Active Columns (with non-zero values) ---
+        column_codes = {field_key: code for field_key, code, _absolute in LINE_COLUMNS}
         active_columns = []
         for header, field_key in all_columns:
             if field_key in ['sr_no', 'name', 'signature', 'account_number']:
                 active_columns.append((header, field_key))
+            elif field_key in column_codes:
+                if column_codes[field_key] in line_codes:
+                    active_columns.append((header, field_key))
             else:
                 has_value = any(abs(data.get(field_key, 0)) > 0.01 for data in all_payslip_data)
                 if has_value:
@@ -284,13 +312,12 @@ class PayrollBatchExcelWizard(models.TransientModel):
 
         # --- Write Data Rows by Department ---
         row = 4  # Start right after headers (row 3 in 0-indexed = row 4 in Excel)
-        sorted_departments = sorted(department_payslips.keys())
         global_idx = 1
         grand_totals = {}
 
-        for department in sorted_departments:
-            payslips = department_payslips[department]
-            
+        # the sort is stable: the payslips keep the batch order in a department
+        all_payslip_data.sort(key=lambda data: data['department'])
+        for department, department_data in groupby(all_payslip_data, key=lambda data: data['department']):
             # Department Header
             dept_col_idx = next((i for i, (h, f) in enumerate(active_columns) if f == 'name'), 1)
             worksheet.write(row, dept_col_idx, f"{department} Department", department_total_format)
@@ -298,35 +325,34 @@ class PayrollBatchExcelWizard(models.TransientModel):
 
             dept_totals = {}
             
-            for payslip_data in all_payslip_data:
-                if payslip_data['payslip'] in payslips:
-                    employee = payslip_data['employee']
-                    account_number = employee.bank_account_id.acc_number if employee.bank_account_id else 'N/A'
-
-                    # Write data for active columns
-                    for col, (header, field_key) in enumerate(active_columns):
-                        if field_key == 'sr_no':
-                            worksheet.write(row, col, global_idx, dynamic_cell_format)
-                        elif field_key == 'name':
-                            worksheet.write(row, col, employee.name or '', dynamic_cell_format)
-                        elif field_key == 'account_number':
-                            worksheet.write(row, col, account_number, dynamic_cell_format)
-                        elif field_key == 'signature':
-                            worksheet.write(row, col, '', dynamic_cell_format)
-                        else:
-                            value = payslip_data.get(field_key, 0.0)
-                            worksheet.write(row, col, value, dynamic_number_format)
-                            
-                            # Update totals
-                            if field_key not in dept_totals:
-                                dept_totals[field_key] = 0.0
-                            if field_key not in grand_totals:
-                                grand_totals[field_key] = 0.0
-                            dept_totals[field_key] += value
-                            grand_totals[field_key] += value
-
-                    row += 1
-                    global_idx += 1
+            for payslip_data in department_data:
+                employee = payslip_data['employee']
+                account_number = employee.bank_account_id.acc_number if employee.bank_account_id else 'N/A'
+
+                # Write data for active columns
+                for col, (header, field_key) in enumerate(active_columns):
+                    if field_key == 'sr_no':
+                        worksheet.write(row, col, global_idx, dynamic_cell_format)
+                    elif field_key == 'name':
+                        worksheet.write(row, col, employee.name or '', dynamic_cell_format)
+                    elif field_key == 'account_number':
+                        worksheet.write(row, col, account_number, dynamic_cell_format)
+                    elif field_key == 'signature':
+                        worksheet.write(row, col, '', dynamic_cell_format)
+                    else:
+                        value = payslip_data.get(field_key, 0.0)
+                        worksheet.write(row, col, value, dynamic_number_format)
+                        
+                        # Update totals
+                        if field_key not in dept_totals:
+                            dept_totals[field_key] = 0.0
+                        if field_key not in grand_totals:
+                            grand_totals[field_key] = 0.0
+                        dept_totals[field_key] += value
+                        grand_totals[field_key] += value
+
+                row += 1
+                global_idx += 1
 
             # Department Total Row
             worksheet.write(row, dept_col_idx, f"Total {department} Salary", department_total_format)
@@ -362,9 +388,9 @@ class PayrollBatchExcelWizard(models.TransientModel):
 
         row2 = 4
         total_net_salary = 0.0
-        for idx, payslip in enumerate(batch.slip_ids, 1):
+        for idx, payslip in enumerate(payslips, 1):
             employee = payslip.employee_id
-            net_pay = payslip.line_ids.filtered(lambda l: l.code == 'NET').amount or 0.0
+            net_pay = line_pivot[payslip.id].get('NET') or 0.0
             total_net_salary += net_pay
 
             # Get bank account directly from employee
@@ -421,8 +447,9 @@ class PayrollBatchExcelWizard(models.TransientModel):
 
         # Write data for Worksheet 3
         row3 = 4
-        for idx, payslip in enumerate(batch.slip_ids, 1):
+        for idx, payslip in enumerate(payslips, 1):
             employee = payslip.employee_id
+            amounts = line_pivot[payslip.id]
             
             # Get employee TIN
             emp_tin = employee.tin_number if hasattr(employee, 'tin_number') else ''
@@ -436,16 +463,16 @@ class PayrollBatchExcelWizard(models.TransientModel):
             contract_start = payslip.contract_id.date_start if payslip.contract_id else ''
             
             # Get salary components
-            basic_salary = payslip.line_ids.filtered(lambda l: l.code == 'BASIC').amount or 0.0
-            total_transport = (payslip.line_ids.filtered(lambda l: l.code == 'TTRAT').amount or 0.0) + \
-                             (payslip.line_ids.filtered(lambda l: l.code == 'NTRA').amount or 0.0)
-            taxable_transport = payslip.line_ids.filtered(lambda l: l.code == 'TTRAT').amount or 0.0
-            overtime = payslip.line_ids.filtered(lambda l: l.code == 'OVERTIME').amount or 0.0
-            housing = payslip.line_ids.filtered(lambda l: l.code == 'HRA').amount or 0.0
-            taxable_income = payslip.line_ids.filtered(lambda l: l.code == 'TTI').amount or 0.0
-            tax_withheld = abs(payslip.line_ids.filtered(lambda l: l.code == 'INCOME_TAX').amount or 0.0)
-            cost_sharing = payslip.line_ids.filtered(lambda l: l.code == 'EE_PENSION').amount or 0.0
-            net_pay = payslip.line_ids.filtered(lambda l: l.code == 'NET').amount or 0.0
+            basic_salary = amounts.get('BASIC') or 0.0
+            total_transport = (amounts.get('TTRAT') or 0.0) + \
+                             (amounts.get('NTRA') or 0.0)
+            taxable_transport = amounts.get('TTRAT') or 0.0
+            overtime = amounts.get('OVERTIME') or 0.0
+            housing = amounts.get('HRA') or 0.0
+            taxable_income = amounts.get('TTI') or 0.0
+            tax_withheld = abs(amounts.get('INCOME_TAX') or 0.0)
+            cost_sharing = amounts.get('EE_PENSION') or 0.0
+            net_pay = amounts.get('NET') or 0.0
             
             # Write data
             worksheet3.write(row3, 0, idx, dynamic_cell_format)
@@ -468,13 +495,14 @@ class PayrollBatchExcelWizard(models.TransientModel):
         workbook.close()
         output.seek(0)
         
-        # Create attachment
+        # Create attachment from the raw file, /web/content streams it back
         filename = f"Payroll_{batch.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         attachment = self.env['ir.attachment'].create({
             'name': filename,
-            'datas': base64.b64encode(output.read()),
+            'raw': output.read(),
             'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         })
+        output.close()
         
         return {
             'type': 'ir.actions.act_url',
@@ -2,9 +2,8 @@
 
 from odoo import models, fields
 from odoo.exceptions import UserError
-import io
+import tempfile
 import xlsxwriter
-import base64
 from datetime import datetime
 
 class PayrollExcelWizard(models.TransientModel):
@@ -20,9 +19,10 @@ class PayrollExcelWizard(models.TransientModel):
         if not self.batch_id.slip_ids:
             raise UserError("This batch has no payslips!")
 
-        # Create Excel
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
+        # Create Excel in a temporary file, the rows are streamed to it in
+        # order in constant memory mode
+        output = tempfile.TemporaryFile()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
         sheet = workbook.add_worksheet('Payroll Report')
 
         # Get company info
@@ -215,13 +215,14 @@ class PayrollExcelWizard(models.TransientModel):
         workbook.close()
         output.seek(0)
         
-        # Save attachment
+        # Save attachment from the raw file, /web/content streams it back
         fname = f"Payroll_{self.batch_id.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         att = self.env['ir.attachment'].create({
             'name': fname,
-            'datas': base64.b64encode(output.read()),
+            'raw': output.read(),
             'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         })
+        output.close()
         
         return {
             'type': 'ir.actions.act_url',